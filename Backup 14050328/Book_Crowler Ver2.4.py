@@ -2,81 +2,182 @@
 """
 Book_Crawler_v2.4
 - جداشدن منطق: get_book_div_from_page و extract_details_from_div
-- دانلود تصویر با نام شابک (بدون -) به پوشه "Books Images"
-- درج تصویر در اکسل به صورت LinkToFile و Placement = MoveAndSize
-- استفاده از html.parser (بدون lxml)
+- دانلود تصویر با نام شابک (بدون -) به پوشه "Books Images"؛ دسته‌ای، هم‌زمان و قابل ادامه (image_fetch)
+- درج تصویر در اکسل (هم‌اندازه سلول و MoveAndSize) از طریق workbook_backend
+- اکسل با openpyxl (بدون نیاز به Excel) یا win32com خوانده/نوشته می‌شود
+- هر صفحه فقط یک بار parse می‌شود؛ lxml اگر نصب باشد، وگرنه html.parser
+- ستون‌های خالی از گیسوم پر می‌شوند (metadata_merge)؛ گیسوم فقط وقتی پرسیده می‌شود که لازم باشد
 """
+import argparse
 import os
 import re
 import time
-import random
 import requests
-import pandas as pd
 from bs4 import BeautifulSoup
 from urllib.parse import urlparse
 import sys
+import threading
+from collections import OrderedDict
+from itertools import takewhile
+from collection_number import collection_number
+from crawl_journal import CrawlJournal, in_shard, parse_shard
+from http_cache import ResponseCache, CachedResponse
+from image_fetch import ImageFetcher
+from metadata_merge import GISOOM_COLUMNS, Enricher
+from politeness import PolitenessScheduler, THROTTLE_STATUSES
+from persian_text import normalize_isbn
+from structured_data import PathStats, pick_book, scan_html
+from workbook_backend import open_backend
 
 # تنظیمات
 EXCEL_FILE = "Parsa Library.xlsx"
 IMAGE_DIR = "Books Images"
 BASE = "https://www.iranketab.ir"
 HEADERS = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"}
-DELAY_RANGE = (0.8, 2.0)
+# فاصله‌ی درخواست‌ها به هر میزبان (جستجو، صفحه کتاب و تصویر) با politeness تنظیم می‌شود:
+# نرخ شروع و محدوده‌ی تطبیقی بر حسب درخواست در ثانیه؛ 429/503 تا THROTTLE_RETRIES بار تکرار می‌شود
+POLITE_RATE = 0.7
+POLITE_RATE_RANGE = (0.2, 2.0)
+THROTTLE_RETRIES = 3
 UPDATE_ALL = False
+# "openpyxl" (بدون نیاز به Excel، روی لینوکس هم) یا "win32com" (Excel باز و قابل مشاهده)
+EXCEL_BACKEND = "openpyxl"
 EXCEL_VISIBLE = True
+SAVE_EVERY = 10  # هر چند کتاب یک بار فایل ذخیره شود
+# کش پاسخ‌های HTTP (None = غیرفعال)
+CACHE_FILE = "iranketab_cache.sqlite"
+CACHE_TTL = 7 * 24 * 3600          # ثانیه؛ تا این مدت بدون درخواست از کش خوانده می‌شود
+CACHE_MAX_BYTES = 200 * 1024 * 1024
+# دفتر ثبت مرحله‌های هر شابک (ادامه‌ی اجرای قطع‌شده از همان نقطه، crawl_journal)؛
+# شابکی که کاملاً انجام شده دیگر تکرار نمی‌شود مگر با --restart (مثلاً همراه UPDATE_ALL)
+JOURNAL_FILE = "crawl_journal.sqlite"
+# موتور parse (None = lxml اگر نصب باشد، وگرنه html.parser)
+HTML_PARSER = None
+# چند صفحه کتاب parse‌شده (همراه نقشه‌ی شابک -> نسخه) نگه داشته شوند؛ ردیف‌های یک مجموعه
+# معمولاً پشت سر هم‌اند و به یک صفحه می‌رسند
+PAGE_MEMO_SIZE = 16
+# تصاویر هر دسته (SAVE_EVERY کتاب) با هم و هم‌زمان دانلود می‌شوند
+IMAGE_WORKERS = 6
+# منبع‌های اطلاعات به ترتیب اولویت (metadata_merge)؛ منبع دوم فقط وقتی پرسیده می‌شود که ستون‌های
+# اجباری (metadata_merge.REQUIRED) از منبع اول خالی بمانند. ("iranketab",) = فقط ایران‌کتاب
+SOURCES = ("iranketab", "gisoom")
+MERGE_PARALLEL = False   # True: همه‌ی منبع‌ها هم‌زمان پرسیده می‌شوند (سریع‌تر، درخواست بیشتر)
+MERGE_WORKERS = 2        # چند شابک هم‌زمان جستجو شوند (نوبت هر میزبان همچنان با SCHEDULER است)
+GISOOM_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Gisoom")
+GISOOM_RATE = 2.0        # حداکثر درخواست در ثانیه به گیسوم
 
 os.makedirs(IMAGE_DIR, exist_ok=True)
+CACHE = None                # ResponseCache؛ با اولین درخواست ساخته می‌شود (get_cache)
+CACHE_LOCK = threading.Lock()
+SCHEDULER = PolitenessScheduler(rate=POLITE_RATE, min_rate=POLITE_RATE_RANGE[0], max_rate=POLITE_RATE_RANGE[1])
+PAGE_MEMO = OrderedDict()   # آدرس صفحه بدون fragment -> (soup، نقشه‌ی نسخه‌ها)
+PAGE_MEMO_LOCK = threading.Lock()
+BOOK_PAGES = {}             # شابک نرمال‌شده -> آدرس صفحه‌ی دریافت‌شده‌ای که نسخه‌اش را دارد
+PAGE_LOCKS = {}             # آدرس صفحه -> قفل، تا هر صفحه فقط در یک نخ دریافت شود
+# fetched: صفحه کتاب دریافت و parse شد، reused: از همین اجرا دوباره استفاده شد،
+# requests_avoided: حداقل درخواست‌هایی که به این خاطر فرستاده نشدند (جستجوی حذف‌شده یکی حساب
+# می‌شود، حتی اگر بعد از صفحه نتایجش دریافت صفحه کتاب هم لازم بود)
+PAGE_STATS = {"fetched": 0, "reused": 0, "requests_avoided": 0}
+# زمان و ستون‌های هر مسیر استخراج: structured (JSON-LD/microdata/OpenGraph صفحه) و dom (کارت نسخه)
+EXTRACT_PATHS = PathStats()
 
 def log(msg):
     print(f"[{time.strftime('%H:%M:%S')}] {msg}")
 
-def remove_old_images(ws, row, col):
-    """
-    تمام تصاویر یا Shapeهایی که در سلول مشخص شده (row, col) قرار دارند را حذف می‌کند.
-    برای جلوگیری از بهم ریختن ایندکس‌ها هنگام حذف، از انتهای لیست شروع می‌کند.
-    """
+def pick_html_parser():
+    if HTML_PARSER:
+        return HTML_PARSER
     try:
-        # تعداد کل Shapeها
-        count = ws.Shapes.Count
-        # حلقه معکوس (از آخر به اول)
-        for i in range(count, 0, -1):
-            shp = ws.Shapes.Item(i)
-            # بررسی اینکه آیا "سلولِ لنگر" تصویر، همان سلول مورد نظر ماست؟
-            if shp.TopLeftCell.Row == row and shp.TopLeftCell.Column == col:
-                shp.Delete()
-    except Exception as e:
-        print(f"Error removing old images: {e}")
-        
-def safe_get(url, allow_redirects=True, timeout=25):
+        import lxml  # noqa: F401
+        return "lxml"
+    except ImportError:
+        return "html.parser"
+
+PARSER = pick_html_parser()
+
+def parse_html(html):
+    """تنها جایی که HTML به درخت BeautifulSoup تبدیل می‌شود."""
+    return BeautifulSoup(html, PARSER)
+
+def get_cache():
+    """کش پاسخ‌ها (یا None اگر CACHE_FILE خالی است)؛ فایل با اولین درخواست ساخته می‌شود نه با import."""
+    global CACHE
+    if CACHE is None and CACHE_FILE:
+        with CACHE_LOCK:
+            if CACHE is None:
+                CACHE = ResponseCache(CACHE_FILE, ttl=CACHE_TTL, max_bytes=CACHE_MAX_BYTES)
+    return CACHE
+
+def safe_get(url, allow_redirects=True, timeout=25, use_cache=True):
     """
     درخواست HTTP ایمن با fallback خودکار برای خطای SSL.
     ابتدا با verify=True تلاش می‌کند و در صورت SSLError مجدد با verify=False امتحان می‌شود.
+    اگر کش فعال باشد: پاسخ تازه بدون درخواست از کش برمی‌گردد و پاسخ کهنه با
+    ETag/Last-Modified اعتبارسنجی می‌شود (در صورت 304 همان نسخه کش استفاده می‌شود).
+    قبل از هر درخواست واقعی نوبت میزبان از SCHEDULER گرفته می‌شود و نتیجه به آن گزارش می‌شود.
     """
-    try:
-        time.sleep(random.uniform(*DELAY_RANGE))
-        # تلاش اول با تأیید SSL
-        r = requests.get(url, headers=HEADERS, allow_redirects=allow_redirects, timeout=timeout, verify=True)
+    cache = get_cache() if use_cache else None
+    entry = cache.get(url) if cache else None
+    # در حالت UPDATE_ALL همه صفحات اعتبارسنجی می‌شوند (فقط صفحات تغییرکرده دانلود می‌شوند)
+    if entry and entry["fresh"] and not UPDATE_ALL:
+        return CachedResponse(entry["final_url"], entry["text"])
+
+    headers = dict(HEADERS)
+    if cache:
+        headers.update(cache.conditional_headers(entry))
+
+    def fetch(verify):
+        try:
+            r = requests.get(url, headers=headers, allow_redirects=allow_redirects, timeout=timeout, verify=verify)
+        except requests.exceptions.SSLError:
+            raise
+        except requests.exceptions.RequestException:
+            SCHEDULER.feedback(url, error=True)
+            raise
+        SCHEDULER.feedback(url, r.status_code, r.elapsed.total_seconds(), r.headers.get("Retry-After"))
+        if r.status_code == 304 and entry:
+            cache.touch(url)
+            return CachedResponse(entry["final_url"], entry["text"])
         r.raise_for_status()
         r.encoding = "utf-8"
+        if cache:
+            cache.put(url, r.url, r.text,
+                      etag=r.headers.get("ETag"),
+                      last_modified=r.headers.get("Last-Modified"))
         return r
-    except requests.exceptions.SSLError as e:
-        log(f"⚠️ هشدار SSL در GET {url}: {e} → تلاش مجدد بدون تأیید SSL ...")
+
+    for attempt in range(THROTTLE_RETRIES + 1):
+        SCHEDULER.wait(url)
         try:
-            r = requests.get(url, headers=HEADERS, allow_redirects=allow_redirects, timeout=timeout, verify=False)
-            r.raise_for_status()
-            r.encoding = "utf-8"
-            return r
-        except Exception as e2:
-            log(f"❌ خطا در تلاش دوم GET بدون SSL ({url}): {e2}")
+            # تلاش اول با تأیید SSL
+            return fetch(verify=True)
+        except requests.exceptions.SSLError as e:
+            log(f"⚠️ هشدار SSL در GET {url}: {e} → تلاش مجدد بدون تأیید SSL ...")
+            try:
+                return fetch(verify=False)
+            except Exception as e2:
+                log(f"❌ خطا در تلاش دوم GET بدون SSL ({url}): {e2}")
+                return None
+        except requests.exceptions.HTTPError as e:
+            status = e.response.status_code
+            if status in THROTTLE_STATUSES and attempt < THROTTLE_RETRIES:
+                # Retry-After و نرخ کمتر را SCHEDULER در نوبت بعدی اعمال می‌کند
+                log(f"⏳ {status} از {urlparse(url).netloc} → تلاش دوباره با نرخ کمتر ...")
+                continue
+            log(f"⚠️ خطا در GET {url}: {e}")
+            return None
+        except requests.exceptions.RequestException as e:
+            log(f"⚠️ خطا در GET {url}: {e}")
             return None
-    except requests.exceptions.RequestException as e:
-        log(f"⚠️ خطا در GET {url}: {e}")
-        return None
 
 
 # ---------- تابعی که URL نهایی صفحه کتاب را برمی‌گرداند و HTML آن را ----------
-def get_final_book_url_and_html(isbn):
-    isbn_clean = str(isbn).replace("-", "").strip()
+def get_final_book_url_and_html(isbn, fetch_page=True):
+    """
+    (آدرس صفحه کتاب، HTML) یا (None, None). با fetch_page=False اگر جستجو به صفحه نتایج رسید
+    فقط آدرس اولین کتاب برمی‌گردد (HTML = None) و دریافتش با فراخواننده است.
+    """
+    isbn_clean = normalize_isbn(isbn)
     if not isbn_clean:
         return None, None
     search_url = f"{BASE}/result/{isbn_clean}?t=کتاب&s=0"
@@ -91,186 +192,302 @@ def get_final_book_url_and_html(isbn):
         return final_url, html
 
     # وگرنه از صفحه نتایج اولین لینک /book/ را بردار
-    soup = BeautifulSoup(html, "html.parser")
+    soup = parse_html(html)
     link_tag = soup.find("a", href=re.compile(r"^/book/"))
     if link_tag:
         href = link_tag.get("href")
         book_page_url = (BASE + href) if href.startswith("/") else href
+        if not fetch_page:
+            return book_page_url, None
         r2 = safe_get(book_page_url)
         if r2:
             return book_page_url, r2.text
+    elif get_cache():
+        # نتیجه خالی را نگه نمی‌داریم تا کتاب‌هایی که بعداً اضافه می‌شوند در اجرای بعد پیدا شوند
+        get_cache().delete(search_url)
     return None, None
 
+# ---------- نقشه‌ی نسخه‌های یک صفحه کتاب (یک بار پیمایش برای همه شابک‌ها) ----------
+ISBN_LABEL = re.compile("شابک")
+ISBN_VALUE = re.compile(r"\d{9,13}")
+
+def build_edition_index(soup):
+    """
+    یک بار پیمایش صفحه: {"ids": {id: div}, "isbns": {شابک نرمال‌شده: div}} برای کارت‌های
+    نسخه (divهایی که id آن‌ها با p- شروع می‌شود). برای همه ردیف‌هایی که به همین صفحه
+    می‌رسند دوباره قابل استفاده است.
+    """
+    ids = {div["id"]: div for div in soup.select('div[id^="p-"]')}
+    isbns = {}
+    if not ids:
+        return {"ids": ids, "isbns": isbns}
+    for text in soup.find_all(string=ISBN_LABEL):
+        # برچسب: span/div که تنها محتوایش متن "شابک:" است
+        label = text.parent
+        if label is None or label.name not in ("span", "div") or label.string is not text:
+            continue
+        block = next((p for p in label.parents if p.get("id") in ids), None)
+        if block is None:
+            continue
+        # حالت‌های مختلف: <span>شابک:</span><span>978-...</span> یا spanهای دیگر همان والد
+        val = None
+        nxt = label.find_next_sibling()
+        if nxt and nxt.get_text(strip=True):
+            val = nxt.get_text(strip=True)
+        else:
+            for s in label.parent.find_all("span"):
+                txt = s.get_text(strip=True)
+                if ISBN_VALUE.search(txt):
+                    val = txt
+                    break
+        if val:
+            # اولین کارت هر شابک (به ترتیب صفحه) برنده است، مثل جستجوی خطی قبلی
+            isbns.setdefault(normalize_isbn(val), block)
+    return {"ids": ids, "isbns": isbns}
+
+def count_page(key, n=1):
+    with PAGE_MEMO_LOCK:
+        PAGE_STATS[key] += n
+
+def memo_page(page_url):
+    """(soup، نقشه‌ی نسخه‌ها) اگر صفحه در همین اجرا parse شده و هنوز در حافظه باشد، وگرنه None."""
+    key = page_url.split("#")[0]
+    with PAGE_MEMO_LOCK:
+        if key in PAGE_MEMO:
+            PAGE_MEMO.move_to_end(key)
+            return PAGE_MEMO[key]
+    return None
+
+def parsed_page(page_url, html):
+    """(soup، نقشه‌ی نسخه‌ها) برای صفحه کتاب؛ صفحه‌ای که در همین اجرا parse شده دوباره parse نمی‌شود."""
+    page = memo_page(page_url)
+    if page is not None:
+        return page
+    key = page_url.split("#")[0]
+    soup = parse_html(html)
+    index = build_edition_index(soup)
+    # داده‌ی ساخت‌یافته یک بار برای صفحه از HTML خام (بدون درخت) خوانده می‌شود
+    start = time.perf_counter()
+    index["structured"] = scan_html(html)
+    EXTRACT_PATHS.count("structured", "seconds", time.perf_counter() - start)
+    page = (soup, index)
+    with PAGE_MEMO_LOCK:
+        PAGE_MEMO[key] = page
+        while len(PAGE_MEMO) > PAGE_MEMO_SIZE:
+            PAGE_MEMO.popitem(last=False)
+        # همه نسخه‌های این صفحه: ردیف‌های بعدی با این شابک‌ها دیگر جستجو نمی‌شوند
+        for other in page[1]["isbns"]:
+            BOOK_PAGES.setdefault(other, key)
+        PAGE_STATS["fetched"] += 1
+    return page
+
+def load_page(page_url):
+    """
+    (soup، نقشه‌ی نسخه‌ها، آیا درخواست فرستاده شد) یا None. صفحه‌ای که در حافظه‌ی همین اجراست
+    دوباره درخواست نمی‌شود و اگر دو نخ هم‌زمان یک صفحه را بخواهند فقط یکی دریافتش می‌کند.
+    """
+    key = page_url.split("#")[0]
+    with PAGE_MEMO_LOCK:
+        lock = PAGE_LOCKS.setdefault(key, threading.Lock())
+    with lock:
+        page = memo_page(key)
+        if page is not None:
+            return (*page, False)
+        r = safe_get(key)
+        if not r:
+            return None
+        return (*parsed_page(key, r.text), True)
+
+def get_book_page(isbn):
+    """
+    (آدرس صفحه کتاب، soup، نقشه‌ی نسخه‌ها) یا (None, None, None).
+    شابکی که نسخه‌اش در صفحه‌ای است که همین اجرا دریافت کرده اصلاً جستجو نمی‌شود و اگر جستجو
+    به صفحه‌ای برسد که در حافظه است، آن صفحه دوباره دریافت نمی‌شود.
+    """
+    with PAGE_MEMO_LOCK:
+        known = BOOK_PAGES.get(normalize_isbn(isbn))
+    if known:
+        page = load_page(known)
+        if page:
+            soup, index, fetched = page
+            if not fetched:
+                count_page("reused")
+                count_page("requests_avoided")
+            log(" -> نسخه در صفحه‌ای است که همین اجرا دریافت کرده بود؛ بدون جستجو.")
+            return known, soup, index
+
+    book_url, html = get_final_book_url_and_html(isbn, fetch_page=False)
+    if not book_url:
+        return None, None, None
+    if html is not None:
+        # جستجو مستقیم به صفحه کتاب رسید؛ parse فقط اگر در حافظه نباشد
+        soup, index = parsed_page(book_url, html)
+        return book_url, soup, index
+    page = load_page(book_url)
+    if not page:
+        return None, None, None
+    soup, index, fetched = page
+    if not fetched:
+        count_page("reused")
+        count_page("requests_avoided")
+    return book_url, soup, index
+
 # ---------- تابعی که از HTML صفحه دقیقاً همان div نسخه مورد نظر را پیدا می‌کند ----------
-def get_book_div_from_page(page_url, html, isbn):
+def get_book_div_from_page(page_url, soup, isbn, index=None):
     """
-    ورودی: page_url (ممکن است شامل fragment مثل #p-114766)، html صفحه، و شابک مورد نظر
+    ورودی: page_url (ممکن است شامل fragment مثل #p-114766)، صفحه‌ی parse شده (soup) یا html خام، و شابک مورد نظر
+    index: خروجی build_edition_index همین صفحه (اگر نباشد ساخته می‌شود)
     خروجی: bs4 Tag مربوط به همان نسخه (div) یا None اگر صفحه تک‌کتاب یا پیدا نشد.
     رفتار:
-      - اگر fragment (#p-XXXX) وجود داشت سعی می‌کند div با همان id را برگرداند.
-      - در غیر این صورت، لیست divهای id^="p-" را می‌گرداند و در هر کدام دنبال span با 'شابک:' می‌گردد و مقایسه می‌کند.
+      - اگر fragment (#p-XXXX) وجود داشت div با همان id را برمی‌گرداند.
+      - در غیر این صورت div نسخه را از نقشه‌ی شابک -> div پیدا می‌کند.
       - اگر هیچی پیدا نشد، None بازمی‌گرداند (حالت تک‌کتاب یا نامشخص).
     """
-    if not html:
+    if not soup:
         return None
-    soup = BeautifulSoup(html, "html.parser")
+    if isinstance(soup, str):
+        soup = parse_html(soup)
+    if index is None:
+        index = build_edition_index(soup)
 
     # بررسی fragment در URL (مثلاً #p-30809)
     frag = urlparse(page_url).fragment if page_url else ""
     if frag:
         # تلاش برای پیدا کردن div با همان id
-        candidate = soup.find(id=frag)
+        candidate = index["ids"].get(frag) or soup.find(id=frag)
         if candidate:
             log(f" -> یافتن div با fragment: #{frag}")
             return candidate
 
-    # لیست کاندیدها: div هایی که id شان با p- شروع می‌شود یا کلاس wrapper-product-acts داخلشان data-id دارد
-    candidates = soup.select('div[id^="p-"], div.flex.gap-2.mb-3, div.wrapper-product-acts')
-    # تحویل فیلتر شده برای پیدا کردن کارت‌های واقعی: اغلب structure دارای id="p-XXXX" است و در کنار آن بخش متا موجود است
-    # اما safest approach: پیدا کردن تمام divهایی که id شروع با p- دارند
-    candidates = soup.select('div[id^="p-"]')
-    if not candidates:
+    if not index["ids"]:
         # صفحه ممکن است تک‌کتاب باشد
         log(" -> صفحه حاوی div[id^='p-'] نیست — احتمالاً صفحه تک‌کتاب.")
         return None
 
-    clean_isbn = str(isbn).replace("-", "").strip()
-    log(f" -> {len(candidates)} div با id^='p-' پیدا شد؛ در جستجوی تطابق شابک {clean_isbn} ...")
-    for div in candidates:
-        # در داخل هر div معمولاً یک span با متن "شابک:" وجود دارد و sibling آن مقدار شابک است
-        isbn_span = div.find(lambda t: t.name in ["span","div"] and isinstance(t.string, str) and "شابک" in t.string)
-        if isbn_span:
-            # سعی کنیم مقدار بعدی یا sibling را بخوانیم
-            # حالت‌های مختلف: <span>شابک:</span><span>978-...</span>
-            val = None
-            nxt = isbn_span.find_next_sibling()
-            if nxt and isinstance(nxt.get_text(strip=True), str) and nxt.get_text(strip=True):
-                val = nxt.get_text(strip=True)
-            else:
-                # یا ساختار دیگر: isbn_span.parent.find(...) 
-                possible = isbn_span.parent.find_all("span")
-                for s in possible:
-                    txt = s.get_text(strip=True)
-                    if re.search(r"\d{9,13}", txt):
-                        val = txt
-                        break
-            if val:
-                if str(val).replace("-", "").strip() == clean_isbn:
-                    log(f" -> تطابق شابک در div id='{div.get('id')}' یافت شد ({val}).")
-                    return div
+    clean_isbn = normalize_isbn(isbn)
+    div = index["isbns"].get(clean_isbn)
+    if div is not None:
+        log(f" -> تطابق شابک در div id='{div.get('id')}' یافت شد ({len(index['ids'])} نسخه در صفحه).")
+        return div
     log(" -> هیچ div منطبق با شابک پیدا نشد؛ بازگشت None (احتمالاً صفحه تک‌کتاب یا ساختار متفاوت).")
     return None
 
-    # --- تابع کمکی هوشمند برای استخراج شماره جلد ---
-    def infer_collection_number(main_title: str, sub_title: str):
-        # ترکیب برای جستجوی جامع، اما اولویت جستجو معمولاً روی sub_title است
-        # نرمال‌سازی اعداد فارسی به انگلیسی
-        def normalize_digits(txt):
-            if not txt: return ""
-            replacements = {'۰': '0', '۱': '1', '۲': '2', '۳': '3', '۴': '4', '۵': '5', '۶': '6', '۷': '7', '۸': '8', '۹': '9'}
-            for k, v in replacements.items():
-                txt = txt.replace(k, v)
-            return txt
-
-        clean_sub = normalize_digits(sub_title)
-        clean_main = normalize_digits(main_title)
-        
-        # 1. اولویت اول: بازه عددی داخل پرانتز مثل (11-10) یا (10-11)
-        # مثال: کتاب ایلیا (11-10)
-        range_match = re.search(r"\((\d+)\s*-\s*(\d+)\)", clean_sub)
-        if range_match:
-            n1, n2 = range_match.group(1), range_match.group(2)
-            # مرتب‌سازی اعداد (که همیشه 10 و 11 باشد نه 11 و 10)
-            nums = sorted([int(n1), int(n2)])
-            return f"{nums[0]} و {nums[1]}"
-
-        # 2. اولویت دوم: عدد داخل پرانتز (با یا بدون متن)
-        # مثال: (12) یا (نگهبانان گاهول 3) یا (5)
-        # پترن: پرانتز باز -> (اختیاری: هر متنی) -> عدد -> پرانتز بسته
-        paren_match = re.search(r"\((?:[^)]*?\s+)?(\d{1,3})\)", clean_sub)
-        if paren_match:
-            return paren_match.group(1)
-
-        # 3. اولویت سوم: جداکننده خاص مثل "_" یا "-" قبل از عدد
-        # مثال: هفت نشانه _ 4
-        sep_match = re.search(r"[_\-]\s*(\d{1,3})\b", clean_sub)
-        if sep_match:
-            return sep_match.group(1)
-
-        # 4. اولویت چهارم: عدد در انتهای متن (با فاصله از کلمه قبل)
-        # مثال: قصه های فلیکس 5
-        # شرط: عدد باید 1 تا 3 رقم باشد (تا سال انتشار مثل 1399 اشتباه نشود)
-        trailing_match = re.search(r"\s+(\d{1,3})$", clean_sub.strip())
-        if trailing_match:
-            return trailing_match.group(1)
-
-        # 5. اولویت پنجم: تطبیق با عنوان اصلی (روش قدیمی)
-        # مثال: اگر عنوان اصلی "ته جدولی ها" باشد و عنوان فرعی "ته جدولی ها 2"
-        if clean_main:
-            stripped_main = re.escape(clean_main.strip())
-            main_pattern = rf"{stripped_main}\s*(\d+)"
-            m_main = re.search(main_pattern, clean_sub)
-            if m_main:
-                return m_main.group(1)
-
-        return ""
+
+# ---------- داده‌ی ساخت‌یافته‌ی صفحه (مسیر سریع قبل از پیمایش کارت) ----------
+# کلید structured_data -> ستون؛ قیمت نیست چون offers قیمت فروش است و ستون قیمت، قیمت پشت جلد
+STRUCTURED_COLUMNS = {
+    "title": "عنوان اصلی",
+    "image_url": "image_url",
+    "author": "نویسنده",
+    "translator": "مترجم",
+    "publisher": "ناشر",
+    "pages": "صفحات",
+    "year_fa": "سال انتشار شمسی",
+    "year_en": "سال انتشار میلادی",
+}
+
+def structured_details(index, isbn):
+    """
+    ستون‌هایی که داده‌ی ساخت‌یافته‌ی صفحه برای همین نسخه دارد. در صفحه‌ی چندنسخه‌ای فقط شیئی
+    که شابکش همین است قبول می‌شود.
+    """
+    data = pick_book(index.get("structured"), isbn, only=len(index["ids"]) <= 1)
+    info = {col: data[key] for key, col in STRUCTURED_COLUMNS.items() if data.get(key)}
+    if "عنوان اصلی" in info:
+        info["عنوان اصلی"] = re.sub(r"^کتاب\s+", "", info["عنوان اصلی"]).strip()
+    if "image_url" in info:
+        url = info["image_url"]
+        info["image_url"] = url if url.startswith("http") else (BASE + url)
+        info["iranketabImageName"] = os.path.basename(urlparse(info["image_url"]).path)
+    return info
 
 
 # ---------- تابع استخراج جزئیات فقط از همان div (یا در صورت None از صفحه کلی) ----------
-def extract_details_from_div(div, soup, isbn):
+# (ستون، برچسب، نحوه‌ی خواندن مقدار)؛ به ترتیب ستون‌های info
+#   span: اولین spanی که برچسب را دارد -> span هم‌سطح بعدی
+#   link: اولین span/div تک‌متنی -> اولین لینک بعد از آن در کارت، وگرنه عنصر هم‌سطح بعدی
+#   sibling: اولین span/div تک‌متنی -> عنصر هم‌سطح بعدی
+DETAIL_LABELS = (
+    ("سال انتشار شمسی", "سال انتشار شمسی", "span"),
+    ("سال انتشار میلادی", "سال انتشار میلادی", "span"),
+    ("نویسنده", "نویسنده:", "link"),
+    ("مترجم", "مترجم:", "link"),
+    ("ناشر", "انتشارات:", "link"),
+    ("شابک", "شابک", "sibling"),
+    ("صفحات", "تعداد صفحه", "span"),
+)
+KV_ROW_CLASSES = {"gap-0", "gap-1", "gap-2", "gap-3", "gap-4"}
+KV_BLOCK_CLASSES = {"card", "absolute", "flex"}
+
+def read_labels(div):
+    """
+    یک بار پیمایش کارت: (مقدار هر ستون DETAIL_LABELS که برچسبش پیدا شد، جفت‌های کلید/مقدار
+    ردیف‌های div.flex.gap-N). ردیف‌های داخل div.card/absolute/flex اولویت دارند و اگر نبودند
+    همه‌ی ردیف‌های کارت خوانده می‌شوند؛ در تکرار یک کلید ردیف آخر برنده است.
+    """
+    found = {}        # ستون -> عنصر برچسب
+    links = {}        # ستون -> اولین لینک بعد از برچسب
+    waiting = []      # ستون‌های link که هنوز لینکشان دیده نشده
+    rows, in_block = [], []
+    for tag in div.descendants:
+        name = getattr(tag, "name", None)
+        if name == "a":
+            for column in waiting:
+                links[column] = tag
+            waiting = []
+            continue
+        if name not in ("span", "div"):
+            continue
+        classes = tag.get("class") or ()
+        if name == "div" and "flex" in classes and KV_ROW_CLASSES.intersection(classes):
+            rows.append(tag)
+            in_block.append(any(p.name == "div" and KV_BLOCK_CLASSES.intersection(p.get("class") or ())
+                                for p in takewhile(lambda p: p is not div, tag.parents)))
+        single = tag.string
+        if single is None and name == "div":
+            continue
+        text = single if single is not None else tag.get_text(strip=True)
+        for column, label, mode in DETAIL_LABELS:
+            if column in found or label not in text:
+                continue
+            if mode == "span":
+                if name == "span":
+                    found[column] = tag
+            elif isinstance(single, str):
+                found[column] = tag
+                if mode == "link":
+                    waiting.append(column)
+
+    labels = {}
+    for column, label, mode in DETAIL_LABELS:
+        tag = found.get(column)
+        if tag is None:
+            continue
+        if mode == "link" and column in links:
+            labels[column] = links[column].get_text(strip=True)
+            continue
+        nxt = tag.find_next_sibling("span" if mode == "span" else True)
+        labels[column] = nxt.get_text(strip=True) if nxt else ""
+
+    kv = {}
+    if any(in_block):
+        rows = [row for row, inside in zip(rows, in_block) if inside]
+    for row in rows:
+        spans = row.find_all("span", limit=2)
+        if len(spans) == 2:
+            kv[spans[0].get_text(strip=True).replace(":", "")] = spans[1].get_text(strip=True)
+    return labels, kv
+
+def extract_details_from_div(div, soup, isbn, known=None):
+    """
+    known: ستون‌هایی که از داده‌ی ساخت‌یافته (structured_details) آمده‌اند. کارت نسخه برنده است
+    (عنوان، نویسنده، ناشر و سال ممکن است در داده‌ی ساخت‌یافته مال نسخه‌ی دیگری یا og:title صفحه
+    باشد)؛ known فقط ستون‌های خالی کارت را پر می‌کند. پیمایش کارت برای تصویر و تعداد صفحه‌ای که
+    known دارد انجام نمی‌شود. اگر کارت پیدا نشده باشد همان‌ها برگردانده می‌شوند.
+    """
+    known = known or {}
     info = {}
 
-    # --- تابع کمکی: فقط شماره را پیدا می‌کند (متن را تغییر نمی‌دهد) ---
-    def detect_collection_number(text):
-        if not text: return ""
-        
-        # نرمال‌سازی موقت برای جستجو
-        temp_text = text.strip()
-        replacements = {'۰': '0', '۱': '1', '۲': '2', '۳': '3', '۴': '4', '۵': '5', '۶': '6', '۷': '7', '۸': '8', '۹': '9'}
-        for k, v in replacements.items():
-            temp_text = temp_text.replace(k, v)
-
-        # 1. اولویت اول: الگوی "عدد و عدد" (مثل: 6 و 7)
-        m_and = re.search(r"(\d+)\s*و\s*(\d+)", temp_text)
-        if m_and:
-            nums = sorted([int(m_and.group(1)), int(m_and.group(2))])
-            return f"{nums[0]} و {nums[1]}"
-
-        # 2. الگوی بازه: (11-10)
-        m_range = re.search(r"\((\d+)\s*-\s*(\d+)\)", temp_text)
-        if m_range:
-            nums = sorted([int(m_range.group(1)), int(m_range.group(2))])
-            return f"{nums[0]} و {nums[1]}"
-
-        # 3. الگوی پرانتز تکی: (12)
-        m_paren = re.search(r"\((?:[^)]*?\s+)?(\d{1,3})\)", temp_text)
-        if m_paren: return m_paren.group(1)
-
-        # 4. الگوی جداکننده انتهای خط: _ 4 یا - 4
-        m_sep = re.search(r"[_\-]\s*(\d{1,3})$", temp_text)
-        if m_sep: return m_sep.group(1)
-        
-        # 5. الگوی دو نقطه: " : 1"
-        m_colon = re.search(r":\s*(\d{1,3})", temp_text)
-        if m_colon: return m_colon.group(1)
-
-        # 6. عدد خالی در انتهای متن (ریسک دارد ولی برای مجموعه‌ها معمول است)
-        m_trail = re.search(r"\s+(\d{1,3})$", temp_text)
-        if m_trail: return m_trail.group(1)
-
-        return ""
-
-    # --- تابع کمکی خواندن جفت کلید/مقدار ---
-    def read_kv_pairs(block):
-        kv = {}
-        for row in block.select("div.flex.gap-1, div.flex.gap-2, div.flex.gap-3, div.flex.gap-4, div.flex.gap-0"):
-            spans = row.find_all("span")
-            if len(spans) >= 2:
-                key = spans[0].get_text(strip=True).replace(":", "")
-                val = spans[1].get_text(strip=True)
-                kv[key] = val
-        return kv
-
     if div is not None:
         try:
             # 1. استخراج عناوین خام
@@ -292,11 +509,7 @@ def extract_details_from_div(div, soup, isbn):
             info["عنوان فرعی"] = raw_sub
 
             # 3. استخراج شماره (جستجو در زیرنویس، اگر نبود در عنوان اصلی)
-            found_num = detect_collection_number(raw_sub)
-            if not found_num:
-                found_num = detect_collection_number(raw_h2)
-            
-            info["شماره در مجموعه"] = found_num
+            info["شماره در مجموعه"] = collection_number(raw_sub, raw_h2)
 
         except Exception as e:
             print(f"Error extracting title: {e}")
@@ -305,11 +518,11 @@ def extract_details_from_div(div, soup, isbn):
             info["شماره در مجموعه"] = ""
 
         # 4. تصویر
-        a_img = div.find("a", href=re.compile(r"/Images/ProductImages/|/Files/AttachFiles/"))
-        img_url = ""
+        img_url = known.get("image_url", "")
+        a_img = None if img_url else div.find("a", href=re.compile(r"/Images/ProductImages/|/Files/AttachFiles/"))
         if a_img and a_img.get("href"):
             img_url = a_img.get("href")
-        else:
+        elif not img_url:
             img_tag = div.find("img", itemprop="image")
             if img_tag and img_tag.get("src"):
                 img_url = img_tag.get("src")
@@ -336,127 +549,144 @@ def extract_details_from_div(div, soup, isbn):
                 if alt: final_price = re.sub(r'\D', '', alt.get_text(strip=True))
         info["قیمت"] = final_price
 
-        # 6. تاریخ‌ها و سایر فیلدها
-        def get_val(cont, lbl):
-            t = cont.find(lambda x: x.name=="span" and lbl in x.get_text(strip=True))
-            return t.find_next_sibling("span").get_text(strip=True) if t and t.find_next_sibling("span") else ""
-
-        info["سال انتشار شمسی"] = get_val(div, "سال انتشار شمسی")
-        info["سال انتشار میلادی"] = get_val(div, "سال انتشار میلادی")
-
-        def find_lbl(d, l):
-            s = d.find(lambda t: t.name in ["span","div"] and isinstance(t.string, str) and l in t.get_text())
-            if s:
-                a = s.find_next("a")
-                if a: return a.get_text(strip=True)
-                sib = s.find_next_sibling()
-                if sib: return sib.get_text(strip=True)
-            return ""
-
-        info["نویسنده"] = find_lbl(div, "نویسنده:")
-        info["مترجم"] = find_lbl(div, "مترجم:")
-        info["ناشر"] = find_lbl(div, "انتشارات:")
+        # 6. تاریخ‌ها و سایر فیلدها (همه از یک پیمایش کارت)
+        labels, kv = read_labels(div)
+        for column in ("سال انتشار شمسی", "سال انتشار میلادی", "نویسنده", "مترجم", "ناشر"):
+            info[column] = labels.get(column, "")
 
         orig = soup.find("div", class_=lambda c: c and "ltr" in c)
         info["عنوان انگلیسی"] = orig.get_text(strip=True) if orig else ""
 
-        kv = {}
-        for block in div.select("div.card, div.absolute, div.flex"): kv.update(read_kv_pairs(block))
-        if not kv: kv.update(read_kv_pairs(div))
-        for k, v in kv.items(): info[k] = v
-
-        if "شابک" not in info:
-            isbn_span = div.find(lambda t: t.name in ["span","div"] and isinstance(t.string, str) and "شابک" in t.get_text())
-            if isbn_span:
-                nxt = isbn_span.find_next_sibling()
-                if nxt: info["شابک"] = nxt.get_text(strip=True)
-
-        # -------------------------------------------------------
-        pages = ""
-        # پیدا کردن تگی که متن "تعداد صفحه" دارد
-        # استفاده از re.compile برای پیدا کردن متن حتی اگر فاصله داشته باشد
-        page_label = soup.find("span", string=re.compile("تعداد صفحه"))
-        if page_label:
-            # پیدا کردن تگ بعدی (همسایه) که حاوی عدد است
-            page_val_span = page_label.find_next_sibling("span")
-            if page_val_span:
-                pages = page_val_span.get_text(strip=True)
-        
-        info["صفحات"] = pages
-        # -------------------------------------------------------
+        info.update(kv)
+        if "شابک" not in info and "شابک" in labels:
+            info["شابک"] = labels["شابک"]
+
+        # تعداد صفحه: اول داخل همین کارت، وگرنه اولین مورد صفحه
+        pages = labels.get("صفحات")
+        if pages is None and "صفحات" not in known:
+            pages = ""
+            page_label = soup.find("span", string=re.compile("تعداد صفحه"))
+            if page_label:
+                page_val_span = page_label.find_next_sibling("span")
+                if page_val_span:
+                    pages = page_val_span.get_text(strip=True)
+        info["صفحات"] = pages or ""
+        for column, value in known.items():
+            if not info.get(column):
+                info[column] = value
         
         return info
-    return {}
+    return dict(known)
 
 
 
-# ---------- pywin32 helper ----------
-def ensure_pywin32():
-    try:
-        import win32com.client as win32
-        return win32
-    except Exception:
-        raise SystemExit("❌ نیاز به pywin32 (python -m pip install pywin32)")
-
-# ---------- دانلود تصویر (با اصلاح SSL) ----------
-def download_image(img_url, isbn):
-    if not img_url:
+# ---------- دانلود تصویرها (دسته‌ای و هم‌زمان، image_fetch) ----------
+def flush_batch(book, fetcher, journal, pending_images, written, image_col):
+    """
+    تصویرهای دسته‌ی فعلی را دانلود و درج می‌کند، فایل را ذخیره می‌کند و فقط بعد از ذخیره‌ی
+    موفق مرحله‌های written/image را در journal ثبت می‌کند.
+    """
+    inserted = []
+    if pending_images:
+        paths = fetcher.fetch_all([(isbn, url) for _, isbn, url in pending_images])
+        for excel_row, isbn, _ in pending_images:
+            if paths.get(isbn):
+                book.insert_image(excel_row, image_col, paths[isbn])
+                inserted.append(isbn)
+            else:
+                log(f" -> دانلود تصویر ناموفق بود (ردیف {excel_row}).")
+                journal.error(isbn, "image", "download failed")
+    book.flush()
+    for isbn in written:
+        journal.record(isbn, "written")
+    for isbn in inserted:
+        journal.record(isbn, "image")
+    pending_images.clear()
+    written.clear()
+
+
+def crawl_book(isbn, journal):
+    """جستجو، دریافت صفحه و استخراج اطلاعات یک شابک؛ نتیجه‌ی هر مرحله در journal ثبت می‌شود."""
+    book_url, soup, index = get_book_page(isbn)
+    if not book_url:
+        log(" -> ❌ صفحه کتاب پیدا نشد.")
+        journal.error(isbn, "searched", "book page not found")
         return None
-    isbn_clean = str(isbn).replace("-", "").strip()
-    filename = f"{isbn_clean}.jpg"
-    path = os.path.join(IMAGE_DIR, filename)
-    if os.path.exists(path):
-        return path
-    
-    try:
-        # تلاش اول: دانلود استاندارد
-        r = requests.get(img_url, headers=HEADERS, stream=True, timeout=30, verify=True)
-    except requests.exceptions.SSLError:
-        # تلاش دوم: اگر خطای SSL داد، بدون بررسی امنیتی دانلود کن
-        try:
-            r = requests.get(img_url, headers=HEADERS, stream=True, timeout=30, verify=False)
-        except Exception:
-            return None
-    except Exception:
+    journal.record(isbn, "searched", detail=book_url)
+    journal.record(isbn, "page")
+
+    # استخراج اطلاعات (یک بار parse برای پیدا کردن نسخه و استخراج جزئیات)
+    book_div = get_book_div_from_page(book_url, soup, isbn, index)
+    with EXTRACT_PATHS.timed("structured"):
+        known = structured_details(index, isbn)
+    EXTRACT_PATHS.count("structured", "fields", len(known))
+    with EXTRACT_PATHS.timed("dom"):
+        details = extract_details_from_div(book_div, soup, isbn, known)
+    EXTRACT_PATHS.count("dom", "fields", len(set(details) - set(known)))
+    if not details:
+        log(" -> ❌ اطلاعات استخراج نشد.")
+        journal.error(isbn, "parsed", "no details extracted")
         return None
+    journal.record(isbn, "parsed", detail=details)
+    return details
 
-    try:
-        r.raise_for_status()
-        with open(path, "wb") as f:
-            for chunk in r.iter_content(8192):
-                f.write(chunk)
-        return path
-    except Exception:
-        return None
+
+def gisoom_source(journal):
+    """
+    تابع منبع گیسوم برای Enricher؛ خروجی همان شکل خزنده‌ی گیسوم (Gisoom/main.py) است و با
+    source=gisoom در journal ثبت می‌شود تا هر دو برنامه نتیجه‌ی هم را دوباره درخواست نکنند.
+    صفحه کتاب گیسوم فقط وقتی دریافت می‌شود که نتیجه‌ی جستجو ستون‌های کم را نداشته باشد.
+    """
+    sys.path.insert(0, GISOOM_DIR)
+    from gisoom_crawler import GisoomCrawler
+    crawler = GisoomCrawler(requests_per_second=GISOOM_RATE, pool_size=max(10, MERGE_WORKERS))
+
+    def fetch(isbn, lacking):
+        found = crawler.find_book_page(isbn)
+        if not isinstance(found, dict) or "url" not in found:
+            journal.error(isbn, "searched", "not_found")
+            return None
+        journal.record(isbn, "searched", detail=found["url"])
+        required = None if lacking is None else [k for k, col in GISOOM_COLUMNS.items() if col in lacking]
+        data = found
+        if crawler.needs_page(found, required):
+            # از صفحه فقط ستون‌هایی که نتیجه‌ی جستجو نداشت لازم است
+            rest = None if required is None else [k for k in required if not found.get(k)]
+            data = {**found, **(crawler.parse_book_page(found["url"], rest) or {})}
+        journal.record(isbn, "parsed", detail=data)
+        return data
+    fetch.stats = crawler.stats
+    fetch.paths = crawler.paths
+    return fetch
 
 # ---------------------------------------------------------
 # تابع اصلی (MAIN)
 # ---------------------------------------------------------
-def main():
-    win32 = ensure_pywin32()
+def main(shard=None, restart=False):
+    """
+    shard: '2/4' یعنی این پردازه فقط سهم دوم از چهار شابک را جستجو و استخراج می‌کند و
+    تصویرها را دانلود می‌کند (بدون نوشتن در اکسل)؛ یک اجرای بعدی بدون shard همه را از
+    journal می‌نویسد. restart: وضعیت قبلی journal فراموش می‌شود.
+    """
+    shard_index, shard_count = parse_shard(shard)
+    journal = CrawlJournal(JOURNAL_FILE, "iranketab")
+    journals = {"iranketab": journal}
+    if "gisoom" in SOURCES:
+        journals["gisoom"] = CrawlJournal(JOURNAL_FILE, "gisoom")
+    if restart:
+        for j in journals.values():
+            j.reset()
+    fetchers = {"iranketab": lambda isbn, lacking: crawl_book(isbn, journal)}
+    if "gisoom" in SOURCES:
+        fetchers["gisoom"] = gisoom_source(journals["gisoom"])
+    enricher = Enricher([(name, fetchers[name]) for name in SOURCES], parallel=MERGE_PARALLEL, log=log)
     try:
-        # فقط برای خواندن تعداد رکوردها و ایندکس‌ها از پانداس استفاده می‌کنیم
-        df_source = pd.read_excel(EXCEL_FILE, sheet_name=0, dtype=str).fillna("")
+        book = open_backend(EXCEL_BACKEND, EXCEL_FILE, visible=EXCEL_VISIBLE)
     except Exception as e:
         raise SystemExit(f"❌ خطا در خواندن فایل اکسل: {e}")
 
-    excel = win32.gencache.EnsureDispatch("Excel.Application")
-    excel.Visible = True  # مشاهده روند کار
-    wb = excel.Workbooks.Open(os.path.abspath(EXCEL_FILE))
-    ws = wb.Worksheets(1)
-
     # 1. نقشه‌برداری از هدرها (Header Map)
-    used_cols = ws.UsedRange.Columns.Count
-    header_map = {}
-    # ردیف 1 را می‌خوانیم
-    for c in range(1, used_cols + 20): # کمی بیشتر می‌خوانیم تا مطمئن شویم
-        val = ws.Cells(1, c).Value
-        if val:
-            header_map[str(val).strip()] = c
-        else:
-            # اگر به سلول خالی رسیدیم و بعدش هم خالی بود، فرض می‌کنیم تمام شده
-            # (اما چون می‌خواهیم ستون اضافه کنیم، دقیق‌ترین راه UsedRange بود که بالا زدیم)
-            pass
+    header_map = book.read_headers()
 
     # 2. لیست ستون‌های اجباری که باید باشند (اگر نباشند می‌سازیم)
     required_cols = [
@@ -479,106 +709,121 @@ def main():
     for req in required_cols:
         if req not in header_map:
             last_col_idx += 1
-            ws.Cells(1, last_col_idx).Value = req
+            book.add_header(last_col_idx, req)
             header_map[req] = last_col_idx
             log(f" + ستون جدید ایجاد شد: {req}")
 
     if "شابک" not in header_map:
-        wb.Close(SaveChanges=False)
-        excel.Quit()
+        book.close()
         raise SystemExit("❌ ستون 'شابک' پیدا نشد.")
 
-    total_rows = len(df_source)
-    log(f"شروع پردازش {total_rows} رکورد...")
+    # خواندن یک‌جای ستون‌های شابک و عنوان اصلی (به جای خواندن سلول‌به‌سلول)
+    last_row = book.last_row()
+    isbns = book.read_column(header_map["شابک"], 2, last_row)
+    titles = book.read_column(header_map["عنوان اصلی"], 2, last_row)
+
+    log(f"شروع پردازش {len(isbns)} رکورد...")
 
-    # 3. حلقه روی داده‌ها
-    for idx, row_data in df_source.iterrows():
-        excel_row = int(idx) + 2  # چون هدر ردیف 1 است و پانداس از 0 شروع می‌کند
-        isbn = str(row_data.get("شابک", "")).strip()
+    fetcher = ImageFetcher(IMAGE_DIR, HEADERS, workers=IMAGE_WORKERS, scheduler=SCHEDULER, log=log)
+    pending_images = []   # (ردیف، شابک، لینک) تا دانلود دسته‌ای در flush بعدی
+    written = []          # شابک‌هایی که در flush بعدی ذخیره می‌شوند
+    writer = shard_count == 1
+    source_states = {name: j.states() for name, j in journals.items()}
+    states = source_states["iranketab"]
+    if not writer:
+        log(f"پردازه‌ی {shard_index + 1} از {shard_count}: فقط جستجو، استخراج و دانلود تصویر")
+
+    # 3. انتخاب ردیف‌هایی که باید پردازش شوند
+    jobs = []   # (ردیف، شابک، وضعیت journal)
+    for excel_row, raw_isbn, current_main_title in zip(range(2, last_row + 1), isbns, titles):
+        isbn = normalize_isbn(raw_isbn)
 
         if not isbn:
             continue
 
-        # --- شرط پرش (Skip Logic) ---
-        # اگر UPDATE_ALL خاموش است، چک کن آیا "عنوان اصلی" پر است؟
-        if not UPDATE_ALL:
-            # مقدار فعلی سلول عنوان اصلی را از اکسل زنده بخوان (نه از پانداس که شاید قدیمی باشد)
-            current_main_title = ws.Cells(excel_row, header_map["عنوان اصلی"]).Value
-            # اگر سلول پر بود (None نبود و رشته خالی نبود)
-            if current_main_title and str(current_main_title).strip():
-                # لاگ نمی‌کنیم یا کوتاه لاگ می‌کنیم تا شلوغ نشود
-                # log(f"ردیف {excel_row} رد شد (عنوان دارد).")
-                continue
-        # -----------------------------
-
-        log(f"\n[ردیف {excel_row}] 🔎 شابک: {isbn}")
+        if not in_shard(isbn, shard_index, shard_count):
+            continue
 
-        # دریافت لینک و HTML
-        book_url, html = get_final_book_url_and_html(isbn)
-        if not book_url or not html:
-            log(" -> ❌ صفحه کتاب پیدا نشد.")
+        state = states.get(isbn, {})
+        # --- شرط پرش (Skip Logic) ---
+        # کاری که طبق journal کامل شده تکرار نمی‌شود
+        if CrawlJournal.done(state, "written") and (CrawlJournal.done(state, "image") or not any(
+                (CrawlJournal.parsed(source_states[name].get(isbn)) or {}).get("image_url") for name in journals)):
+            continue
+        # اگر UPDATE_ALL خاموش است و "عنوان اصلی" پر است (و نوشتنش نیمه‌کاره نمانده)، رد شو
+        if not UPDATE_ALL and current_main_title and str(current_main_title).strip() and not state:
             continue
+        # -----------------------------
+        jobs.append((excel_row, isbn, state))
 
-        # استخراج اطلاعات
-        book_div = get_book_div_from_page(book_url, html, isbn)
-        soup = BeautifulSoup(html, "html.parser")
-        details = extract_details_from_div(book_div, soup, isbn)
+    # اطلاعات استخراج‌شده‌ی اجرای قبلی (یا پردازه‌های shard) بدون درخواست دوباره
+    known = {isbn: {name: CrawlJournal.parsed(source_states[name].get(isbn)) for name in journals}
+             for _, isbn, _ in jobs}
+    results = enricher.iter_enrich([isbn for _, isbn, _ in jobs], MERGE_WORKERS, known)
 
+    # 4. حلقه روی نتیجه‌ها (به ترتیب ردیف)
+    processed = 0
+    for (excel_row, isbn, state), (details, origin, lacking) in zip(jobs, results):
+        log(f"\n[ردیف {excel_row}] 🔎 شابک: {isbn}")
         if not details:
-            log(" -> ❌ اطلاعات استخراج نشد.")
+            log(" -> ❌ در هیچ منبعی پیدا نشد.")
             continue
+        sources = sorted(set(origin.values()))
+        log(f" -> منبع: {'، '.join(sources)}" + (f" | خالی: {'، '.join(lacking)}" if lacking else ""))
 
-        # 4. درج اطلاعات متنی در اکسل
-        for key, val in details.items():
-            if key == "تصویر": continue # تصویر جداگانه هندل می‌شود
-            
-            if key in header_map:
-                col_idx = header_map[key]
-                # نوشتن مقدار در سلول
-                ws.Cells(excel_row, col_idx).Value = val
-
-        # 5. مدیریت تصویر (دانلود، حذف قبلی، درج جدید)
         img_url = details.get("image_url", "")
-        if img_url:
-            local_img_path = download_image(img_url, isbn)
-            if local_img_path:
-                img_col = header_map["تصویر"]
-                
-                # الف) حذف تصاویر قدیمی این سلول
-                remove_old_images(ws, excel_row, img_col)
-
-                # ب) درج تصویر جدید
-                try:
-                    cell_target = ws.Cells(excel_row, img_col)
-                    left = cell_target.Left
-                    top = cell_target.Top
-                    width = cell_target.Width
-                    height = cell_target.Height
-                    
-                    # AddPicture(Filename, LinkToFile, SaveWithDocument, Left, Top, Width, Height)
-                    pic = ws.Shapes.AddPicture(
-                        os.path.abspath(local_img_path), 
-                        False, 
-                        True, 
-                        left, top, width, height
-                    )
-                    pic.Placement = 1 # Move and Size
-                except Exception as e:
-                    log(f"⚠️ خطا در درج تصویر: {e}")
-            else:
-                log(" -> دانلود تصویر ناموفق بود.")
+        if not writer:
+            if img_url:
+                pending_images.append((excel_row, isbn, img_url))
+            if len(pending_images) >= SAVE_EVERY:
+                fetcher.fetch_all([(i, u) for _, i, u in pending_images])
+                pending_images.clear()
+            continue
+
+        # 5. درج اطلاعات متنی (تا flush بعدی در حافظه می‌ماند)
+        if not CrawlJournal.done(state, "written"):
+            book.write_row(excel_row, {
+                header_map[key]: val
+                for key, val in details.items()
+                if key != "تصویر" and key in header_map  # تصویر جداگانه هندل می‌شود
+            })
+            written.append(isbn)
 
-        # ذخیره موقت هر 10 رکورد (اختیاری، برای امنیت بیشتر)
-        if idx % 10 == 0:
-            wb.Save()
+        # 6. مدیریت تصویر (دانلود دسته‌ای، حذف قبلی و درج جدید هنگام flush)
+        if img_url and not CrawlJournal.done(state, "image"):
+            pending_images.append((excel_row, isbn, img_url))
 
-        time.sleep(random.uniform(*DELAY_RANGE))
+        # ذخیره دوره‌ای برای امنیت بیشتر
+        processed += 1
+        if processed % SAVE_EVERY == 0:
+            flush_batch(book, fetcher, journal, pending_images, written, header_map["تصویر"])
 
     # پایان کار
-    wb.Save()
-    log("✅ پایان عملیات. فایل ذخیره شد.")
-    # wb.Close(SaveChanges=True) # اگر می‌خواهید باز بماند این را کامنت کنید
-    # excel.Quit()
+    if writer:
+        flush_batch(book, fetcher, journal, pending_images, written, header_map["تصویر"])
+    else:
+        fetcher.fetch_all([(i, u) for _, i, u in pending_images])
+    fetcher.close()
+    book.close()
+    stats = enricher.stats
+    log(f"درخواست به منبع‌ها: {stats['calls']} | لازم نشد: {stats['skipped']} | "
+        f"از journal: {stats['known']} | ستون‌های پرشده: {stats['filled']} | ناقص: {stats['incomplete']}")
+    log(f"صفحه‌های ایران‌کتاب: دریافت {PAGE_STATS['fetched']} | استفاده‌ی دوباره {PAGE_STATS['reused']} | "
+        f"درخواست‌های صرفه‌جویی‌شده {PAGE_STATS['requests_avoided']}")
+    log(f"استخراج ایران‌کتاب: {EXTRACT_PATHS.summary()}")
+    if "gisoom" in fetchers:
+        gisoom = fetchers["gisoom"].stats
+        log(f"گیسوم: جستجو {gisoom['searches']} | صفحه کتاب {gisoom['pages']} | "
+            f"صفحه‌های دریافت‌نشده {gisoom['pages_avoided']}")
+        log(f"parse صفحه گیسوم: {fetchers['gisoom'].paths.summary()}")
+    log(f"وضعیت journal (موفق، ناموفق): {journal.summary()}")
+    for j in journals.values():
+        j.close()
+    log("✅ پایان عملیات. فایل ذخیره شد." if writer else "✅ پایان سهم این پردازه.")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="خزنده‌ی ایران‌کتاب")
+    parser.add_argument("--shard", help="مثلاً 2/4: فقط سهم دوم از چهار پردازه (بدون نوشتن در اکسل)")
+    parser.add_argument("--restart", action="store_true", help="شروع از اول و نادیده گرفتن journal قبلی")
+    args = parser.parse_args()
+    main(shard=args.shard, restart=args.restart)
\ No newline at end of file
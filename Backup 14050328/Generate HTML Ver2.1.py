@@ -1,6 +1,16 @@
 import pandas as pd
 import json
+import gzip
+import hashlib
+import itertools
 import os
+import sys
+import build_manifest
+import catalog_codec
+import cover_cache
+import excel_ingest
+import persian_text
+import search_index
 
 # --- Configuration ---
 # EXCEL_FILE = 'Parsa Library.xlsx'
@@ -9,7 +19,33 @@ SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 
 # All paths relative to script location
 EXCEL_FILE = os.path.join(SCRIPT_DIR, 'Parsa Library.xlsx')
+SHEET_NAME = 'کتابخانه'
 OUTPUT_FILE = os.path.join(SCRIPT_DIR, 'index.html')
+# اثر انگشت ورودی‌ها؛ اگر تغییری نکرده باشند خروجی دوباره ساخته نمی‌شود
+MANIFEST_FILE = os.path.join(SCRIPT_DIR, '.build_manifest.json')
+FORCE_REBUILD = '--force' in sys.argv
+
+# خروجی تکه‌تکه: فقط صفحه اول کتاب‌ها داخل index.html و بقیه در فایل‌های JSON جدا
+# (با نسخه gzip کنارشان) که مرورگر در پس‌زمینه بارگذاری می‌کند
+SHARD_OUTPUT = False
+SHARD_DIR = 'data'           # نسبت به پوشه خروجی
+FIRST_SHARD_SIZE = 60        # تعداد کتاب‌های داخل صفحه برای نمایش فوری
+SHARD_SIZE = 500
+
+# رندر مجازی گرید: اگر تعداد نتایج بیشتر از این باشد فقط کارت‌های داخل دید ساخته می‌شوند
+# (None یعنی همیشه همه کارت‌ها)
+VIRTUAL_GRID_MIN = 300
+VIRTUAL_OVERSCAN_ROWS = 3       # ردیف‌های اضافه بالا و پایین دید
+
+# ایندکس سه‌حرفی جستجو که موقع ساخت محاسبه می‌شود (در خروجی تکه‌تکه فایل جدا کنار shardها).
+# فقط وقتی ساخته می‌شود که تعداد کتاب‌ها حداقل این باشد؛ زیر آن جستجوی خطی سریع است و ایندکس
+# فقط حجم صفحه را چند برابر می‌کند (None یعنی هیچ‌وقت)
+SEARCH_INDEX_MIN = 5000
+SEARCH_DEBOUNCE_MS = 120
+
+# داده‌ی کتاب‌ها (داخل صفحه و shardها) به قالب ستونی catalog_codec: هر فیلد یک آرایه،
+# جدول رشته برای مقادیر تکراری و پیشوند مسیر تصاویر جدا (False = فهرست dict قبلی)
+COLUMNAR_CATALOG = True
 
 IMAGE_BASE_PATH_LOCAL = 'Books Images'
 # تصویر پیش‌فرض (مسیر فیزیکی)
@@ -17,138 +53,281 @@ DEFAULT_COVER_PATH = 'Books Images/default_cover.png'
 IRANKETAB_URL_PREFIX = "https://img.iranketab.ir/img/225x330?pic=www.iranketab.ir/Images/ProductImages"
 IRANKETAB_IMAGE = True
 
-def generate_html():
-    print("Reading Excel file...")
-    # 1. Read Excel
-    try:
-        df = pd.read_excel(EXCEL_FILE, sheet_name='کتابخانه')
-    except Exception as e:
-        print(f"Error reading sheet 'کتابخانه': {e}")
-        try:
-            df = pd.read_excel(EXCEL_FILE)
-        except Exception as e2:
-            print(f"Critical Error: {e2}")
-            return
-
-    # Normalize column names
-    df.columns = [str(c).strip() for c in df.columns]
-
-    # 2. Column Mapping
-    cols_map = {
-        'isbn': ['شابک', 'ISBN'],
-        'title_main': ['عنوان اصلی', 'عنوان کتاب', 'عنوان'],
-        'title_sub': ['عنوان فرعی'],
-        'author': ['نویسنده', 'پدیدآورنده'],
-        'translator': ['مترجم'],
-        'publisher': ['ناشر'],
-        'year_shamsi': ['سال انتشار شمسی', 'سال انتشار'],
-        'year_gregorian': ['سال انتشار میلادی'],
-        'score': ['امتیاز'],
-        'status': ['وضعیت', 'خوانده شده'],
-        'iranketab_img': ['iranketabImageName', 'تصویر ایران کتاب'],
-        'code': ['کد', 'code', 'Code'],
-        'pages': ['صفحات', 'تعداد صفحه']
-    }
+# کاورهای محلی: هر کاور (لینک ایران کتاب یا Books Images/{isbn}.jpg) یک بار در COVER_CACHE_DIR
+# کش می‌شود و بندانگشتی‌های WebP/AVIF در COVER_DIR کنار صفحه ساخته می‌شوند تا صفحه به CDN
+# بیرونی وابسته نباشد (نیاز به Pillow و requests؛ بدون Pillow همان لینک‌های قبلی استفاده می‌شوند).
+# دانلودها مثل خزنده با image_fetch.ImageFetcher و نوبت‌دهی politeness به هر میزبان انجام می‌شوند
+LOCAL_COVERS = False
+COVER_CACHE_DIR = os.path.join(SCRIPT_DIR, '.cover_cache')
+COVER_WORKERS = 4               # حداکثر دانلود هم‌زمان کاور
+COVER_RATE = 1.0                # درخواست در ثانیه به هر میزبان تصویر (شروع)
+COVER_RATE_RANGE = (0.2, 4.0)   # نرخ با پاسخ‌های سرور بین این دو تنظیم می‌شود
+COVER_DIR = 'covers'            # نسبت به پوشه خروجی
+COVER_WIDTHS = [240, 480]       # کارت‌ها حداقل 240px عرض دارند؛ 480 برای صفحه‌های با تراکم بالا
+COVER_FORMATS = ['avif', 'webp']  # آخری قالب img است، بقیه <source> داخل <picture>
+# تصویر اصلی ایران کتاب (نسخه 225x330 برای بندانگشتی بزرگ‌تر کافی نیست)
+IRANKETAB_ORIGINAL_PREFIX = "https://www.iranketab.ir/Images/ProductImages"
+
+# --- Column Mapping ---
+COLS_MAP = {
+    'isbn': ['شابک', 'ISBN'],
+    'title_main': ['عنوان اصلی', 'عنوان کتاب', 'عنوان'],
+    'title_sub': ['عنوان فرعی'],
+    'author': ['نویسنده', 'پدیدآورنده'],
+    'translator': ['مترجم'],
+    'publisher': ['ناشر'],
+    'year_shamsi': ['سال انتشار شمسی', 'سال انتشار'],
+    'year_gregorian': ['سال انتشار میلادی'],
+    'score': ['امتیاز'],
+    'status': ['وضعیت', 'خوانده شده'],
+    'iranketab_img': ['iranketabImageName', 'تصویر ایران کتاب'],
+    'code': ['کد', 'code', 'Code'],
+    'pages': ['صفحات', 'تعداد صفحه']
+}
 
-    def get_val(row, keys):
-        for k in keys:
-            if k in row.index:
-                val = str(row[k])
-                if val and val.lower() != 'nan':
-                    return val.strip()
-        return ''
-
-    # تابع کمکی برای اصلاح لینک‌ها در HTML (تبدیل فاصله به %20)
-    def sanitize_url(path):
-        # اگر لینک اینترنتی است، دست نزن
-        if path.lower().startswith(('http://', 'https://')):
-            return path
-        # اگر فایل لوکال است، فاصله را با %20 جایگزین کن
-        return path.replace(' ', '%20')
+WANTED_COLUMNS = [name for names in COLS_MAP.values() for name in names]
+
+# ترتیب مهم است: اولین گروهی که تطبیق پیدا کند وضعیت را تعیین می‌کند
+STATUS_RULES = [
+    ('خوانده شده', ['خوانده شده', 'read', 'yes']),
+    ('در حال خواندن', ['در حال خواندن', 'reading']),
+    ('دوست نداشتم', ['دوست نداشتم', 'disliked', 'didnt like']),
+    ('به زودی می‌خوانم', ['به زودی می‌خوانم', 'to read', 'soon']),
+]
+DEFAULT_STATUS = 'خوانده نشده'
+
+# وضعیت در صفحه فقط به صورت کد عددی (اندیس همین فهرست) فرستاده می‌شود؛ مقدار = class نشان
+STATUS_CLASSES = {
+    'خوانده شده': 'read',
+    'در حال خواندن': 'reading',
+    'خوانده نشده': 'unread',
+    'دوست نداشتم': 'disliked',
+    'به زودی می‌خوانم': 'toread',
+}
+STATUS_CODES = {label: code for code, label in enumerate(STATUS_CLASSES)}
 
-    # آماده‌سازی مسیر تصویر پیش‌فرض برای HTML
-    default_cover_html = sanitize_url(DEFAULT_COVER_PATH)
 
-    # 3. Process Books
-    books = []
-    print("Processing books...")
-    for _, row in df.iterrows():
-        title_main = get_val(row, cols_map['title_main'])
-        if not title_main:
+def status_key(text):
+    return persian_text.search_key(text).replace(' ', '')
+
+
+_STATUS_KEYS = [(label, [status_key(x) for x in needles]) for label, needles in STATUS_RULES]
+
+# همه حالت‌های حروف کوچک/بزرگ 'nan' (معادل val.lower() != 'nan')
+NAN_TEXTS = [''.join(p) for p in itertools.product('nN', 'aA', 'nN')]
+
+
+# تابع کمکی برای اصلاح لینک‌ها در HTML (تبدیل فاصله به %20)
+def sanitize_url(path):
+    # اگر لینک اینترنتی است، دست نزن
+    if path.lower().startswith(('http://', 'https://')):
+        return path
+    # اگر فایل لوکال است، فاصله را با %20 جایگزین کن
+    return path.replace(' ', '%20')
+
+
+def classify_status(raw):
+    # مقایسه بدون فاصله و نیم‌فاصله: «به زودی میخوانم» و «به زودی می خوانم» هم همان وضعیت‌اند
+    raw = status_key(raw)
+    for label, needles in _STATUS_KEYS:
+        if any(x in raw for x in needles):
+            return label
+    return DEFAULT_STATUS
+
+
+def resolve_column(df, keys):
+    """
+    Column-wise version of the old per-row get_val: the first candidate column
+    with a non-empty, non-NaN value wins; result is stripped text ('' if none).
+    """
+    out = pd.Series('', index=df.index, dtype=object)
+    found = pd.Series(False, index=df.index)
+    for k in keys:
+        if k not in df.columns:
             continue
-        title_sub = get_val(row, cols_map['title_sub'])
-
-        isbn = get_val(row, cols_map['isbn'])
-        cleaned_isbn = isbn.replace('-', '').replace(' ', '') if isbn else ''
-        iranketab_filename = get_val(row, cols_map['iranketab_img'])
-
-        # --- LOGIC FOR IMAGES ---
-        if IRANKETAB_IMAGE and iranketab_filename:
-            # اگر لینک کامل اینترنتی بود (مثل مورد shabgoonp)
-            if iranketab_filename.lower().startswith(('http://', 'https://')):
-                final_image_path = iranketab_filename
-            else:
-                # اگر فقط نام فایل بود، به سایت ایران کتاب وصل کن
-                final_image_path = f"{IRANKETAB_URL_PREFIX}/{iranketab_filename}"
-        else:
-            # حالت فایل لوکال
-            fname = f"{cleaned_isbn}.jpg" if cleaned_isbn else "default_cover.png"
-            # ساخت مسیر کامل
-            local_path = f"{IMAGE_BASE_PATH_LOCAL}/{fname}"
-            # اصلاح فاصله برای HTML
-            final_image_path = sanitize_url(local_path)
-        # ------------------------
-
-        raw_status = get_val(row, cols_map['status']).lower()
-
-        if any(x in raw_status for x in ['خوانده شده', 'read', 'yes']):
-            status = 'خوانده شده'
-        elif any(x in raw_status for x in ['در حال خواندن', 'reading']):
-            status = 'در حال خواندن'
-        elif any(x in raw_status for x in ['دوست نداشتم', 'disliked', 'didnt like']):
-            status = 'دوست نداشتم'
-        elif any(x in raw_status for x in ['به زودی می‌خوانم', 'to read', 'soon']):
-            status = 'به زودی می‌خوانم'
+        col = df[k]
+        text = col.astype(str)
+        ok = ~found & col.notna() & (text != '') & ~text.isin(NAN_TEXTS)
+        out = out.mask(ok, text.str.strip())
+        found |= ok
+    return out
+
+
+def strip_float_suffix(col):
+    # 1404.0 -> 1404 (Excel numbers come back as floats)
+    return col.str.replace(r'\.0$', '', regex=True)
+
+
+def int_column(col):
+    """ستون متنی -> عدد صحیح (اولین عدد متن، 0 اگر نباشد)؛ هر مقدار یکتا یک بار تبدیل می‌شود."""
+    return col.map({v: persian_text.first_int(v) for v in col.unique()})
+
+
+def build_books(df):
+    """Build the list of book dicts from the sheet using whole-column operations."""
+    cols = {field: resolve_column(df, keys) for field, keys in COLS_MAP.items()}
+
+    keep = cols['title_main'] != ''
+    cols = {field: col[keep] for field, col in cols.items()}
+
+    cleaned_isbn = cols['isbn'].str.replace('-', '', regex=False).str.replace(' ', '', regex=False)
+
+    # --- LOGIC FOR IMAGES ---
+    iranketab_filename = cols['iranketab_img']
+    # حالت فایل لوکال (فاصله برای HTML به %20 تبدیل می‌شود)
+    local_name = (cleaned_isbn + '.jpg').where(cleaned_isbn != '', 'default_cover.png')
+    image_path = (IMAGE_BASE_PATH_LOCAL + '/' + local_name).str.replace(' ', '%20', regex=False)
+    if IRANKETAB_IMAGE:
+        # اگر لینک کامل اینترنتی بود همان، وگرنه به سایت ایران کتاب وصل کن
+        is_url = iranketab_filename.str.lower().str.startswith(('http://', 'https://'))
+        remote = iranketab_filename.where(is_url, IRANKETAB_URL_PREFIX + '/' + iranketab_filename)
+        image_path = remote.where(iranketab_filename != '', image_path)
+    # ------------------------
+
+    # وضعیت‌ها مقادیر تکراری کمی دارند: هر مقدار یکتا فقط یک بار دسته‌بندی می‌شود
+    raw_status = cols['status']
+    status_code = raw_status.map({v: STATUS_CODES[classify_status(v)] for v in raw_status.unique()})
+
+    y_sh = strip_float_suffix(cols['year_shamsi'])
+    y_gr = strip_float_suffix(cols['year_gregorian'])
+    year_display = y_sh.where(y_gr == '', (y_sh + ' (' + y_gr + ')').where(y_sh != '', y_gr))
+    # سال عددی همیشه شمسی (اگر فقط میلادی باشد تقریبی تبدیل می‌شود) تا مرتب‌سازی معنی داشته باشد
+    y_gr_int = int_column(y_gr)
+    year_int = int_column(y_sh).where(y_sh != '', (y_gr_int - 621).where(y_gr_int > 0, 0))
+    score = strip_float_suffix(cols['score'])
+    pages = strip_float_suffix(cols['pages'])
+
+    columns = {
+        'title_main': cols['title_main'],
+        'title_sub': cols['title_sub'],
+        'author': cols['author'],
+        'translator': cols['translator'],
+        'publisher': cols['publisher'],
+        'year': year_display,
+        'status_code': status_code,
+        'score': score,
+        'image_path': image_path,
+        'isbn': cleaned_isbn,
+        'code': strip_float_suffix(cols['code']),
+        'pages': pages,
+        # مقادیر عددی آماده برای فیلتر و جمع در صفحه (0 = نامشخص)
+        'pages_int': int_column(pages),
+        'score_int': int_column(score),
+        'year_int': year_int,
+    }
+    keys = list(columns)
+    return [dict(zip(keys, values)) for values in zip(*(columns[k].tolist() for k in keys))]
+
+
+def cover_sources(books, out_dir):
+    """منبع کاور هر کتاب برای cover_cache: لینک تصویر اصلی، مسیر فایل محلی یا ''."""
+    default = os.path.normpath(os.path.join(out_dir, DEFAULT_COVER_PATH))
+    sources = []
+    for b in books:
+        path = b['image_path']
+        if path.startswith(IRANKETAB_URL_PREFIX + '/'):
+            sources.append(IRANKETAB_ORIGINAL_PREFIX + path[len(IRANKETAB_URL_PREFIX):])
+        elif path.lower().startswith(('http://', 'https://')):
+            sources.append(path)
         else:
-            status = 'خوانده نشده'
-
-        raw_score = get_val(row, cols_map['score'])
-        if raw_score.endswith('.0'): raw_score = raw_score[:-2]
-
-        y_sh = get_val(row, cols_map['year_shamsi'])
-        y_gr = get_val(row, cols_map['year_gregorian'])
-        if y_gr.endswith('.0'): y_gr = y_gr[:-2]
-        if y_sh.endswith('.0'): y_sh = y_sh[:-2]
-
-        year_display = y_sh
-        if y_gr:
-            year_display += f" ({y_gr})" if y_sh else y_gr
-
-        code_val = get_val(row, cols_map['code'])
-        if code_val.endswith('.0'): code_val = code_val[:-2]
-
-        pages_val = get_val(row, cols_map['pages'])
-        if pages_val.endswith('.0'): pages_val = pages_val[:-2]
-
-        books.append({
-            'title_main': title_main,
-            'title_sub': title_sub,
-            'author': get_val(row, cols_map['author']),
-            'translator': get_val(row, cols_map['translator']),
-            'publisher': get_val(row, cols_map['publisher']),
-            'year': year_display,
-            'status': status,
-            'score': raw_score,
-            'image_path': final_image_path,
-            'isbn': cleaned_isbn,
-            'code': code_val,
-            'pages': pages_val
-        })
-
-    books_json = json.dumps(books, ensure_ascii=False)
-
-    # 4. HTML Template
-    html_template = r'''
+            local = os.path.normpath(os.path.join(out_dir, path.replace('%20', ' ')))
+            sources.append(local if local != default and os.path.exists(local) else '')
+    return sources
+
+
+def add_covers(books, out_dir):
+    """
+    کلید بندانگشتی هر کتاب را در b['cover'] می‌گذارد ('' = همان image_path).
+    خروجی: (قالب‌های ساخته‌شده، فایل‌های نوشته‌شده نسبت به out_dir)
+    """
+    formats = cover_cache.available_formats(COVER_FORMATS)
+    if not formats:
+        print("Pillow not installed (or no WebP/AVIF support): using remote cover links")
+        return [], []
+    # فقط همین حالت به requests نیاز دارد
+    from image_fetch import ImageFetcher
+    from politeness import PolitenessScheduler
+
+    scheduler = PolitenessScheduler(rate=COVER_RATE, min_rate=COVER_RATE_RANGE[0], max_rate=COVER_RATE_RANGE[1])
+    fetcher = ImageFetcher(COVER_CACHE_DIR, cover_cache.HEADERS, workers=COVER_WORKERS, scheduler=scheduler)
+    thumb_dir = os.path.join(out_dir, COVER_DIR)
+    try:
+        keys, files = cover_cache.build_covers(cover_sources(books, out_dir), fetcher, thumb_dir,
+                                               COVER_WIDTHS, formats)
+    finally:
+        fetcher.close()
+    for b, key in zip(books, keys):
+        b['cover'] = key
+    cover_cache.prune(thumb_dir, set(files))
+    print(f"Covers: {sum(1 for k in keys if k)}/{len(books)} cached, {len(files)} thumbnail file(s)")
+    return formats, [os.path.join(COVER_DIR, n) for n in files]
+
+
+def encode_books(books):
+    """JSON داده‌ی کتاب‌ها در قالب انتخاب‌شده (COLUMNAR_CATALOG)"""
+    if not COLUMNAR_CATALOG:
+        return json.dumps(books, ensure_ascii=False, separators=(',', ':'))
+    return catalog_codec.dumps(catalog_codec.encode(books, prefixes={
+        'image_path': [IRANKETAB_URL_PREFIX + '/', sanitize_url(IMAGE_BASE_PATH_LOCAL) + '/'],
+    }))
+
+
+def write_data_file(shard_dir, stem, data):
+    """data (bytes) را در <stem>.<hash>.json و نسخه gzip کنارش می‌نویسد؛ نام فایل را برمی‌گرداند."""
+    name = f"{stem}.{hashlib.sha256(data).hexdigest()[:10]}.json"
+    with open(os.path.join(shard_dir, name), 'wb') as f:
+        f.write(data)
+    with open(os.path.join(shard_dir, name + '.gz'), 'wb') as f:
+        f.write(gzip.compress(data, compresslevel=9, mtime=0))
+    return name
+
+
+def write_shards(books, out_dir, index=None):
+    """
+    کتاب‌های بعد از FIRST_SHARD_SIZE را در فایل‌های books-<n>.<hash>.json (و .json.gz)
+    می‌نویسد. نام فایل به محتوا وابسته است پس کش مرورگر هیچ‌وقت نسخه کهنه نمی‌دهد.
+    اگر index داده شود ایندکس جستجوی همه کتاب‌ها هم در search.<hash>.json نوشته می‌شود.
+    خروجی: (کتاب‌های صفحه اول، مسیرهای نسبی shardها برای HTML، مسیر نسبی ایندکس یا None،
+    همه فایل‌های نوشته‌شده)
+    """
+    shard_dir = os.path.join(out_dir, SHARD_DIR)
+    os.makedirs(shard_dir, exist_ok=True)
+
+    rest = books[FIRST_SHARD_SIZE:]
+    urls, written = [], []
+    for n, start in enumerate(range(0, len(rest), SHARD_SIZE), start=1):
+        data = encode_books(rest[start:start + SHARD_SIZE]).encode('utf-8')
+        name = write_data_file(shard_dir, f"books-{n}", data)
+        urls.append(f"{SHARD_DIR}/{name}")
+        written += [os.path.join(SHARD_DIR, name), os.path.join(SHARD_DIR, name + '.gz')]
+
+    index_url = None
+    if index is not None:
+        name = write_data_file(shard_dir, 'search', search_index.dumps(index).encode('utf-8'))
+        index_url = f"{SHARD_DIR}/{name}"
+        written += [os.path.join(SHARD_DIR, name), os.path.join(SHARD_DIR, name + '.gz')]
+
+    prune_shards(out_dir, {os.path.basename(p) for p in written})
+    return books[:FIRST_SHARD_SIZE], urls, index_url, written
+
+
+def prune_shards(out_dir, keep=()):
+    """
+    shardها و ایندکس‌های ساخت‌های قبلی را از SHARD_DIR حذف می‌کند (به جز نام‌های keep).
+    اگر پوشه خالی بماند خودش هم حذف می‌شود؛ فایل‌های دیگر داخل آن دست نمی‌خورند.
+    """
+    shard_dir = os.path.join(out_dir, SHARD_DIR)
+    if not os.path.isdir(shard_dir):
+        return
+    for old in os.listdir(shard_dir):
+        if old.startswith(('books-', 'search.')) and old not in keep:
+            os.remove(os.path.join(shard_dir, old))
+    if not os.listdir(shard_dir):
+        os.rmdir(shard_dir)
+
+
+# --- HTML Template ---
+HTML_TEMPLATE = r'''
 <!DOCTYPE html>
 <html lang="fa" dir="rtl">
 <head>
@@ -231,9 +410,35 @@ input[type="search"]:focus { border-color: #888; }
 <div id="grid" class="grid"></div>
 
 <script id="books-data" type="application/json">__BOOKS_JSON__</script>
+<script id="books-shards" type="application/json">__BOOKS_SHARDS__</script>
+<script id="books-index" type="application/json">__SEARCH_INDEX__</script>
 
 <script>
-const books = JSON.parse(document.getElementById('books-data').textContent || '[]');
+// داده‌ی کتاب‌ها یا فهرست dict است یا قالب ستونی catalog_codec (جدول رشته و پیشوند مسیر)
+function decodeBooks(data) {
+    if (Array.isArray(data)) return data;
+    const fields = Object.keys(data.columns);
+    const cols = fields.map(f => {
+        let col = data.columns[f];
+        const table = data.tables[f];
+        if (table) col = col.map(i => table[i]);
+        const prefixes = data.prefixes[f];
+        if (prefixes) {
+            const ids = data.prefix_ids[f];
+            col = col.map((v, i) => prefixes[ids[i]] + v);
+        }
+        return col;
+    });
+    const out = new Array(data.n);
+    for (let i = 0; i < data.n; i++) {
+        const b = {};
+        for (let j = 0; j < fields.length; j++) b[fields[j]] = cols[j][i];
+        out[i] = b;
+    }
+    return out;
+}
+
+const books = decodeBooks(JSON.parse(document.getElementById('books-data').textContent || '[]'));
 const grid = document.getElementById('grid');
 const searchInput = document.getElementById('search');
 const btns = document.querySelectorAll('.btn');
@@ -242,34 +447,75 @@ const statsBar = document.getElementById('stats-bar');
 let activeFilter = 'all';
 // مقدار کاور پیش‌فرض هم باید بدون اسپیس باشد
 const defaultCover = '__DEFAULT_COVER__';
+// بندانگشتی‌های محلی: {coverBase}{b.cover}-{width}.{format}
+const coverBase = __COVER_BASE__;
+const coverWidths = __COVER_WIDTHS__;
+const coverFormats = __COVER_FORMATS__;
+const coverSizes = '(max-width: 560px) 100vw, 320px';
+
+// وضعیت هر کتاب موقع ساخت به کد عددی تبدیل شده است (status_code = اندیس این فهرست‌ها)
+const statusLabels = __STATUS_LABELS__;
+const statusClasses = __STATUS_CLASSES__;
+
+// --- رندر کارت‌ها ---
+// اگر تعداد نتایج از virtualMin بیشتر باشد فقط ردیف‌های داخل دید (به علاوه overscanRows
+// ردیف بالا و پایین) ساخته می‌شوند؛ جای بقیه ردیف‌ها با padding گرید نگه داشته می‌شود
+// و کارت‌هایی که از دید خارج می‌شوند برای کتاب‌های بعدی بازیافت می‌شوند.
+const virtualMin = __VIRTUAL_MIN__;
+const overscanRows = __VIRTUAL_OVERSCAN__;
+const emptyMsg = document.createElement('p');
+emptyMsg.style.color = '#777';
+emptyMsg.textContent = 'موردی یافت نشد.';
+
+let current = [];
+let virtualOn = false;
+// کتاب‌هایی که یک بار نمایش داده شده‌اند (فقط بقیه fade-in می‌گیرند). با عوض شدن فیلتر یا عبارت
+// جستجو خالی نمی‌شود؛ چون کلیدش خود شیء کتاب است، فقط کتاب‌های تازه (مثلاً از shardها) محو-ظاهر می‌شوند.
+const seen = new WeakSet();
+const cardPool = [];
+const mounted = new Map();    // اندیس کتاب در current -> کارت
+let first = 0, last = 0;      // بازه کارت‌های داخل DOM: [first, last)
+let cols = 1, rowH = 0, rowGap = 0;
+let frame = 0;
+
+function createCard() {
+    const card = document.createElement('div');
+    card.className = 'card';
+    card.innerHTML = '<div class="cover-container"><picture>' +
+        coverFormats.slice(0, -1).map(f => `<source type="image/${f}" sizes="${coverSizes}">`).join('') +
+        `<img class="cover" loading="lazy" decoding="async" sizes="${coverSizes}"></picture></div><div class="info"></div>`;
+    card._img = card.querySelector('.cover');
+    card._sources = card.querySelectorAll('source');
+    card._info = card.querySelector('.info');
+    card._img.addEventListener('error', () => {
+        // بندانگشتی محلی -> لینک اصلی -> کاور پیش‌فرض
+        if (card._img.srcset) setCover(card, card._book, false);
+        else if (!card._img.src.endsWith(defaultCover)) card._img.src = defaultCover;
+    });
+    card.addEventListener('animationend', () => card.classList.remove('fade-in'));
+    return card;
+}
 
-function normalizeStatus(s) {
-    if (!s) return 'unread';
-    const clean = s.toLowerCase().replace(/\s+/g, '');
-    
-    if (clean.includes('خواندهشده') || clean.includes('read')) return 'read';
-    if (clean.includes('درحالخواندن') || clean.includes('reading')) return 'reading';
-    if (clean.includes('دوستنداشتم') || clean.includes('disliked')) return 'disliked';
-    if (clean.includes('بهزودیمی‌خوانم') || clean.includes('toread')) return 'toread';
-    
-    return 'unread';
+function coverSrcset(key, format) {
+    return coverWidths.map(w => `${coverBase}${key}-${w}.${format} ${w}w`).join(', ');
 }
 
-function render(list) {
-    grid.innerHTML = '';
-    const frag = document.createDocumentFragment();
-    list.forEach(b => {
-        const card = document.createElement('div');
-        card.className = 'card fade-in';
-        const st = normalizeStatus(b.status);
-        const codeText = b.code ? ('MPR' + b.code) : 'MPR____';
-        let imgPath = b.image_path || defaultCover;
-
-        card.innerHTML = `
-            <div class="cover-container">
-                <img src="${imgPath}" class="cover" onerror="this.src='${defaultCover}'">
-            </div>
-            <div class="info">
+function setCover(card, b, thumbs) {
+    const key = thumbs && coverFormats.length ? b.cover : '';
+    card._sources.forEach((s, i) => { s.srcset = key ? coverSrcset(key, coverFormats[i]) : ''; });
+    const format = coverFormats[coverFormats.length - 1];
+    card._img.srcset = key ? coverSrcset(key, format) : '';
+    card._img.src = key ? `${coverBase}${key}-${coverWidths[coverWidths.length - 1]}.${format}`
+                        : (b.image_path || defaultCover);
+}
+
+function fillCard(card, b) {
+    if (card._book === b) return;
+    card._book = b;
+    setCover(card, b, true);
+    const st = statusClasses[b.status_code];
+    const codeText = b.code ? ('MPR' + b.code) : 'MPR____';
+    card._info.innerHTML = `
                 <div>
                     <div class="title-main">${b.title_main}</div>
                     ${b.title_sub ? `<div class="title-sub">${b.title_sub}</div>` : ''}
@@ -285,78 +531,253 @@ function render(list) {
                     <span class="badge ${st}">${codeText}</span>
                     ${b.score ? `<span class="score">${b.score} امتیاز</span>` : ''}
                 </div>
-            </div>
-        `;
-        frag.appendChild(card);
-    });
+            `;
+}
+
+function acquire(i) {
+    const card = cardPool.pop() || createCard();
+    const b = current[i];
+    fillCard(card, b);
+    if (!seen.has(b)) {
+        seen.add(b);
+        card.classList.add('fade-in');
+    }
+    mounted.set(i, card);
+    return card;
+}
 
-    if(!list.length) grid.innerHTML = '<p style="color:#777;">موردی یافت نشد.</p>';
-    else grid.appendChild(frag);
+function release(from, to) {
+    for (let i = from; i < to; i++) {
+        const card = mounted.get(i);
+        if (!card) continue;
+        mounted.delete(i);
+        card.remove();
+        card.classList.remove('fade-in');
+        cardPool.push(card);
+    }
 }
 
+// کارت‌های [start, end) را در DOM می‌گذارد؛ کارت‌هایی که در هر دو بازه هستند جابه‌جا نمی‌شوند
+function mountRange(start, end) {
+    if (start >= last || end <= first) {
+        release(first, last);
+        first = last = start;
+    } else {
+        release(first, start);
+        release(end, last);
+        first = Math.max(first, start);
+        last = Math.min(last, end);
+    }
+    if (start < first) {
+        const frag = document.createDocumentFragment();
+        for (let i = start; i < first; i++) frag.appendChild(acquire(i));
+        grid.insertBefore(frag, grid.firstChild);
+    }
+    if (end > last) {
+        const frag = document.createDocumentFragment();
+        for (let i = last; i < end; i++) frag.appendChild(acquire(i));
+        grid.appendChild(frag);
+    }
+    first = start;
+    last = end;
+}
+
+function measureGrid() {
+    const cs = getComputedStyle(grid);
+    cols = Math.max(1, cs.gridTemplateColumns.split(' ').length);
+    rowGap = parseFloat(cs.rowGap) || 0;
+}
+
+function drawWindow() {
+    frame = 0;
+    if (!virtualOn) return;
+    const rows = Math.ceil(current.length / cols);
+    // تا وقتی ارتفاع ردیف اندازه‌گیری نشده یک تخمین کافی است
+    const stride = (rowH || 450) + rowGap;
+    const top = grid.getBoundingClientRect().top;
+    const firstRow = Math.min(rows, Math.max(0, Math.floor(-top / stride) - overscanRows));
+    const lastRow = Math.min(rows, Math.max(firstRow, Math.ceil((window.innerHeight - top) / stride) + overscanRows));
+
+    grid.style.paddingTop = (firstRow * stride) + 'px';
+    grid.style.paddingBottom = ((rows - lastRow) * stride) + 'px';
+    mountRange(firstRow * cols, Math.min(current.length, lastRow * cols));
+
+    // همه ردیف‌ها هم‌ارتفاع بلندترین کارتی که تا حالا دیده شده
+    let h = rowH;
+    mounted.forEach(card => { h = Math.max(h, card.offsetHeight); });
+    if (h > rowH) {
+        rowH = h;
+        grid.style.gridAutoRows = `minmax(${rowH}px, auto)`;
+        scheduleDraw();
+    }
+}
+
+function scheduleDraw() {
+    if (!frame) frame = requestAnimationFrame(drawWindow);
+}
+
+function render(list) {
+    release(first, last);
+    first = last = 0;
+    emptyMsg.remove();
+    current = list;
+    virtualOn = virtualMin !== null && list.length > virtualMin;
+
+    if (!virtualOn) {
+        grid.style.paddingTop = grid.style.paddingBottom = grid.style.gridAutoRows = '';
+        rowH = 0;
+        if (!list.length) grid.appendChild(emptyMsg);
+        else mountRange(0, list.length);
+        return;
+    }
+    measureGrid();
+    drawWindow();
+}
+
+window.addEventListener('scroll', scheduleDraw, { passive: true });
+window.addEventListener('resize', () => {
+    if (!virtualOn) return;
+    // با تغییر عرض، تعداد ستون‌ها و ارتفاع کارت‌ها دوباره اندازه‌گیری می‌شود
+    rowH = 0;
+    grid.style.gridAutoRows = '';
+    measureGrid();
+    scheduleDraw();
+});
+
 function metaRow(label, val) {
     if(!val) return '';
     return `<div class="meta-row"><span class="meta-label">${label}</span><span class="meta-value">${val}</span></div>`;
 }
 
-function updateStats(list) {
-    let totalPages = 0;
-    list.forEach(b => {
-        let p = parseInt(b.pages);
-        if(!isNaN(p)) totalPages += p;
-    });
-    const countStr = list.length.toLocaleString('fa-IR');
-    const pagesStr = totalPages.toLocaleString('fa-IR');
+function updateStats(bucket) {
+    const countStr = bucket.list.length.toLocaleString('fa-IR');
+    const pagesStr = bucket.pages.toLocaleString('fa-IR');
     statsBar.innerHTML = `نمایش: <span class="stats-highlight">${countStr}</span> کتاب | مجموع صفحات: <span class="stats-highlight">${pagesStr}</span>`;
 }
 
-function updateButtonCounts(currentList) {
-    const counts = { all: 0, read: 0, reading: 0, unread: 0, disliked: 0, toread: 0 };
-    currentList.forEach(b => {
-        counts.all++;
-        const st = normalizeStatus(b.status);
-        counts[st]++;
-    });
+function updateButtonCounts(buckets) {
     btns.forEach(btn => {
-        const key = btn.getAttribute('data-filter');
+        const code = statusLabels.indexOf(btn.getAttribute('data-filter'));
         let label = btn.textContent.split(' (')[0];
-        let c = 0;
-        if(key==='all') c = counts.all;
-        if(key==='خوانده شده') c = counts.read;
-        if(key==='در حال خواندن') c = counts.reading;
-        if(key==='خوانده نشده') c = counts.unread;
-        if(key==='دوست نداشتم') c = counts.disliked;
-        if(key==='به زودی می‌خوانم') c = counts.toread;
+        const c = code < 0 ? buckets.list.length : buckets.byStatus[code].list.length;
         btn.textContent = `${label} (${c})`;
     });
 }
 
-function apply() {
-    const q = searchInput.value.toLowerCase().trim();
-    const searchMatches = books.filter(b => {
-        if(!q) return true;
-        const hay = (
-            b.title_main + ' ' + b.title_sub + ' ' + b.author + ' ' +
-            b.publisher + ' ' + b.translator + ' ' + b.year + ' ' +
-            b.pages + ' ' + (b.code || '')
-        ).toLowerCase();
-        return hay.includes(q);
-    });
+// --- سطل‌های وضعیت ---
+// هر نتیجه‌ی جستجو یک بار در سطل وضعیت کتاب‌ها پخش می‌شود و تعداد و مجموع صفحات هر سطل
+// همان‌جا جمع می‌شود؛ عوض کردن فیلتر وضعیت فقط سطل آماده را نشان می‌دهد. سطل‌های فهرست
+// بدون جستجو (همه کتاب‌ها) با رسیدن shardها فقط با کتاب‌های تازه به‌روز می‌شوند.
+function makeBuckets() {
+    return { list: [], pages: 0, byStatus: statusLabels.map(() => ({ list: [], pages: 0 })) };
+}
 
-    updateButtonCounts(searchMatches);
-    const finalList = searchMatches.filter(b => {
-        const st = normalizeStatus(b.status);
-        if(activeFilter === 'all') return true;
-        if(activeFilter === 'خوانده شده' && st !== 'read') return false;
-        if(activeFilter === 'در حال خواندن' && st !== 'reading') return false;
-        if(activeFilter === 'خوانده نشده' && st !== 'unread') return false;
-        if(activeFilter === 'دوست نداشتم' && st !== 'disliked') return false;
-        if(activeFilter === 'به زودی می‌خوانم' && st !== 'toread') return false;
-        return true;
-    });
+function addToBuckets(buckets, b) {
+    const s = buckets.byStatus[b.status_code];
+    buckets.list.push(b);
+    buckets.pages += b.pages_int;
+    s.list.push(b);
+    s.pages += b.pages_int;
+}
+
+const allBuckets = makeBuckets();
+let queryBuckets = null, bucketsQuery = '', bucketsCount = 0;
 
-    render(finalList);
-    updateStats(finalList);
+function bucketsFor(q) {
+    if (!q) {
+        for (let i = allBuckets.list.length; i < books.length; i++) addToBuckets(allBuckets, books[i]);
+        return allBuckets;
+    }
+    if (q !== bucketsQuery || bucketsCount !== books.length) {
+        queryBuckets = makeBuckets();
+        for (const i of matchIds(q)) addToBuckets(queryBuckets, books[i]);
+        bucketsQuery = q;
+        bucketsCount = books.length;
+    }
+    return queryBuckets;
+}
+
+// --- جستجو ---
+// کلید جستجوی هر کتاب فقط یک بار (در اولین جستجو) از خود کتاب ساخته می‌شود. کلیدها و
+// عبارت جستجو با همان جدول persian_text.SEARCH_CHARS نرمال می‌شوند (ی/ک عربی، نیم‌فاصله،
+// اعراب، ارقام فارسی). ترتیب فیلدها مثل search_index.SEARCH_FIELDS است.
+// برای عبارت‌های حداقل gramSize حرفی، کوتاه‌ترین فهرست سه‌حرفی‌های عبارت از ایندکس ساخت
+// کاندیداها را می‌دهد و فقط همان‌ها با includes بررسی می‌شوند. اگر عبارت جدید ادامه‌ی عبارت
+// قبلی باشد (تایپ حرف بعدی) فقط نتیجه‌ی قبلی دوباره فیلتر می‌شود.
+const searchDebounce = __SEARCH_DEBOUNCE__;
+const searchChars = __SEARCH_CHARS__;
+const searchCharRe = new RegExp('[' + Object.keys(searchChars).join('') + ']', 'g');
+const hay = [];
+let searchIndex = null;
+let gramSize = 3;
+const postingCache = new Map();
+let lastQuery = '', lastIds = null, lastCount = 0;
+
+function normalizeSearch(s) {
+    return s.replace(searchCharRe, c => searchChars[c]).toLowerCase().replace(/\s+/g, ' ').trim();
+}
+
+function searchText(b) {
+    return normalizeSearch(
+        b.title_main + ' ' + b.title_sub + ' ' + b.author + ' ' +
+        b.publisher + ' ' + b.translator + ' ' + b.year + ' ' +
+        b.pages + ' ' + (b.code || '')
+    );
+}
+
+function setSearchIndex(data) {
+    searchIndex = data && data.grams;
+    gramSize = data ? data.n : 3;
+    postingCache.clear();
+    lastIds = null;
+}
+
+// شماره‌ی کتاب‌های دارای سه‌حرفی g (فهرست فاصله‌ای فقط بار اول باز می‌شود)
+function postings(g) {
+    let ids = postingCache.get(g);
+    if (ids) return ids;
+    if (!Object.prototype.hasOwnProperty.call(searchIndex, g)) return [];
+    const deltas = searchIndex[g];
+    ids = new Int32Array(deltas.length);
+    let acc = 0;
+    for (let k = 0; k < deltas.length; k++) ids[k] = (acc += deltas[k]);
+    postingCache.set(g, ids);
+    return ids;
+}
+
+function matchIds(q) {
+    for (let i = hay.length; i < books.length; i++) {
+        hay.push(searchText(books[i]));
+    }
+    let candidates = null;
+    if (lastIds && lastCount === books.length && q.includes(lastQuery)) {
+        candidates = lastIds;
+    } else if (searchIndex && q.length >= gramSize) {
+        for (let i = 0; i + gramSize <= q.length; i++) {
+            const ids = postings(q.slice(i, i + gramSize));
+            if (!candidates || ids.length < candidates.length) candidates = ids;
+            if (!candidates.length) break;
+        }
+    }
+    const out = [];
+    if (candidates) {
+        for (const i of candidates) if (i < hay.length && hay[i].includes(q)) out.push(i);
+    } else {
+        for (let i = 0; i < hay.length; i++) if (hay[i].includes(q)) out.push(i);
+    }
+    lastQuery = q;
+    lastIds = out;
+    lastCount = books.length;
+    return out;
+}
+
+function apply() {
+    const buckets = bucketsFor(normalizeSearch(searchInput.value));
+    updateButtonCounts(buckets);
+    const code = statusLabels.indexOf(activeFilter);
+    const shown = code < 0 ? buckets : buckets.byStatus[code];
+    render(shown.list);
+    updateStats(shown);
 }
 
 btns.forEach(btn => {
@@ -368,20 +789,201 @@ btns.forEach(btn => {
     });
 });
 
-searchInput.addEventListener('input', apply);
+let searchTimer = 0;
+searchInput.addEventListener('input', () => {
+    clearTimeout(searchTimer);
+    searchTimer = setTimeout(apply, searchDebounce);
+});
+
+// ایندکس جستجو: داخل صفحه، یا مسیر فایل جدا در خروجی تکه‌تکه
+const indexData = JSON.parse(document.getElementById('books-index').textContent || 'null');
+if (indexData && typeof indexData === 'object') setSearchIndex(indexData);
 apply();
+
+// بارگذاری بقیه کتاب‌ها (اگر خروجی تکه‌تکه باشد) در پس‌زمینه
+const shardFiles = JSON.parse(document.getElementById('books-shards').textContent || '[]');
+
+async function fetchShard(path) {
+    if ('DecompressionStream' in window) {
+        try {
+            const res = await fetch(path + '.gz');
+            if (res.ok) {
+                const stream = res.body.pipeThrough(new DecompressionStream('gzip'));
+                return await new Response(stream).json();
+            }
+        } catch (e) { /* نسخه بدون فشرده‌سازی */ }
+    }
+    const res = await fetch(path);
+    if (!res.ok) throw new Error(res.status);
+    return res.json();
+}
+
+let shardFailed = false;
+
+async function loadShards() {
+    // همه درخواست‌ها هم‌زمان، ولی اضافه شدن به ترتیب تا ترتیب کتاب‌ها حفظ شود
+    const pending = shardFiles.map(path => fetchShard(path).catch(e => {
+        console.error('shard load failed:', path, e);
+        return null;
+    }));
+    for (const p of pending) {
+        const data = await p;
+        const part = data && decodeBooks(data);
+        if (!part) {
+            // شماره‌ی کتاب‌های بعدی دیگر با ایندکس نمی‌خواند؛ جستجو به پیمایش کامل برمی‌گردد
+            shardFailed = true;
+            setSearchIndex(null);
+            continue;
+        }
+        if (!part.length) continue;
+        books.push(...part);
+        apply();
+    }
+}
+
+if (shardFiles.length) loadShards();
+if (typeof indexData === 'string') {
+    fetchShard(indexData).then(data => { if (!shardFailed) setSearchIndex(data); }).catch(e => console.error('search index load failed:', e));
+}
 </script>
 
 </body>
 </html>
 '''
 
-    final_html = html_template.replace('__BOOKS_JSON__', books_json)
+
+def render_page(inline_books, shard_urls, virtual_min=VIRTUAL_GRID_MIN, index=None, cover_formats=()):
+    """
+    HTML نهایی صفحه از کتاب‌های داخل صفحه و فهرست shardها.
+    index: ایندکس جستجو (داخل صفحه)، مسیر فایل ایندکس، یا None برای جستجوی بدون ایندکس.
+    cover_formats: قالب بندانگشتی‌های ساخته‌شده (خالی = فقط image_path).
+    """
+    books_json = encode_books(inline_books)
+    # آماده‌سازی مسیر تصویر پیش‌فرض برای HTML
+    default_cover_html = sanitize_url(DEFAULT_COVER_PATH)
+
+    final_html = HTML_TEMPLATE.replace('__BOOKS_JSON__', books_json)
+    final_html = final_html.replace('__BOOKS_SHARDS__', json.dumps(shard_urls))
+    index_json = search_index.dumps(index) if isinstance(index, dict) else json.dumps(index)
+    final_html = final_html.replace('__SEARCH_INDEX__', index_json)
+    final_html = final_html.replace('__SEARCH_DEBOUNCE__', str(SEARCH_DEBOUNCE_MS))
+    final_html = final_html.replace('__SEARCH_CHARS__', json.dumps(persian_text.SEARCH_CHARS))
+    final_html = final_html.replace('__STATUS_LABELS__', json.dumps(list(STATUS_CLASSES), ensure_ascii=False))
+    final_html = final_html.replace('__STATUS_CLASSES__', json.dumps(list(STATUS_CLASSES.values())))
     # اینجا هم باید مسیر اصلاح شده جایگزین شود
     final_html = final_html.replace('__DEFAULT_COVER__', default_cover_html)
+    final_html = final_html.replace('__COVER_BASE__', json.dumps(sanitize_url(COVER_DIR) + '/'))
+    final_html = final_html.replace('__COVER_WIDTHS__', json.dumps(COVER_WIDTHS))
+    final_html = final_html.replace('__COVER_FORMATS__', json.dumps(list(cover_formats)))
+    final_html = final_html.replace('__VIRTUAL_MIN__', json.dumps(virtual_min))
+    final_html = final_html.replace('__VIRTUAL_OVERSCAN__', str(VIRTUAL_OVERSCAN_ROWS))
+
+    return final_html
+
+
+def cover_inputs():
+    """
+    اثر انگشت تصاویری که بندانگشتی‌ها از آن‌ها ساخته می‌شوند (فقط با LOCAL_COVERS؛ بدون آن
+    صفحه فقط مسیر تصاویر را دارد نه محتوایشان): Books Images و کاورهای دانلودشده‌ی COVER_CACHE_DIR.
+    """
+    if not LOCAL_COVERS:
+        return {}
+    return {
+        'cover_images': build_manifest.dir_fingerprint(
+            os.path.join(os.path.dirname(OUTPUT_FILE), IMAGE_BASE_PATH_LOCAL)),
+        'cover_downloads': build_manifest.dir_fingerprint(COVER_CACHE_DIR),
+    }
+
+
+def build_inputs():
+    """اثر انگشت هر چیزی که روی خروجی اثر دارد."""
+    return {
+        'sheet': build_manifest.sheet_fingerprint(EXCEL_FILE, SHEET_NAME),
+        # قالب HTML و منطق ساخت داخل همین فایل هستند
+        'generator': build_manifest.file_fingerprint(os.path.abspath(__file__)),
+        'excel_ingest': build_manifest.file_fingerprint(os.path.abspath(excel_ingest.__file__)),
+        'search_index': build_manifest.file_fingerprint(os.path.abspath(search_index.__file__)),
+        'persian_text': build_manifest.file_fingerprint(os.path.abspath(persian_text.__file__)),
+        'catalog_codec': build_manifest.file_fingerprint(os.path.abspath(catalog_codec.__file__)),
+        'cover_cache': build_manifest.file_fingerprint(os.path.abspath(cover_cache.__file__)),
+        'config': build_manifest.config_fingerprint({
+            'IRANKETAB_IMAGE': IRANKETAB_IMAGE,
+            'IRANKETAB_URL_PREFIX': IRANKETAB_URL_PREFIX,
+            'IMAGE_BASE_PATH_LOCAL': IMAGE_BASE_PATH_LOCAL,
+            'DEFAULT_COVER_PATH': DEFAULT_COVER_PATH,
+            'SHEET_NAME': SHEET_NAME,
+            'SHARD_OUTPUT': SHARD_OUTPUT,
+            'SHARD_DIR': SHARD_DIR,
+            'FIRST_SHARD_SIZE': FIRST_SHARD_SIZE,
+            'SHARD_SIZE': SHARD_SIZE,
+            'VIRTUAL_GRID_MIN': VIRTUAL_GRID_MIN,
+            'VIRTUAL_OVERSCAN_ROWS': VIRTUAL_OVERSCAN_ROWS,
+            'SEARCH_INDEX_MIN': SEARCH_INDEX_MIN,
+            'SEARCH_DEBOUNCE_MS': SEARCH_DEBOUNCE_MS,
+            'COLUMNAR_CATALOG': COLUMNAR_CATALOG,
+            'LOCAL_COVERS': LOCAL_COVERS,
+            'COVER_DIR': COVER_DIR,
+            'COVER_WIDTHS': COVER_WIDTHS,
+            'COVER_FORMATS': COVER_FORMATS,
+            'IRANKETAB_ORIGINAL_PREFIX': IRANKETAB_ORIGINAL_PREFIX,
+        }),
+        **cover_inputs(),
+    }
+
+
+def generate_html(force=FORCE_REBUILD):
+    out_dir = os.path.dirname(OUTPUT_FILE)
+    outputs = [os.path.relpath(OUTPUT_FILE, out_dir)]
+    try:
+        inputs = build_inputs()
+    except OSError as e:
+        print(f"Critical Error: {e}")
+        return
+    manifest = build_manifest.load_manifest(MANIFEST_FILE)
+    if not force and build_manifest.is_up_to_date(manifest, inputs, out_dir, outputs):
+        print(f"Up to date: {OUTPUT_FILE} (use --force to rebuild)")
+        return
+
+    print(f"Reading Excel file ({excel_ingest.ENGINE})...")
+    # 1. Read Excel (streamed; only the columns named in COLS_MAP, no embedded images)
+    try:
+        df = excel_ingest.read_columns(EXCEL_FILE, SHEET_NAME, WANTED_COLUMNS)
+    except Exception as e:
+        print(f"Critical Error: {e}")
+        return
+
+    # 2-3. Build book records
+    print("Processing books...")
+    books = build_books(df)
+
+    cover_formats = []
+    if LOCAL_COVERS:
+        cover_formats, cover_files = add_covers(books, out_dir)
+        outputs += cover_files
+        # کاورهایی که همین ساخت دانلود کرد جزو ورودی ثبت می‌شوند تا اجرای بعد بی‌دلیل دوباره نسازد
+        inputs.update(cover_inputs())
+
+    use_index = SEARCH_INDEX_MIN is not None and len(books) >= SEARCH_INDEX_MIN
+    index = search_index.build_index(books) if use_index else None
+    if index is not None:
+        print(f"Search index: {len(index['grams']):,} trigrams")
+
+    shard_urls = []
+    if SHARD_OUTPUT:
+        inline_books, shard_urls, index, shard_files = write_shards(books, out_dir, index)
+        outputs += shard_files
+        print(f"Inlined {len(inline_books)} books, {len(books) - len(inline_books)} in {len(shard_urls)} shard(s)")
+    else:
+        inline_books = books
+        # shardهای یک ساخت قبلی با SHARD_OUTPUT = True دیگر به کار نمی‌آیند
+        prune_shards(out_dir)
+
+    # 4. HTML
+    final_html = render_page(inline_books, shard_urls, index=index, cover_formats=cover_formats)
 
     with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
         f.write(final_html)
+    build_manifest.save_manifest(MANIFEST_FILE, build_manifest.record(inputs, out_dir, outputs))
     print(f"Success! Created {OUTPUT_FILE}")
 
 if __name__ == "__main__":
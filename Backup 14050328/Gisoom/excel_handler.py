@@ -2,6 +2,7 @@ import openpyxl
 
 COLUMN_MAPPING = {
     'عنوان اصلی': 'title',
+    'شماره در مجموعه': 'collection_number',
     'تصویر': 'image_url',
     'نویسنده': 'author',
     'مترجم': 'translator',
@@ -26,48 +27,118 @@ def find_isbn_column(header_map):
     return None
 
 
+class ExcelBatchWriter:
+    """
+    نوشتن دسته‌ای در اکسل: فایل فقط یک بار باز می‌شود، به‌روزرسانی ردیف‌ها
+    (بر اساس شماره ردیف) در حافظه نگه داشته می‌شوند و هر flush_every ردیف
+    یک بار (و در پایان کار) ذخیره می‌شوند. on_flush (اگر داده شود) بعد از هر ذخیره‌ی
+    موفق با شماره ردیف‌های ذخیره‌شده صدا زده می‌شود.
+
+        with ExcelBatchWriter(path, flush_every=50) as writer:
+            writer.update(row_index, book_data)
+    """
+
+    def __init__(self, file_path, flush_every=50, on_flush=None):
+        self.file_path = file_path
+        self.flush_every = max(1, int(flush_every))
+        self.on_flush = on_flush
+        self.wb = None
+        self.ws = None
+        self.header_map = {}
+        self.pending = {}
+        self.written = 0
+
+    def open(self):
+        try:
+            self.wb = openpyxl.load_workbook(self.file_path)
+        except Exception as e:
+            print(f"❌ باز کردن فایل شکست خورد: {e}")
+            raise
+        self.ws = self.wb.active
+        self.header_map = get_header_map(self.ws)
+        print(f"[ExcelBatchWriter] هدرهای پیداشده = {self.header_map}")
+        return self
+
+    def __enter__(self):
+        if self.wb is None:
+            self.open()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # حتی در صورت خطا، ردیف‌های جمع‌شده از دست نروند
+        if self.wb is None:
+            return False
+        if exc_type is None:
+            self.flush()
+            return False
+        try:
+            self.flush()
+        except Exception as e:
+            # خطای اصلی که در حال انتشار است نباید با خطای ذخیره‌ی دوباره پوشانده شود
+            print(f"❌ ذخیره‌ی ردیف‌های باقی‌مانده هم شکست خورد ({len(self.pending)} ردیف): {e}")
+        return False
+
+    def update(self, row_index, book_data):
+        row = self.pending.setdefault(row_index, {})
+        row.update(book_data)
+        if len(self.pending) >= self.flush_every:
+            self.flush()
+
+    def _apply_row(self, row_index, book_data):
+        print(f"[update_excel] ردیف = {row_index} | کلیدها = {list(book_data.keys())}")
+        written = 0
+        for col_name, data_key in COLUMN_MAPPING.items():
+            if col_name not in self.header_map:
+                print(f"⚠️ ستون '{col_name}' در هدر اکسل نیست → رد شد")
+                continue
+
+            value = book_data.get(data_key)
+            col_idx = self.header_map[col_name]
+
+            if value:
+                self.ws.cell(row=row_index, column=col_idx).value = value
+                written += 1
+                print(f"   ✓ نوشتم → ستون '{col_name}' (col={col_idx}) = {value!r}")
+            else:
+                print(f"   ✗ خالی/None برای کلید '{data_key}' "
+                      f"(ستون '{col_name}') → نوشته نشد")
+        return written
+
+    def flush(self):
+        if not self.pending:
+            return 0
+
+        rows = sorted(self.pending)
+        written = 0
+        for row_index in rows:
+            written += self._apply_row(row_index, self.pending[row_index])
+
+        # pending فقط بعد از ذخیره‌ی موفق خالی می‌شود تا flush بعدی (مثلاً در __exit__) دوباره ذخیره کند
+        try:
+            self.wb.save(self.file_path)
+            print(f"💾 ذخیره موفق | {written} فیلد در {len(rows)} ردیف نوشته شد")
+        except PermissionError:
+            print("❌ ذخیره شکست خورد: فایل اکسل احتمالاً همین الان در Excel باز است!")
+            raise
+        except Exception as e:
+            print(f"❌ ذخیره شکست خورد: {e}")
+            raise
+
+        self.pending.clear()
+        self.written += written
+        if self.on_flush:
+            self.on_flush(rows)
+        return written
+
+
 def update_excel(file_path, row_index, book_data):
+    """نوشتن تک‌ردیفی (سازگار با نسخه قبل). برای چند ردیف از ExcelBatchWriter استفاده کنید."""
     print("\n" + "=" * 50)
     print(f"[update_excel] فراخوانی شد | ردیف = {row_index}")
-    print(f"[update_excel] کلیدهای دریافتی book_data = {list(book_data.keys())}")
     print(f"[update_excel] محتوای کامل book_data = {book_data}")
 
-    try:
-        wb = openpyxl.load_workbook(file_path)
-    except Exception as e:
-        print(f"❌ باز کردن فایل شکست خورد: {e}")
-        raise
-    ws = wb.active
-
-    header_map = get_header_map(ws)
-    print(f"[update_excel] هدرهای پیداشده = {header_map}")
-
-    written = 0
-    for col_name, data_key in COLUMN_MAPPING.items():
-        if col_name not in header_map:
-            print(f"⚠️ ستون '{col_name}' در هدر اکسل نیست → رد شد")
-            continue
-
-        value = book_data.get(data_key)
-        col_idx = header_map[col_name]
-
-        if value:
-            ws.cell(row=row_index, column=col_idx).value = value
-            written += 1
-            print(f"   ✓ نوشتم → ستون '{col_name}' (col={col_idx}) = {value!r}")
-        else:
-            print(f"   ✗ خالی/None برای کلید '{data_key}' "
-                  f"(ستون '{col_name}') → نوشته نشد")
-
-    try:
-        wb.save(file_path)
-        print(f"💾 ذخیره موفق | {written} فیلد در ردیف {row_index} نوشته شد")
-    except PermissionError:
-        print("❌ ذخیره شکست خورد: فایل اکسل احتمالاً همین الان در Excel باز است!")
-        raise
-    except Exception as e:
-        print(f"❌ ذخیره شکست خورد: {e}")
-        raise
+    with ExcelBatchWriter(file_path, flush_every=1) as writer:
+        writer.update(row_index, book_data)
 
     print("=" * 50)
-    return written
+    return writer.written
@@ -1,13 +1,61 @@
+import os
 import requests
 import re
 import json
+import sys
+import threading
+import time
+from urllib.parse import urlparse
 from bs4 import BeautifulSoup
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 
+# ماژول‌های مشترک (persian_text) در پوشه‌ی بالایی کنار خزنده‌ی ایران‌کتاب هستند
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from collection_number import collection_number  # noqa: E402
+from persian_text import digits_only, normalize_isbn  # noqa: E402
+from structured_data import PathStats, extract  # noqa: E402
+
+BASE_URL = "https://www.gisoom.com"
+# کلیدهای JSON نتیجه‌ی جستجو (div.searchresult) -> کلیدهای خروجی (سازگار با excel_handler)
+SEARCH_FIELDS = {
+    'name': 'title',
+    'author': 'author',
+    'nasher': 'publisher',
+    'sal': 'year',
+    'nobat': 'edition',
+}
+# کلیدهایی که parse_book_page از صفحه کتاب درمی‌آورد؛ فقط کمبود همین‌ها دلیل دریافت صفحه است
+PAGE_FIELDS = ('title', 'image_url', 'author', 'publisher', 'translator', 'pages', 'year', 'language')
+
+
+class HostRateLimiter:
+    """
+    محدودکننده نرخ درخواست به ازای هر میزبان که بین همه نخ‌ها مشترک است.
+    هر درخواست یک «نوبت» زمانی رزرو می‌کند و تا رسیدن آن نوبت صبر می‌کند.
+    """
+
+    def __init__(self, requests_per_second=2.0):
+        self.interval = 1.0 / requests_per_second if requests_per_second else 0.0
+        self._lock = threading.Lock()
+        self._next_slot = {}
+
+    def wait(self, url):
+        if not self.interval:
+            return
+        host = urlparse(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
 
 class GisoomCrawler:
-    def __init__(self):
+    def __init__(self, base_url=BASE_URL, requests_per_second=None, pool_size=10):
+        self.base_url = base_url.rstrip("/")
+        self.rate_limiter = HostRateLimiter(requests_per_second)
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) '
                           'AppleWebKit/537.36 (KHTML, like Gecko) '
@@ -18,19 +66,41 @@ class GisoomCrawler:
         self.session = requests.Session()
         retries = Retry(total=3, backoff_factor=1.5,
                         status_forcelist=[500, 502, 503, 504])
-        self.session.mount('https://', HTTPAdapter(max_retries=retries))
+        # pool_size باید حداقل به اندازه تعداد نخ‌های هم‌زمان باشد
+        adapter = HTTPAdapter(max_retries=retries,
+                              pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        # searches: درخواست جستجو، pages: دریافت صفحه کتاب، pages_avoided: صفحه‌هایی که
+        # نتیجه‌ی جستجو (و اکسل) کافی بود و دریافت نشدند
+        self.stats = {'searches': 0, 'pages': 0, 'pages_avoided': 0}
+        self._stats_lock = threading.Lock()
+        # زمان و ستون‌های هر مسیر parse صفحه کتاب (داده‌ی ساخت‌یافته / BeautifulSoup)
+        self.paths = PathStats()
+
+    def count(self, key):
+        with self._stats_lock:
+            self.stats[key] += 1
+
+    def needs_page(self, found, required):
+        """
+        آیا برای کلیدهای required (None = همه) صفحه کتاب لازم است؟ اگر نتیجه‌ی جستجو (found)
+        همه را دارد، یک دریافت صفحه صرفه‌جویی و شمرده می‌شود.
+        """
+        if required is None or any(not found.get(key) for key in required if key in PAGE_FIELDS):
+            return True
+        self.count('pages_avoided')
+        return False
 
     def normalize_isbn(self, isbn):
-        if not isbn:
-            return ""
-        return re.sub(r'[^0-9]', '', str(isbn))
+        return normalize_isbn(isbn)
 
     def find_book_page(self, isbn):
         isbn = self.normalize_isbn(isbn)
         if not isbn:
             return None
 
-        search_url = f"https://www.gisoom.com/search/book/isbn-{isbn}/"
+        search_url = f"{self.base_url}/search/book/isbn-{isbn}/"
         payload = {
             'data[param][recent][id]': 'recent',
             'data[param][recent][val]': '0',
@@ -39,6 +109,8 @@ class GisoomCrawler:
             'data[page]': '0'
         }
         try:
+            self.rate_limiter.wait(search_url)
+            self.count('searches')
             response = self.session.post(search_url, data=payload,
                                          headers=self.headers, timeout=30)
             if response.status_code != 200:
@@ -58,81 +130,121 @@ class GisoomCrawler:
             if not gid:
                 return None
 
-            return {
-                "url": f"https://www.gisoom.com/book/{gid}/",
+            found = {
+                "url": f"{self.base_url}/book/{gid}/",
                 "gid": gid,
                 "isbn_found": item.get('isbn'),
-                # کلیدها مطابق schema نهایی (سازگار با excel_handler)
-                "title": (item.get('name') or "").strip(),
-                "author": (item.get('author') or "").strip(),
-                "publisher": (item.get('nasher') or "").strip(),
             }
+            # کلیدها مطابق schema نهایی (سازگار با excel_handler)
+            for key, out in SEARCH_FIELDS.items():
+                found[out] = str(item.get(key) or "").strip()
+            if found['year']:
+                found['year'] = digits_only(found['year'])
+            found['collection_number'] = collection_number(found['title'])
+            return found
         except Exception as e:
             print(f"Error in find_book_page: {e}")
             return None
 
-    def parse_book_page(self, url):
+    def parse_book_page(self, url, required=None):
         try:
+            self.rate_limiter.wait(url)
+            self.count('pages')
             response = self.session.get(url, headers=self.headers, timeout=30)
             if response.status_code != 200:
                 return {}
+            return self.parse_book_html(response.text, required)
 
-            soup = BeautifulSoup(response.text, 'html.parser')
-            details = {}
-
-            # --- meta tags ---
-            og_title = soup.find("meta", property="og:title")
-            if og_title and og_title.get("content"):
-                details['title'] = og_title["content"].replace("کتاب ", "").strip()
-
-            og_image = soup.find("meta", property="og:image")
-            if og_image and og_image.get("content"):
-                details['image_url'] = og_image["content"].strip()
-
-            # --- متن ساده‌ی صفحه (مقاوم در برابر ساختار تگ‌ها) ---
-            text = soup.get_text("\n", strip=True)
-
-            def grab(label):
-                m = re.search(rf'{label}\s*[:：]\s*(.+)', text)
-                return m.group(1).strip() if m else ""
-
-            def to_digits(s):
-                # تبدیل ارقام فارسی به انگلیسی و حذف بقیه
-                fa = "۰۱۲۳۴۵۶۷۸۹"
-                en = "0123456789"
-                s = s.translate(str.maketrans(fa, en))
-                return re.sub(r'[^\d]', '', s)
-
-            author = grab('مؤلف')
-            if author:
-                details['author'] = author
-
-            publisher = grab('ناشر')
-            if publisher:
-                details['publisher'] = publisher
+        except Exception as e:
+            print(f"Error in parse_book_page: {e}")
+            return {}
 
-            translator = grab('مترجم')
-            if translator:
-                details['translator'] = translator
+    def parse_book_html(self, html, required=None):
+        """
+        اول og/JSON-LD/microdata صفحه بدون ساختن درخت خوانده می‌شود؛ BeautifulSoup و جستجوی متن
+        فقط وقتی اجرا می‌شوند که یکی از کلیدهای required (None = همه‌ی PAGE_FIELDS) هنوز خالی
+        باشد و فقط کلیدهای خالی را پر می‌کنند.
+        """
+        with self.paths.timed('structured'):
+            details = self.parse_structured(html)
+        self.paths.count('structured', 'fields', len(details))
+        wanted = PAGE_FIELDS if required is None else [k for k in required if k in PAGE_FIELDS]
+        if all(details.get(key) for key in wanted):
+            self.paths.count('dom', 'skipped')
+            return details
 
-            pages = grab('تعداد صفحات')
+        with self.paths.timed('dom'):
+            scraped = self.parse_dom(html)
+        filled = {k: v for k, v in scraped.items() if not details.get(k)}
+        self.paths.count('dom', 'fields', len(filled))
+        details.update(filled)
+        return details
+
+    def parse_structured(self, html):
+        data = extract(html)
+        details = {}
+        if data.get('title'):
+            details['title'] = data['title'].replace("کتاب ", "").strip()
+            number = collection_number(details['title'])
+            if number:
+                details['collection_number'] = number
+        for key in ('image_url', 'author', 'translator', 'publisher', 'pages', 'language'):
+            if data.get(key):
+                details[key] = data[key]
+        year = data.get('year_fa') or data.get('year_en')
+        if year:
+            details['year'] = year
+        return details
+
+    def parse_dom(self, html):
+        soup = BeautifulSoup(html, 'html.parser')
+        details = {}
+
+        # --- meta tags ---
+        og_title = soup.find("meta", property="og:title")
+        if og_title and og_title.get("content"):
+            details['title'] = og_title["content"].replace("کتاب ", "").strip()
+            number = collection_number(details['title'])
+            if number:
+                details['collection_number'] = number
+
+        og_image = soup.find("meta", property="og:image")
+        if og_image and og_image.get("content"):
+            details['image_url'] = og_image["content"].strip()
+
+        # --- متن ساده‌ی صفحه (مقاوم در برابر ساختار تگ‌ها) ---
+        text = soup.get_text("\n", strip=True)
+
+        def grab(label):
+            m = re.search(rf'{label}\s*[:：]\s*(.+)', text)
+            return m.group(1).strip() if m else ""
+
+        author = grab('مؤلف')
+        if author:
+            details['author'] = author
+
+        publisher = grab('ناشر')
+        if publisher:
+            details['publisher'] = publisher
+
+        translator = grab('مترجم')
+        if translator:
+            details['translator'] = translator
+
+        pages = grab('تعداد صفحات')
+        if pages:
+            pages = digits_only(pages)
             if pages:
-                pages = to_digits(pages)
-                if pages:
-                    details['pages'] = pages
+                details['pages'] = pages
 
-            year = grab('سال چاپ')
+        year = grab('سال چاپ')
+        if year:
+            year = digits_only(year)
             if year:
-                year = to_digits(year)
-                if year:
-                    details['year'] = year
+                details['year'] = year
 
-            language = grab('زبان')
-            if language:
-                details['language'] = language
+        language = grab('زبان')
+        if language:
+            details['language'] = language
 
-            return details
-
-        except Exception as e:
-            print(f"Error in parse_book_page: {e}")
-            return {}
+        return details
@@ -1,24 +1,131 @@
-import openpyxl
-from gisoom_crawler import GisoomCrawler
-from excel_handler import update_excel
+import argparse
+import os
+from gisoom_crawler import GisoomCrawler, BASE_URL
+from excel_handler import COLUMN_MAPPING, ExcelBatchWriter
+# مسیر ماژول‌های مشترک را gisoom_crawler اضافه می‌کند
+from persian_text import normalize_isbn as clean_isbn
+from crawl_journal import CrawlJournal, in_shard, parse_shard
+from ordered_pool import ordered_map
+
+# هر چند ردیف یک بار فایل اکسل ذخیره شود
+FLUSH_EVERY = 50
+# حداکثر تعداد شابک‌هایی که هم‌زمان در حال جستجو هستند (1 = ترتیبی)
+MAX_WORKERS = 4
+# حداکثر درخواست در ثانیه به هر میزبان (None = بدون محدودیت)
+REQUESTS_PER_SECOND = 2.0
+# دفتر ثبت مرحله‌های هر شابک (crawl_journal): اجرای قطع‌شده از همان نقطه ادامه پیدا می‌کند.
+# نام نسبی کنار فایل اکسل ساخته می‌شود (نه در پوشه‌ی جاری) تا هر کتابخانه journal خودش را داشته باشد
+JOURNAL_FILE = "crawl_journal.sqlite"
+# جستجو-اول: نام، نویسنده، ناشر و سال از خود نتیجه‌ی جستجو برداشته می‌شوند و صفحه کتاب فقط وقتی
+# دریافت می‌شود که کلیدی از COLUMN_MAPPING (صفحات، مترجم، تصویر، ...) نه در نتیجه‌ی جستجو باشد
+# نه در سلول همان ردیف اکسل. False = مثل قبل برای هر شابک صفحه کتاب هم دریافت می‌شود
+SEARCH_FIRST = True
 
 
 def normalize_isbn(value):
-    if value is None:
-        return None
-    s = str(value).strip()
-    if not s:
-        return None
-    # حذف کاراکترهای غیرضروری مثل فاصله، خط تیره، و برخی کاراکترهای مخفی
-    s = s.replace(" ", "").replace("-", "").replace("\u202b", "").replace("\u202a", "")
-    return s
+    # فقط ارقام (فارسی/عربی هم لاتین می‌شوند)؛ فاصله، خط تیره و نویسه‌های مخفی جهت متن حذف می‌شوند
+    return clean_isbn(value) or None
+
+
+def journal_path(file_path, journal_file=JOURNAL_FILE):
+    """مسیر journal برای فایل اکسل file_path؛ مسیر کامل journal_file همان‌طور استفاده می‌شود."""
+    if os.path.isabs(journal_file):
+        return journal_file
+    return os.path.join(os.path.dirname(os.path.abspath(file_path)), journal_file)
+
+
+def lookup_isbn(crawler, isbn, journal=None, required=None):
+    """
+    جستجو و خواندن صفحه‌ی یک شابک. هیچ استثنایی بیرون نمی‌دهد تا در نخ‌ها امن باشد.
+    required: کلیدهایی که لازم‌اند؛ اگر نتیجه‌ی جستجو همه را داشته باشد صفحه کتاب دریافت
+    نمی‌شود (None = همیشه دریافت می‌شود).
+    خروجی: (status, data) که status یکی از ok / not_found / invalid_result /
+    search_error / parse_error است. نتیجه‌ی هر مرحله در journal (اگر باشد) ثبت می‌شود.
+    """
+    status, data = _lookup(crawler, isbn, required)
+    if journal is not None:
+        if status in ("ok", "parse_error"):
+            journal.record(isbn, "searched")
+        if status == "ok":
+            journal.record(isbn, "parsed", detail=data)
+        elif status == "parse_error":
+            journal.error(isbn, "parsed", data)
+        else:
+            journal.error(isbn, "searched", f"{status}: {data}")
+    return status, data
+
+
+def _lookup(crawler, isbn, required=None):
+    try:
+        search_res = crawler.find_book_page(isbn)
+    except Exception as e:
+        return "search_error", e
+
+    if not search_res:
+        return "not_found", None
+
+    if not isinstance(search_res, dict) or "url" not in search_res:
+        return "invalid_result", search_res
+
+    if not crawler.needs_page(search_res, required):
+        return "ok", search_res
+
+    # از صفحه فقط کلیدهایی لازم است که نتیجه‌ی جستجو نداشت
+    if required is not None:
+        required = [key for key in required if not search_res.get(key)]
+    try:
+        details = crawler.parse_book_page(search_res["url"], required)
+    except Exception as e:
+        return "parse_error", e
+
+    return "ok", {**search_res, **(details or {})}
+
+
+def iter_lookups(crawler, jobs, max_workers=1, journal=None, states=None):
+    """
+    jobs: لیست (row, code, isbn, required). نتیجه‌ها دقیقاً به ترتیب jobs برگردانده می‌شوند،
+    حتی اگر درخواست‌ها به صورت هم‌زمان (حداکثر max_workers در جریان) اجرا شوند. کارها در یک
+    پنجره‌ی محدود ارسال می‌شوند تا با Ctrl-C یا خطا فقط همان چند جستجوی در جریان تمام شوند.
+    شابکی که طبق states قبلاً استخراج شده بدون درخواست از journal برمی‌گردد.
+    """
+    states = states or {}
+
+    def lookup(isbn, required):
+        saved = CrawlJournal.parsed(states.get(isbn))
+        if saved is not None:
+            return "ok", saved
+        return lookup_isbn(crawler, isbn, journal, required)
+
+    if max_workers <= 1:
+        for job in jobs:
+            yield job, lookup(*job[2:])
+        return
+
+    yield from ordered_map(lambda job: lookup(*job[2:]), jobs, max_workers)
 
 
-def run_process(file_path):
-    crawler = GisoomCrawler()
+def run_process(file_path, flush_every=FLUSH_EVERY, max_workers=MAX_WORKERS,
+                requests_per_second=REQUESTS_PER_SECOND, base_url=BASE_URL,
+                journal_file=JOURNAL_FILE, shard=None, restart=False, search_first=SEARCH_FIRST):
+    """
+    shard: '2/4' یعنی فقط سهم دوم از چهار پردازه جستجو می‌شود و نتیجه فقط در journal
+    می‌ماند (بدون نوشتن در اکسل)؛ اجرای بعدی بدون shard همه را از journal می‌نویسد.
+    restart: وضعیت قبلی journal فراموش می‌شود.
+    """
+    crawler = GisoomCrawler(base_url=base_url,
+                            requests_per_second=requests_per_second,
+                            pool_size=max(10, max_workers))
+    journal = CrawlJournal(journal_path(file_path, journal_file), "gisoom")
+    if restart:
+        journal.reset()
+    row_isbns = {}   # ردیف -> شابک، برای ثبت written بعد از هر ذخیره
 
+    # یک بار باز کردن فایل برای خواندن و نوشتن همه ردیف‌ها
+    writer = ExcelBatchWriter(
+        file_path, flush_every=flush_every,
+        on_flush=lambda rows: [journal.record(row_isbns[r], "written") for r in rows if r in row_isbns])
     try:
-        wb = openpyxl.load_workbook(file_path)
+        writer.open()
     except FileNotFoundError:
         print(f"❌ فایل اکسل پیدا نشد: {file_path}")
         return
@@ -26,7 +133,20 @@ def run_process(file_path):
         print(f"❌ خطا در باز کردن فایل اکسل: {e}")
         return
 
-    ws = wb.active
+    try:
+        with writer:
+            _process_rows(crawler, writer, max_workers, journal, parse_shard(shard), row_isbns, search_first)
+    finally:
+        print(f"وضعیت journal (موفق، ناموفق): {journal.summary()}")
+        journal.close()
+
+
+def _process_rows(crawler, writer, max_workers=1, journal=None, shard=(0, 1), row_isbns=None,
+                  search_first=False):
+    ws = writer.ws
+    states = journal.states() if journal else {}
+    write = shard[1] == 1
+    row_isbns = {} if row_isbns is None else row_isbns
 
     # پیدا کردن ستون‌ها از روی نام
     col_map = {cell.value: cell.column for cell in ws[1]}
@@ -47,7 +167,10 @@ def run_process(file_path):
     success = 0
     not_found = 0
     invalid_isbn = 0
+    resumed = 0
 
+    # 1) جمع‌آوری ردیف‌هایی که باید جستجو شوند
+    jobs = []
     for row in range(2, ws.max_row + 1):
         code = ws.cell(row=row, column=code_col).value if code_col else None
         raw_isbn = ws.cell(row=row, column=isbn_col).value
@@ -58,52 +181,76 @@ def run_process(file_path):
             print(f"⚠️ ردیف {row} | کد={code} | شابک خالی یا نامعتبر است: {raw_isbn!r}")
             continue
 
+        if not in_shard(isbn, *shard):
+            continue
+        # کاری که طبق journal کامل شده (یا در این پردازه‌ی shard نوشته نمی‌شود) تکرار نمی‌شود
+        state = states.get(isbn)
+        if CrawlJournal.done(state, "written") or (not write and CrawlJournal.done(state, "parsed")):
+            resumed += 1
+            continue
+
+        # کلیدهایی که ستونشان در این ردیف خالی است (فقط همین‌ها دلیل دریافت صفحه کتاب‌اند)
+        required = None
+        if search_first:
+            required = [key for col, key in COLUMN_MAPPING.items()
+                        if col in col_map and not ws.cell(row=row, column=col_map[col]).value]
+        jobs.append((row, code, isbn, required))
+
+    print(f"ℹ️ {len(jobs)} شابک برای جستجو | {resumed} شابک طبق journal قبلاً انجام شده | "
+          f"نخ‌های هم‌زمان = {max_workers}")
+    if not write:
+        print(f"ℹ️ پردازه‌ی {shard[0] + 1} از {shard[1]}: فقط جستجو و ثبت در journal")
+
+    # 2) جستجو (ترتیبی یا هم‌زمان) و نوشتن نتیجه‌ها به ترتیب ردیف
+    for (row, code, isbn, _), (status, data) in iter_lookups(crawler, jobs, max_workers, journal, states):
         total += 1
-        print(f"\n🔎 ردیف {row} | کد={code} | در حال جستجو برای ISBN: {isbn}")
+        print(f"\n🔎 ردیف {row} | کد={code} | ISBN: {isbn}")
 
-        try:
-            search_res = crawler.find_book_page(isbn)
-        except Exception as e:
-            print(f"❌ ردیف {row} | کد={code} | خطا در find_book_page برای ISBN={isbn}: {e}")
+        if status == "search_error":
+            print(f"❌ ردیف {row} | کد={code} | خطا در find_book_page برای ISBN={isbn}: {data}")
             continue
 
-        if not search_res:
+        if status == "not_found":
             not_found += 1
             print(f"❌ ردیف {row} | کد={code} | ISBN={isbn} | در گیسوم نتیجه‌ای پیدا نشد.")
             continue
 
-        if not isinstance(search_res, dict) or "url" not in search_res:
+        if status == "invalid_result":
             not_found += 1
-            print(f"❌ ردیف {row} | کد={code} | ISBN={isbn} | خروجی find_book_page نامعتبر است: {search_res}")
+            print(f"❌ ردیف {row} | کد={code} | ISBN={isbn} | خروجی find_book_page نامعتبر است: {data}")
             continue
 
-        try:
-            details = crawler.parse_book_page(search_res["url"])
-        except Exception as e:
-            print(f"❌ ردیف {row} | کد={code} | ISBN={isbn} | خطا در parse_book_page: {e}")
+        if status == "parse_error":
+            print(f"❌ ردیف {row} | کد={code} | ISBN={isbn} | خطا در parse_book_page: {data}")
             continue
 
-        if details is None:
-            details = {}
-
-        final_data = {**search_res, **details}
+        if not write:
+            success += 1
+            continue
 
         try:
-            update_excel(file_path, row, final_data)
+            row_isbns[row] = isbn
+            writer.update(row, data)
             success += 1
-            print(f"✅ ردیف {row} | کد={code} | ISBN={isbn} | اطلاعات ذخیره شد.")
+            print(f"✅ ردیف {row} | کد={code} | ISBN={isbn} | اطلاعات ثبت شد.")
         except Exception as e:
             print(f"❌ ردیف {row} | کد={code} | ISBN={isbn} | خطا در update_excel: {e}")
 
-    
-
     print("\n==================== خلاصه ====================")
     print(f"کل ISBNهای پردازش‌شده: {total}")
     print(f"موفق: {success}")
     print(f"پیدا نشد: {not_found}")
     print(f"شابک نامعتبر/خالی: {invalid_isbn}")
+    stats = crawler.stats
+    print(f"درخواست جستجو: {stats['searches']} | دریافت صفحه کتاب: {stats['pages']} | "
+          f"صفحه‌های دریافت‌نشده (نتیجه‌ی جستجو کافی بود): {stats['pages_avoided']}")
+    print(f"parse صفحه کتاب: {crawler.paths.summary()}")
     print("================================================")
 
 
 if __name__ == "__main__":
-    run_process(r"d:\python\Parsa Books\Gisoom\Parsa Library.xlsx")
+    parser = argparse.ArgumentParser(description="خزنده‌ی گیسوم")
+    parser.add_argument("--shard", help="مثلاً 2/4: فقط سهم دوم از چهار پردازه (بدون نوشتن در اکسل)")
+    parser.add_argument("--restart", action="store_true", help="شروع از اول و نادیده گرفتن journal قبلی")
+    args = parser.parse_args()
+    run_process(r"d:\python\Parsa Books\Gisoom\Parsa Library.xlsx", shard=args.shard, restart=args.restart)
@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+"""
+مقایسه‌ی قالب داده‌ی کتاب‌ها: فهرست dict قبلی در برابر قالب ستونی catalog_codec.
+روی کتابخانه‌ی واقعی (Parsa Library.xlsx) و یک کاتالوگ مصنوعی (پیش‌فرض 50,000 کتاب):
+- اندازه‌ی JSON خام و gzip
+- زمان ساخت JSON در پایتون
+- زمان JSON.parse (+ decodeBooks برای قالب ستونی) در مرورگر headless یا node
+  (هر دو V8)؛ خروجی decode باید دقیقاً همان فهرست قبلی باشد
+
+    python bench_catalog.py            # 50,000 کتاب مصنوعی
+    python bench_catalog.py 20000
+"""
+import gzip
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import time
+
+import excel_ingest
+from bench_generate import load_generator, synthetic_sheet
+from bench_grid import OUT_DIR, find_chrome, run_headless
+
+ROUNDS = 20
+
+BENCH_JS = r'''
+__DECODE_BOOKS__
+
+function benchCatalog(rowsText, colsText, rounds) {
+    const time = fn => {
+        const times = [];
+        let out;
+        for (let r = 0; r < rounds; r++) {
+            const start = performance.now();
+            out = fn();
+            times.push(performance.now() - start);
+        }
+        times.sort((a, b) => a - b);
+        return [out, +times[times.length >> 1].toFixed(3)];
+    };
+    const [rows, rowsMs] = time(() => JSON.parse(rowsText));
+    const [cols, colsMs] = time(() => decodeBooks(JSON.parse(colsText)));
+    const [, parseOnlyMs] = time(() => JSON.parse(colsText));
+    return {
+        books: rows.length, rows_ms: rowsMs, columnar_ms: colsMs, columnar_parse_only_ms: parseOnlyMs,
+        same_books: JSON.stringify(rows) === JSON.stringify(cols),
+    };
+}
+'''
+
+PAGE = '''<!DOCTYPE html><html><body><pre id="bench-result"></pre>
+<script id="rows" type="application/json">__ROWS__</script>
+<script id="cols" type="application/json">__COLS__</script>
+<script>
+__BENCH_JS__
+document.getElementById('bench-result').textContent = JSON.stringify(benchCatalog(
+    document.getElementById('rows').textContent, document.getElementById('cols').textContent, __ROUNDS__));
+</script></body></html>
+'''
+
+NODE = '''
+const fs = require('fs');
+__BENCH_JS__
+console.log(JSON.stringify(benchCatalog(fs.readFileSync(process.argv[2], 'utf8'),
+                                        fs.readFileSync(process.argv[3], 'utf8'), __ROUNDS__)));
+'''
+
+
+def decode_books_source(gen):
+    m = re.search(r'^function decodeBooks\(.*?^}$', gen.HTML_TEMPLATE, re.S | re.M)
+    return m.group()
+
+
+def encoded(gen, books, columnar):
+    gen.COLUMNAR_CATALOG = columnar
+    start = time.perf_counter()
+    text = gen.encode_books(books)
+    return text, time.perf_counter() - start
+
+
+def compare(gen, label, books, chrome, node):
+    rows, t_rows = encoded(gen, books, False)
+    cols, t_cols = encoded(gen, books, True)
+    print(f"{label}: {len(books):,} کتاب")
+    for name, text, t in (('dict', rows, t_rows), ('ستونی', cols, t_cols)):
+        raw = text.encode('utf-8')
+        print(f"  {name:6} خام {len(raw) / 1e3:10,.1f} KB | gzip {len(gzip.compress(raw, 9)) / 1e3:9,.1f} KB"
+              f" | ساخت {t * 1e3:7.1f} ms")
+
+    js = BENCH_JS.replace('__DECODE_BOOKS__', decode_books_source(gen))
+    stem = os.path.join(OUT_DIR, f"bench_catalog_{len(books)}")
+    if chrome:
+        page = (PAGE.replace('__BENCH_JS__', js).replace('__ROUNDS__', str(ROUNDS))
+                .replace('__ROWS__', rows).replace('__COLS__', cols))
+        with open(stem + '.html', 'w', encoding='utf-8') as f:
+            f.write(page)
+        print('  chrome', json.dumps(run_headless(chrome, stem + '.html')))
+    elif node:
+        for suffix, text in (('.rows.json', rows), ('.cols.json', cols)):
+            with open(stem + suffix, 'w', encoding='utf-8') as f:
+                f.write(text)
+        with open(stem + '.js', 'w', encoding='utf-8') as f:
+            f.write(NODE.replace('__BENCH_JS__', js).replace('__ROUNDS__', str(ROUNDS)))
+        out = subprocess.run([node, stem + '.js', stem + '.rows.json', stem + '.cols.json'],
+                             capture_output=True, text=True)
+        print('  node', out.stdout.strip() or out.stderr.strip())
+    else:
+        print("  Chrome یا node پیدا نشد؛ زمان parse اندازه‌گیری نشد.")
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    gen = load_generator()
+    chrome, node = find_chrome(), shutil.which('node')
+    os.makedirs(OUT_DIR, exist_ok=True)
+
+    if os.path.exists(gen.EXCEL_FILE):
+        df = excel_ingest.read_columns(gen.EXCEL_FILE, gen.SHEET_NAME, gen.WANTED_COLUMNS)
+        compare(gen, 'کتابخانه', gen.build_books(df), chrome, node)
+    compare(gen, 'مصنوعی', gen.build_books(synthetic_sheet(n)), chrome, node)
+
+
+if __name__ == "__main__":
+    main()
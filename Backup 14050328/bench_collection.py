@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+"""
+بنچمارک و مجموعه‌ی آزمون collection_number.
+- CORPUS: عنوان اصلی و عنوان فرعی واقعی کتابخانه (همان‌طور که ایران‌کتاب می‌دهد) با شماره‌ی
+  جلدی که در ستون «شماره در مجموعه» اکسل ثبت شده است. شماره‌هایی که دستی وارد شده‌اند و در
+  هیچ‌کدام از دو عنوان نیستند کنار گذاشته شده‌اند
+- EXTRA: نمونه‌های توضیحات الگوهای خزنده (پرانتز، جداکننده، دو نقطه)
+- دقت و زمان: detect_collection_number قبلی داخل extract_details_from_div در برابر
+  collection_number.collection_number
+
+    python bench_collection.py            # 200,000 بار
+    python bench_collection.py 50000
+"""
+import re
+import sys
+import time
+
+from collection_number import collection_number, match
+from persian_text import to_ascii_digits
+
+CORPUS = [
+    # (عنوان اصلی، عنوان فرعی، شماره‌ی مورد انتظار)
+    ('راز داورهای خواب آلود', 'ته جدولی ها 1', '1'),
+    ('راز هفت گل به خودی', 'ته جدولی ها 2', '2'),
+    ('راز بارش شهابی', 'ته جدولی\u200cها 9', '9'),
+    ('باران آتش', 'هفت نشانه 1', '1'),
+    ('قتل عام', 'هفت نشانه 2', '2'),
+    ('سرکار هاپو', 'سرکار هاپو 1', '1'),
+    ('بازگشت سرکار هاپو', 'سرکار هاپو 2', '2'),
+    ('اژدهای زمین', 'استاد اژدها 1', '1'),
+    ('اژدهای خورشید', 'استاد اژدها 2', '2'),
+    ('خانه درختی 13 طبقه', 'خانه\u200cدرختی 1', '1'),
+    ('خانه درختی 26 طبقه', 'خانه\u200cدرختی 2', '2'),
+    ('خانه درختی 169طبقه', 'داستان\u200cهای خانه درختی 13', '13'),
+    ('یک دستیار همه فن حریف', 'کارآگاه سیتو و دستیارش چین می ادو 1', '1'),
+    ('مهمان ناخوانده', 'کارآگاه سیتو و دستیارش چین می ادو 3', '3'),
+    ('ماجرای خانواده ی بالبوئنا در غرب وحشی', 'مسافران زمان 1', '1'),
+    ('ماجرای خانواده ی بالبوئنا و آخرین شوالیه', 'مسافران زمان 2', '2'),
+    ('اسارت', 'نگهبانان گاهول 1', '1'),
+    ('سفر', 'نگهبانان گاهول 2', '2'),
+    ('تولد یک قهرمان', 'ایلیا 5', '5'),
+    ('تولد یک قهرمان', 'ایلیا 6 و ۷', '6 و 7'),
+    ('تولد یک قهرمان', 'ایلیا 8 و ۹', '8 و 9'),
+    ('تولد یک قهرمان', 'ایلیا 11-10', '10 و 11'),
+    ('تولد یک قهرمان', 'ایلیا 12', '12'),
+    ('ایلیا: جادوی سرخ', 'مجموعه داستان مصور دنباله دار 20', '20'),
+    ('ایلیا: جادوی سرخ', 'مجموعه داستان مصور دنباله دار 21', '21'),
+    ('ایلیا: جادوی سرخ', 'داستان مصور دنباله\u200cدار 23', '23'),
+    ('دنیای معرکه تام گیتس', 'تام گیتس 1', '1'),
+    ('بهانه های عالی (و چیزهای خوب دیگر)', 'تام گیتس 2', '2'),
+    ('شاید سیب باشد', 'فیلسوف کوچک 1', '1'),
+    ('چرا من این احساس را دارم؟', 'فیلسوف کوچک 3', '3'),
+    ('خانه ی سنگی', 'گورکن و راسو', ''),
+    ('دایناسور در مرغدانی', 'گورکن و راسو', ''),
+    ('بیگ نیت: اعجوبه کلاس', 'بیگ نیت، دردسرساز تمام عیار 1', '1'),
+    ('بیگ نیت: روی دور شانس', 'بیگ نیت، دردسرساز تمام عیار 3', '3'),
+    ('یه سر و دو گوش در تخت جمشید', 'کارآگاه سیتو در ایران 1', '1'),
+    ('دلفین های جزیره غیب می شوند', 'کارآگاه سیتو در ایران 2', '2'),
+    ('من آلبرت اینشتین هستم!', 'آدم های معمولی دنیا را تغییر می دهند', ''),
+    ('من هلن کلر هستم!', 'آدم های معمولی دنیا را تغییر می دهند', ''),
+    ('این منم محمدعلی کلی', 'آدم های معمولی جهان را تغییر می دهند!', ''),
+    ('سیگارهای فرعون', 'ماجراهای تن تن 4', '4'),
+    ('گنج راکام سرخ پوش', 'ماجراهای تن تن 12', '12'),
+    ('داستان\u200cهای شاهنامه 1', '', '1'),
+    ('داستان\u200cهای شاهنامه 2', '', '2'),
+    ('دیوید کاپرفیلد', 'شاهکارهای چارلز دیکنز', ''),
+    ('آرزوهای بزرگ', 'شاهکارهای چارلز دیکنز', ''),
+    ('ماکاموشی، موش و گربه در خانه ی اشباح', 'جزیره ی جوندگان جسور 2', '2'),
+    ('ماکاموشی، اسم من استیلتن است', 'جرونیمو استیلتن! ، جزیره ی جوندگان جسور 4', '4'),
+    ('ماکاموشی، چهار موش در اعماق جنگل تله موش', 'جزیره ی جوندگان جسور 6', '6'),
+    ('احترام', 'شهامت انصاف و همدلی با دیگران\n(مهارتهای زندگی 1)', '1'),
+    ('بخشش', 'آرامشی برای قلب کوچکت\n(مهارتهای زندگی 4)', '4'),
+    ('تاثیرپذیری', 'خودت باش! (مهارتهای زندگی 5)', '5'),
+    ('خدا دوست من است', 'راهنمایی برای ارتباط کودکان با خدا\n(مهارتهای زندگی 7)', '7'),
+    ('من نمی ترسم', 'راهنمایی،برای دور کردن ترس های کودکان و بالا بردن اعتماد به نفس آن ها\n(مهارتهای زندگی 9)', '9'),
+    ('نوزاد جدید در راه است', 'راهنمایی برای خواهر و برادر بزرگتر\n(مهارتهای زندگی 10)', '10'),
+    ('نامه های فلیکس', 'قصه های فلیکس 1 (خرگوش کوچولو به سفر دور دنیا می رود)', '1'),
+    ('فلیکس به کشف کره ی زمین می رود', 'قصه های فلیکس 2', '2'),
+    ('فلیکس به سیرک می رود', 'قصه های فلیکس 3', '3'),
+    ('فلیکس و جشن تولد بچه های دنیا', 'قصه های فلیکس12', '12'),
+    ('موشبان ها 1', '(پاییز 1152: گم شده)', '1'),
+    ('موشبان ها 2', '(پاییز 1152: ایستگاه کالوگرو)', '2'),
+    ('موشبان ها 7', '(پاییز 1152)', '7'),
+    ('جادو ممنوع', 'جادوهای همیشگی 1', '1'),
+    ('اتفاقات کم اهمیت', 'زندگی یک کاکتوس', ''),
+    ('بوفی در مسیر خانه', 'جلد 1', '1'),
+    ('جنگاوران خونیرث (1)', 'مجموعه داستان مصور دنباله دار', '1'),
+    ('یونا (1)', 'مبارزه دژ سبز', '1'),
+    ('دنیای علی (1)', 'کودکی و نوجوانی', '1'),
+    ('لامایونایتد 1', '', '1'),
+    ('خوره\u200cهای ریاضی کارآگاه می شوند 1', 'پرونده ی الماس گم شده', '1'),
+    ('تو حرف نداری!', 'یا چطور می توانیم در (تقریبا) همه چیزعالی باشیم', ''),
+    ('این کتاب برایت ضرر دارد', 'کتاب سوم از مجموعه «راز»', ''),
+    ('خاطرات یک بچه ی چلمن 1', '', '1'),
+    ('شکار هیولا برای مبتدیان (1)', '', '1'),
+    ('بلارت 1', 'پسری که حال نداشت قهرمان باشد', '1'),
+    ('پرسش های پسرانه درباره ی بلوغ', 'بدنت را بشناس و از آن مراقبت کن', ''),
+    ('زک کهکشانی 1', 'سلام نبولون', '1'),
+    ('کیک\u200cهای فضایی', 'داستان های نه چندان غیرممکن', ''),
+    ('پرونده های مختومه', 'پرونده ی اول : به دنبال مجرم', ''),
+    ('سریال چهار سابقه دار، قسمت ۱', 'یورش به زندان شهر سگی', '1'),
+    ('پنی قشقرق 3', 'ته آتیش پاره های دنیا', '3'),
+    ('چالش هوش(3)', 'سطح سخت', '3'),
+    ('باشگاه مغز + پلاس', 'تمرینات بیشتر برای فعال سازی توانمندی های مغزی', ''),
+    ('باشگاه مغز 1', 'کتاب آموزش و تمرین برای فعالسازی توانمندی های مغزی', '1'),
+    ('365 بازی و سرگرمی', 'هوش آزمایی،بازی های فکری،رمزگشایی،پازل کلمات،طراحی و نقاشی(برای دبستانی ها)', ''),
+    ('قصه های خوب برای بچه های خوب', 'قصه\u200cهای از گلستان و ملستان (جلد 7)', '7'),
+    ('علاءالدین و چراغ جادو', 'و 24 داستان دیگر', ''),
+    ('قصه\u200cهای عامیانه 1', '', '1'),
+    ('76 پرسش و پاسخ درباره ی اخلاق و رفتار', 'پرسش و پاسخ دینی با نسل نو 9', '9'),
+    ('104 پرسش درباره ی موضوعات گوناگون', 'پرسش و پاسخ دینی با نسل نو10', '10'),   # در اکسل خالی مانده بود,
+    ('چگونه شخص شخیصی باشیم؟', '65 راهکار خفن برای بچه آدم بودن', ''),
+    ('جزیره بی تربیت ها (1)', '', '1'),
+]
+
+EXTRA = [
+    ('کتاب ایلیا', 'ایلیا (11-10)', '10 و 11'),
+    ('اسارت', '(نگهبانان گاهول 3)', '3'),
+    ('باران آتش', 'هفت نشانه _ 4', '4'),
+    ('جادو ممنوع', 'جادوهای همیشگی : 2', '2'),
+    ('ته جدولی ها', 'ته جدولی ها ۱۲', '12'),
+    ('تولد یک قهرمان', 'ایلیا ۸ و ۹', '8 و 9'),
+    ('چای، بارون و ماهی اوزون\u200cبرون', 'چاپ 1399', ''),
+]
+
+
+def legacy_detect(text):
+    """detect_collection_number قبلی (الگوها در هر فراخوانی دوباره جستجو می‌شوند)"""
+    if not text: return ""
+    temp_text = to_ascii_digits(text.strip())
+    m_and = re.search(r"(\d+)\s*و\s*(\d+)", temp_text)
+    if m_and:
+        nums = sorted([int(m_and.group(1)), int(m_and.group(2))])
+        return f"{nums[0]} و {nums[1]}"
+    m_range = re.search(r"\((\d+)\s*-\s*(\d+)\)", temp_text)
+    if m_range:
+        nums = sorted([int(m_range.group(1)), int(m_range.group(2))])
+        return f"{nums[0]} و {nums[1]}"
+    m_paren = re.search(r"\((?:[^)]*?\s+)?(\d{1,3})\)", temp_text)
+    if m_paren: return m_paren.group(1)
+    m_sep = re.search(r"[_\-]\s*(\d{1,3})$", temp_text)
+    if m_sep: return m_sep.group(1)
+    m_colon = re.search(r":\s*(\d{1,3})", temp_text)
+    if m_colon: return m_colon.group(1)
+    m_trail = re.search(r"\s+(\d{1,3})$", temp_text)
+    if m_trail: return m_trail.group(1)
+    return ""
+
+
+def legacy(sub_title, main_title):
+    return legacy_detect(sub_title) or legacy_detect(main_title)
+
+
+def check(fn):
+    failures = []
+    for main_title, sub_title, expected in CORPUS + EXTRA:
+        got = fn(sub_title, main_title)
+        if got != expected:
+            failures.append(f"{sub_title!r} / {main_title!r}: {got!r}، انتظار {expected!r}")
+    return failures
+
+
+def timed(fn, items):
+    start = time.perf_counter()
+    for main_title, sub_title in items:
+        fn(sub_title, main_title)
+    return time.perf_counter() - start
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    total = len(CORPUS) + len(EXTRA)
+    for label, fn in (('قبلی', legacy), ('collection_number', collection_number)):
+        failures = check(fn)
+        print(f"{label}: {total - len(failures)}/{total} درست")
+        for f in failures:
+            print("  ✗", f)
+    rules = {}
+    for main_title, sub_title, _ in CORPUS:
+        name = match(sub_title)[0] or match(main_title)[0]
+        rules[name] = rules.get(name, 0) + 1
+    print(f"قانون‌های استفاده‌شده: {rules}")
+
+    items = [(m, s) for m, s, _ in CORPUS]
+    items = [items[i % len(items)] for i in range(n)]
+    t_old = timed(legacy, items)
+    t_new = timed(collection_number, items)
+    print(f"{n:,} عنوان: قبلی {t_old:6.3f} s | collection_number {t_new:6.3f} s ({t_old / t_new:.1f}x)")
+    sys.exit(1 if check(collection_number) else 0)
+
+
+if __name__ == "__main__":
+    main()
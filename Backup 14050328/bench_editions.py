@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""
+بنچمارک پیدا کردن div نسخه در صفحه‌های چندنسخه‌ای ایران‌کتاب (get_book_div_from_page).
+صفحه‌ها ساختگی‌اند ولی ساختار کارت‌ها مثل سایت است: div#p-XXXX و داخلش
+<span>شابک:</span><span>978-...</span> بین ردیف‌های دیگر اطلاعات.
+
+برای هر صفحه همه شابک‌هایش پیدا می‌شوند (مثل ردیف‌های یک مجموعه که به یک صفحه می‌رسند):
+- قبلی: برای هر شابک همه کارت‌ها با div.find(lambda ...) گشته می‌شوند
+- نقشه: build_edition_index یک بار برای صفحه، بعد هر شابک یک lookup
+
+    python bench_editions.py             # 5، 20 و 60 نسخه در صفحه
+    python bench_editions.py 10 100
+"""
+import re
+import sys
+import time
+
+from bench_parse import load_crawler
+
+FILLER_ROWS = 12
+
+
+def make_page(editions):
+    cards = []
+    for i in range(editions):
+        rows = "".join(f'<div class="flex gap-1"><span>ویژگی {j}:</span><span>مقدار {i}-{j}</span></div>'
+                       for j in range(FILLER_ROWS))
+        cards.append(
+            f'<div id="p-{30000 + i}" class="card"><h2>کتاب مجموعه {i + 1}</h2>'
+            f'<div class="flex gap-1"><span>کد کتاب:</span><span>{90000 + i}</span></div>{rows}'
+            f'<div class="flex gap-1"><span>شابک:</span><span>978-600-{i:07d}</span></div>'
+            f'<div class="price">{120000 + i}</div></div>')
+    isbns = [f"978600{i:07d}" for i in range(editions)]
+    return f"<html><body><div class='container'>{''.join(cards)}</div></body></html>", isbns
+
+
+def legacy_find(soup, isbn, normalize_isbn):
+    """جستجوی خطی قبلی get_book_div_from_page (بدون fragment و log)"""
+    candidates = soup.select('div[id^="p-"]')
+    clean_isbn = normalize_isbn(isbn)
+    for div in candidates:
+        isbn_span = div.find(lambda t: t.name in ["span", "div"] and isinstance(t.string, str) and "شابک" in t.string)
+        if isbn_span:
+            val = None
+            nxt = isbn_span.find_next_sibling()
+            if nxt and isinstance(nxt.get_text(strip=True), str) and nxt.get_text(strip=True):
+                val = nxt.get_text(strip=True)
+            else:
+                for s in isbn_span.parent.find_all("span"):
+                    txt = s.get_text(strip=True)
+                    if re.search(r"\d{9,13}", txt):
+                        val = txt
+                        break
+            if val and normalize_isbn(val) == clean_isbn:
+                return div
+    return None
+
+
+def main():
+    sizes = [int(a) for a in sys.argv[1:]] or [5, 20, 60]
+    bc = load_crawler()
+    bc.log = lambda msg: None
+    url = "https://www.iranketab.ir/book/1-series"
+    for editions in sizes:
+        html, isbns = make_page(editions)
+        soup = bc.parse_html(html)
+
+        start = time.perf_counter()
+        old = [legacy_find(soup, isbn, bc.normalize_isbn) for isbn in isbns]
+        t_old = time.perf_counter() - start
+
+        start = time.perf_counter()
+        index = bc.build_edition_index(soup)
+        new = [bc.get_book_div_from_page(url, soup, isbn, index) for isbn in isbns]
+        t_new = time.perf_counter() - start
+
+        same = all(a is b and a is not None for a, b in zip(old, new))
+        frag = bc.get_book_div_from_page(f"{url}#p-{30000 + editions - 1}", soup, "", index) is new[-1]
+        print(f"{editions:4} نسخه: قبلی {t_old * 1000:8.1f} ms | نقشه {t_new * 1000:7.1f} ms "
+              f"({t_old / t_new:5.1f}x) | نتیجه یکسان: {same} | fragment: {frag}")
+        if not (same and frag):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+"""
+بنچمارک استخراج اطلاعات کارت کتاب ایران‌کتاب (extract_details_from_div).
+صفحه‌ها ساختگی‌اند ولی ساختار مثل سایت است: منو و پانویس پر از لینک، کارت div#p-XXXX با
+عنوان، لینک‌های نویسنده/مترجم/ناشر و ردیف‌های <div class="flex gap-1"><span>..:</span><span>..</span>.
+
+- قبلی: بخش برچسب‌های نسخه‌ی قبلی (یک find(lambda ...) برای هر برچسب و read_kv_pairs روی هر
+  div.card/absolute/flex)
+- جدید: کل extract_details_from_div با یک پیمایش read_labels (عنوان، تصویر و قیمت هم حساب می‌شوند)
+ستون‌های مشترک دو روش باید یکسان باشند.
+
+    python bench_extract.py            # 200 صفحه، 20 ردیف اضافه در هر کارت
+    python bench_extract.py 500 40
+"""
+import re
+import sys
+import time
+
+from bench_parse import load_crawler
+
+LABEL_COLUMNS = ("سال انتشار شمسی", "سال انتشار میلادی", "نویسنده", "مترجم", "ناشر", "شابک", "صفحات")
+
+
+def row(label, value):
+    return f'<div class="flex gap-1"><span>{label}:</span><span>{value}</span></div>'
+
+
+def make_page(i, filler):
+    nav = "".join(f'<li><a href="/tag/{j}">دسته {j}</a></li>' for j in range(60))
+    translator = (f'<div class="flex gap-1"><span>مترجم:</span><a href="/profile/t{i}">مترجم {i}</a></div>'
+                  if i % 3 else "")
+    rows = "".join(row(f"ویژگی {j}", f"مقدار {i}-{j}") for j in range(filler))
+    card = (
+        f'<div id="p-{40000 + i}" class="card">'
+        f'<div class="flex"><img itemprop="image" src="/Images/ProductImages/{i}.jpg"></div>'
+        f'<h2>کتاب عنوان {i}</h2><div>زیرعنوان {i % 12 + 1}</div><div class="ltr">Title {i}</div>'
+        f'<div class="flex gap-1"><span>نویسنده:</span><a href="/profile/a{i}">نویسنده {i}</a></div>'
+        f'{translator}'
+        f'<div class="flex gap-1"><span>انتشارات:</span><a href="/publisher/{i % 40}">ناشر {i % 40}</a></div>'
+        f'<div class="absolute">{row("کد کتاب", 90000 + i)}{row("شابک", f"978-600-{i:07d}")}'
+        f'{row("تعداد صفحه", 100 + i % 400)}{row("سال انتشار شمسی", 1390 + i % 14)}'
+        f'{row("سال انتشار میلادی", 2011 + i % 14)}{rows}</div>'
+        f'<s class="price">{150000 + i * 10:,}</s><span class="toman">{120000 + i * 10:,}</span></div>')
+    footer = "".join(f'<a href="/book/{j}">کتاب مرتبط {j}</a>' for j in range(40))
+    return f"<html><body><ul>{nav}</ul><div class='container'>{card}</div><footer>{footer}</footer></body></html>"
+
+
+def legacy_labels(div, soup):
+    """بخش برچسب‌های extract_details_from_div قبلی"""
+    info = {}
+
+    def read_kv_pairs(block):
+        kv = {}
+        for r in block.select("div.flex.gap-1, div.flex.gap-2, div.flex.gap-3, div.flex.gap-4, div.flex.gap-0"):
+            spans = r.find_all("span")
+            if len(spans) >= 2:
+                kv[spans[0].get_text(strip=True).replace(":", "")] = spans[1].get_text(strip=True)
+        return kv
+
+    def get_val(cont, lbl):
+        t = cont.find(lambda x: x.name == "span" and lbl in x.get_text(strip=True))
+        return t.find_next_sibling("span").get_text(strip=True) if t and t.find_next_sibling("span") else ""
+
+    def find_lbl(d, l):
+        s = d.find(lambda t: t.name in ["span", "div"] and isinstance(t.string, str) and l in t.get_text())
+        if s:
+            a = s.find_next("a")
+            if a: return a.get_text(strip=True)
+            sib = s.find_next_sibling()
+            if sib: return sib.get_text(strip=True)
+        return ""
+
+    info["سال انتشار شمسی"] = get_val(div, "سال انتشار شمسی")
+    info["سال انتشار میلادی"] = get_val(div, "سال انتشار میلادی")
+    info["نویسنده"] = find_lbl(div, "نویسنده:")
+    info["مترجم"] = find_lbl(div, "مترجم:")
+    info["ناشر"] = find_lbl(div, "انتشارات:")
+    kv = {}
+    for block in div.select("div.card, div.absolute, div.flex"): kv.update(read_kv_pairs(block))
+    if not kv: kv.update(read_kv_pairs(div))
+    info.update(kv)
+    if "شابک" not in info:
+        isbn_span = div.find(lambda t: t.name in ["span", "div"] and isinstance(t.string, str) and "شابک" in t.get_text())
+        if isbn_span:
+            nxt = isbn_span.find_next_sibling()
+            if nxt: info["شابک"] = nxt.get_text(strip=True)
+    pages = ""
+    page_label = soup.find("span", string=re.compile("تعداد صفحه"))
+    if page_label and page_label.find_next_sibling("span"):
+        pages = page_label.find_next_sibling("span").get_text(strip=True)
+    info["صفحات"] = pages
+    return info
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    filler = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    bc = load_crawler()
+    bc.log = lambda msg: None
+    cards = []
+    for i in range(count):
+        soup = bc.parse_html(make_page(i, filler))
+        cards.append((soup.select_one('div[id^="p-"]'), soup, f"978600{i:07d}"))
+
+    start = time.perf_counter()
+    old = [legacy_labels(div, soup) for div, soup, _ in cards]
+    t_old = time.perf_counter() - start
+
+    start = time.perf_counter()
+    new = [bc.extract_details_from_div(div, soup, isbn) for div, soup, isbn in cards]
+    t_new = time.perf_counter() - start
+
+    diff = [(i, k, a.get(k), b.get(k)) for i, (a, b) in enumerate(zip(old, new))
+            for k in set(a) | set(LABEL_COLUMNS) if a.get(k) != b.get(k)]
+    print(f"{count} صفحه، {filler} ردیف اضافه در هر کارت")
+    print(f"  قبلی (فقط برچسب‌ها)  {t_old / count * 1000:7.3f} ms/صفحه")
+    print(f"  جدید (کل استخراج)    {t_new / count * 1000:7.3f} ms/صفحه  ({t_old / t_new:.1f}x)")
+    print(f"  ستون‌های متفاوت: {len(diff)}")
+    for d in diff[:10]:
+        print("   ", d)
+    if diff:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+"""
+بنچمارک ساخت رکوردهای کتاب در Generate HTML روی یک جدول مصنوعی.
+روش قبلی (df.iterrows + get_val برای هر سلول) با build_books مقایسه می‌شود
+و خروجی هر دو باید یکسان باشد.
+
+    python bench_generate.py            # 100,000 ردیف
+    python bench_generate.py 20000
+"""
+import importlib.util
+import os
+import random
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def load_generator():
+    spec = importlib.util.spec_from_file_location(
+        "generate_html", os.path.join(SCRIPT_DIR, "Generate HTML Ver2.1.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def synthetic_sheet(n, seed=1):
+    rnd = random.Random(seed)
+    statuses = ['خوانده شده', 'در حال خواندن', 'به زودی می‌خوانم', 'دوست نداشتم', '', 'Reading', 'yes']
+    publishers = ['هوپا', 'ققنوس', 'نشر چشمه', 'کتابسرای تندیس', 'افق']
+
+    def maybe(values, p_nan=0.2):
+        return [np.nan if rnd.random() < p_nan else v for v in values]
+
+    return pd.DataFrame({
+        'کد': range(1000, 1000 + n),
+        'شابک': maybe([f"978-600{rnd.randrange(10**6, 10**7)}" for _ in range(n)]),
+        'عنوان اصلی': maybe([f"کتاب نمونه {i}" for i in range(n)], 0.02),
+        'عنوان فرعی': maybe([f"مجموعه {i % 50} {i % 7}" for i in range(n)], 0.5),
+        'نویسنده': maybe([f"نویسنده {i % 900}" for i in range(n)]),
+        'مترجم': maybe([f"مترجم {i % 300}" for i in range(n)], 0.5),
+        'ناشر': maybe([rnd.choice(publishers) for _ in range(n)]),
+        'سال انتشار شمسی': maybe([float(rnd.randrange(1370, 1404)) for _ in range(n)]),
+        'سال انتشار میلادی': maybe([float(rnd.randrange(1990, 2025)) for _ in range(n)], 0.5),
+        'امتیاز': maybe([float(rnd.randrange(1, 11)) for _ in range(n)], 0.6),
+        'وضعیت': maybe([rnd.choice(statuses) for _ in range(n)]),
+        'iranketabImageName': maybe([f"{rnd.getrandbits(64):016x}.jpg" for _ in range(n)], 0.3),
+        'صفحات': maybe([float(rnd.randrange(40, 900)) for _ in range(n)]),
+    })
+
+
+def legacy_books(gen, df):
+    """پیاده‌سازی قبلی (ردیف به ردیف) فقط برای مقایسه."""
+    def get_val(row, keys):
+        for k in keys:
+            if k in row.index:
+                val = str(row[k])
+                if val and val.lower() != 'nan':
+                    return val.strip()
+        return ''
+
+    cols_map = gen.COLS_MAP
+    books = []
+    for _, row in df.iterrows():
+        title_main = get_val(row, cols_map['title_main'])
+        if not title_main:
+            continue
+        isbn = get_val(row, cols_map['isbn'])
+        cleaned_isbn = isbn.replace('-', '').replace(' ', '') if isbn else ''
+        iranketab_filename = get_val(row, cols_map['iranketab_img'])
+        if gen.IRANKETAB_IMAGE and iranketab_filename:
+            if iranketab_filename.lower().startswith(('http://', 'https://')):
+                final_image_path = iranketab_filename
+            else:
+                final_image_path = f"{gen.IRANKETAB_URL_PREFIX}/{iranketab_filename}"
+        else:
+            fname = f"{cleaned_isbn}.jpg" if cleaned_isbn else "default_cover.png"
+            final_image_path = gen.sanitize_url(f"{gen.IMAGE_BASE_PATH_LOCAL}/{fname}")
+
+        raw_status = get_val(row, cols_map['status']).lower()
+        if any(x in raw_status for x in ['خوانده شده', 'read', 'yes']):
+            status = 'خوانده شده'
+        elif any(x in raw_status for x in ['در حال خواندن', 'reading']):
+            status = 'در حال خواندن'
+        elif any(x in raw_status for x in ['دوست نداشتم', 'disliked', 'didnt like']):
+            status = 'دوست نداشتم'
+        elif any(x in raw_status for x in ['به زودی می‌خوانم', 'to read', 'soon']):
+            status = 'به زودی می‌خوانم'
+        else:
+            status = 'خوانده نشده'
+
+        def trimmed(key):
+            v = get_val(row, cols_map[key])
+            return v[:-2] if v.endswith('.0') else v
+
+        y_sh, y_gr = trimmed('year_shamsi'), trimmed('year_gregorian')
+        year_display = y_sh
+        if y_gr:
+            year_display += f" ({y_gr})" if y_sh else y_gr
+
+        books.append({
+            'title_main': title_main,
+            'title_sub': get_val(row, cols_map['title_sub']),
+            'author': get_val(row, cols_map['author']),
+            'translator': get_val(row, cols_map['translator']),
+            'publisher': get_val(row, cols_map['publisher']),
+            'year': year_display,
+            'status': status,
+            'score': trimmed('score'),
+            'image_path': final_image_path,
+            'isbn': cleaned_isbn,
+            'code': trimmed('code'),
+            'pages': trimmed('pages'),
+        })
+    return books
+
+
+def same_output(gen, old, new):
+    """فیلدهای مشترک یکسان باشند و کد وضعیت جدید همان برچسب قبلی را بدهد."""
+    labels = list(gen.STATUS_CLASSES)
+    if len(old) != len(new):
+        return False
+    for o, b in zip(old, new):
+        o = dict(o)
+        if labels[b['status_code']] != o.pop('status'):
+            return False
+        if any(b[k] != v for k, v in o.items()):
+            return False
+    return True
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    gen = load_generator()
+    df = synthetic_sheet(n)
+
+    start = time.perf_counter()
+    old = legacy_books(gen, df)
+    t_old = time.perf_counter() - start
+
+    start = time.perf_counter()
+    new = gen.build_books(df)
+    t_new = time.perf_counter() - start
+
+    print(f"{n:,} ردیف → {len(new):,} کتاب | خروجی یکسان: {same_output(gen, old, new)}")
+    print(f"iterrows:    {t_old:7.2f} s")
+    print(f"build_books: {t_new:7.2f} s")
+    print(f"بهبود: {t_old / t_new:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+"""
+بنچمارک رندر گرید صفحه کتابخانه روی یک کاتالوگ مصنوعی (پیش‌فرض 20,000 کتاب).
+دو صفحه ساخته می‌شود: رندر مجازی (VIRTUAL_GRID_MIN فعلی) و رندر کامل قبلی،
+و در هر دو یک اسکریپت زمان‌سنجی (بارگذاری اولیه، تایپ حرف به حرف یک عبارت و پاک کردنش،
+و اسکرول از بالا تا پایین) اجرا می‌شود. نتیجه داخل <pre id="bench-result"> نوشته می‌شود.
+
+اگر Chrome/Chromium پیدا شود (یا مسیرش در متغیر CHROME باشد) صفحه‌ها headless اجرا می‌شوند:
+
+    python bench_grid.py            # 20,000 کتاب
+    python bench_grid.py 5000
+"""
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+
+from bench_generate import load_generator, synthetic_sheet
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+OUT_DIR = os.path.join(SCRIPT_DIR, 'bench')
+
+BENCH_SCRIPT = r'''
+<pre id="bench-result"></pre>
+<script>
+(function () {
+    const timed = fn => {
+        const start = performance.now();
+        fn();
+        document.body.offsetHeight;   // layout هم جزو هزینه است
+        return performance.now() - start;
+    };
+    const summary = xs => ({ avg: +(xs.reduce((a, b) => a + b, 0) / xs.length).toFixed(2),
+                             max: +Math.max(...xs).toFixed(2) });
+    const r = { books: books.length, virtual: virtualOn };
+
+    r.initial_ms = +timed(apply).toFixed(2);
+    r.cards_in_dom = grid.querySelectorAll('.card').length;
+
+    const q = 'نمونه 12';
+    const keys = [];
+    for (let i = 1; i <= q.length; i++) keys.push(timed(() => { searchInput.value = q.slice(0, i); apply(); }));
+    keys.push(timed(() => { searchInput.value = ''; apply(); }));
+    r.keystroke_ms = summary(keys);
+
+    const maxY = document.documentElement.scrollHeight - window.innerHeight;
+    const steps = [];
+    for (let k = 0; k < 40; k++) {
+        steps.push(timed(() => { window.scrollTo(0, maxY * k / 39); if (virtualOn) drawWindow(); }));
+    }
+    r.scroll_step_ms = summary(steps);
+    r.dom_elements = document.getElementsByTagName('*').length;
+
+    document.getElementById('bench-result').textContent = JSON.stringify(r);
+})();
+</script>
+'''
+
+
+def write_page(gen, books, name, virtual_min):
+    html = gen.render_page(books, [], virtual_min=virtual_min)
+    html = html.replace('</body>', BENCH_SCRIPT + '</body>')
+    path = os.path.join(OUT_DIR, name)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(html)
+    return path
+
+
+def find_chrome():
+    candidates = [os.environ.get('CHROME'), 'google-chrome', 'chromium', 'chromium-browser',
+                  'chrome', 'chrome-headless-shell']
+    for c in candidates:
+        if c and shutil.which(c):
+            return shutil.which(c)
+    return None
+
+
+def run_headless(chrome, path):
+    out = subprocess.run(
+        [chrome, '--headless', '--no-sandbox', '--disable-gpu', '--window-size=1280,900',
+         '--dump-dom', 'file://' + path],
+        capture_output=True, text=True, encoding='utf-8', timeout=3600)
+    m = re.search(r'<pre id="bench-result">(.*?)</pre>', out.stdout, re.S)
+    return json.loads(m.group(1)) if m and m.group(1) else None
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    gen = load_generator()
+    books = gen.build_books(synthetic_sheet(n))
+    for b in books:
+        b['image_path'] = ''   # بدون شبکه: همه کارت‌ها کاور پیش‌فرض
+    os.makedirs(OUT_DIR, exist_ok=True)
+
+    virtual_min = gen.VIRTUAL_GRID_MIN if gen.VIRTUAL_GRID_MIN is not None else 300
+    pages = {
+        'virtual': write_page(gen, books, 'bench_grid_virtual.html', virtual_min),
+        'full': write_page(gen, books, 'bench_grid_full.html', None),
+    }
+    print(f"{len(books):,} کتاب")
+    for label, path in pages.items():
+        print(f"  {label:8s} {path}")
+
+    chrome = find_chrome()
+    if not chrome:
+        print("Chrome پیدا نشد؛ صفحه‌ها را در مرورگر باز کنید (یا CHROME=... تنظیم کنید).")
+        return
+    for label, path in pages.items():
+        result = run_headless(chrome, path)
+        print(f"{label:8s} {json.dumps(result, ensure_ascii=False)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""
+بنچمارک خواندن اکسل برای Generate HTML: زمان و حافظه‌ی اوج (tracemalloc، فقط حافظه‌ی پایتون).
+اگر مسیر فایل داده نشود یک کتابخانه‌ی مصنوعی با N ردیف و N تصویر جاسازی‌شده در ستون
+«تصویر» ساخته می‌شود (نیاز به Pillow).
+
+    python bench_ingest.py                 # 5000 ردیف مصنوعی
+    python bench_ingest.py 20000
+    python bench_ingest.py "Parsa Library.xlsx"
+"""
+import importlib.util
+import io
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+
+import excel_ingest
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def load_generator():
+    spec = importlib.util.spec_from_file_location(
+        "generate_html", os.path.join(SCRIPT_DIR, "Generate HTML Ver2.1.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def synthetic_workbook(n, path):
+    import openpyxl
+    from openpyxl.drawing.image import Image as XLImage
+    from PIL import Image
+
+    headers = ['کد', 'شابک', 'تصویر', 'عنوان اصلی', 'عنوان فرعی', 'امتیاز', 'وضعیت',
+               'خلاصه / نظر شخصی', 'صفحات', 'نویسنده', 'مترجم', 'ناشر',
+               'سال انتشار شمسی', 'سال انتشار میلادی', 'قیمت', 'iranketabImageName']
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = 'کتابخانه'
+    ws.append(headers)
+
+    cover = io.BytesIO()
+    Image.new('RGB', (150, 220), (200, 30, 30)).save(cover, 'JPEG', quality=85)
+    for i in range(n):
+        ws.append([1000 + i, f"978-600{i:07d}", None, f"کتاب نمونه {i}", f"مجموعه {i % 40}", i % 10,
+                   'خوانده شده', 'یادداشت شخصی طولانی ' * 20, 100 + i % 500, f"نویسنده {i % 700}",
+                   f"مترجم {i % 200}", 'هوپا', 1400, 2020, 250000, f"{i:032x}.jpg"])
+        img = XLImage(io.BytesIO(cover.getvalue()))
+        img.width, img.height = 40, 60
+        ws.add_image(img, f"C{i + 2}")
+    wb.save(path)
+
+
+def measure(label, fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    df = fn()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:28s} {elapsed:7.2f} s   peak {peak / 2**20:8.1f} MB   {df.shape[0]:,}×{df.shape[1]}")
+
+
+def main():
+    arg = sys.argv[1] if len(sys.argv) > 1 else "5000"
+    gen = load_generator()
+    tmp = None
+    if arg.isdigit():
+        tmp = tempfile.NamedTemporaryFile(suffix=".xlsx", delete=False)
+        tmp.close()
+        path = tmp.name
+        print(f"ساخت فایل مصنوعی با {int(arg):,} ردیف و تصویر ...")
+        synthetic_workbook(int(arg), path)
+    else:
+        path = arg
+    print(f"{path}: {os.path.getsize(path) / 2**20:.1f} MB")
+
+    try:
+        measure("pd.read_excel (قبلی)", lambda: pd.read_excel(path, sheet_name=gen.SHEET_NAME))
+        measure("read_columns / openpyxl",
+                lambda: excel_ingest.read_columns(path, gen.SHEET_NAME, gen.WANTED_COLUMNS, engine="openpyxl"))
+        if excel_ingest.ENGINE == "calamine":
+            measure("read_columns / calamine",
+                    lambda: excel_ingest.read_columns(path, gen.SHEET_NAME, gen.WANTED_COLUMNS, engine="calamine"))
+    finally:
+        if tmp:
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""
+شبیه‌سازی metadata_merge.Enricher: تعداد درخواست، ستون‌های پرشده و زمان برای
+- فقط ایران‌کتاب (خزنده‌ی قبلی)
+- همیشه هر دو منبع، پشت سر هم (اجرای جداگانه‌ی هر دو خزنده)
+- هر دو منبع هم‌زمان (parallel=True)
+- گیسوم فقط وقتی ستون اجباری کم است (پیش‌فرض)
+
+منبع‌ها ساختگی‌اند: هر ستون با احتمال COVERAGE در آن منبع پر است و هر درخواست LATENCY ثانیه
+طول می‌کشد (بذر ثابت، پس نتیجه‌ها تکرارپذیرند).
+
+    python bench_merge.py          # 200 شابک
+    python bench_merge.py 1000
+"""
+import random
+import sys
+import time
+
+from metadata_merge import GISOOM_COLUMNS, REQUIRED, Enricher, missing
+
+LATENCY = 0.002
+WORKERS = 4
+IRANKETAB_COLUMNS = ['عنوان اصلی', 'عنوان فرعی', 'نویسنده', 'مترجم', 'ناشر', 'صفحات',
+                     'سال انتشار شمسی', 'سال انتشار میلادی', 'قیمت', 'image_url']
+COVERAGE = {'iranketab': 0.85, 'gisoom': 0.9}
+FOUND = {'iranketab': 0.9, 'gisoom': 0.95}
+SAMPLE = {'صفحات': '320', 'سال انتشار شمسی': '1401', 'سال انتشار میلادی': '2022',
+          'image_url': 'https://example.com/c.jpg', 'pages': '320', 'year': '1401'}
+
+
+def make_sources(n):
+    rng = random.Random(14050328)
+    books = {}
+    for i in range(n):
+        isbn = f"978600{i:07d}"
+        ik = {c: SAMPLE.get(c, f"{c} {i}") for c in IRANKETAB_COLUMNS if rng.random() < COVERAGE['iranketab']}
+        gs = {k: SAMPLE.get(k, f"{k} {i}") for k in GISOOM_COLUMNS if rng.random() < COVERAGE['gisoom']}
+        books[isbn] = (ik if rng.random() < FOUND['iranketab'] else None,
+                       {'url': f"https://www.gisoom.com/book/{i}", **gs} if rng.random() < FOUND['gisoom'] else None)
+
+    def source(index):
+        def fetch(isbn, lacking):
+            time.sleep(LATENCY)
+            return books[isbn][index]
+        return fetch
+    return list(books), [('iranketab', source(0)), ('gisoom', source(1))]
+
+
+def run(isbns, sources, workers=WORKERS, **options):
+    enricher = Enricher(sources, log=lambda _: None, **options)
+    start = time.perf_counter()
+    rows = list(enricher.iter_enrich(isbns, workers))
+    elapsed = time.perf_counter() - start
+    filled = sum(len(merged) for merged, _, _ in rows)
+    complete = sum(1 for merged, _, _ in rows if merged and not missing(merged))
+    return sum(enricher.stats['calls'].values()), filled, complete, elapsed
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    isbns, sources = make_sources(n)
+    modes = [
+        ("فقط ایران‌کتاب", dict(sources=sources[:1])),
+        ("هر دو، پشت سر هم", dict(sources=sources, required=tuple(GISOOM_COLUMNS.values()) + REQUIRED)),
+        ("هر دو، هم‌زمان", dict(sources=sources, parallel=True)),
+        ("گیسوم فقط در صورت نیاز", dict(sources=sources)),
+    ]
+    print(f"{n} شابک، {WORKERS} شابک هم‌زمان، تأخیر هر درخواست {LATENCY * 1000:.0f} ms")
+    for label, options in modes:
+        requests, filled, complete, elapsed = run(isbns, **options)
+        print(f"  {label:24} درخواست {requests:5} | ستون پرشده {filled:6} | "
+              f"ردیف کامل {complete:5} | {elapsed:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+"""
+بنچمارک و مجموعه‌ی آزمون persian_text.
+- CORPUS: عنوان‌ها/نام‌های واقعی کتابخانه (همان‌طور که در اکسل ذخیره شده‌اند) و عبارتی که
+  کاربر ممکن است تایپ کند؛ بعد از search_key باید پیدا شوند (قبلاً با toLowerCase پیدا نمی‌شدند)
+- NUMBERS: شابک و اعداد صفحه‌ی خزنده‌ها
+- زمان: حلقه‌ی replace قبلی برای ارقام در برابر str.translate، و search_key روی عنوان‌ها
+
+    python bench_normalize.py            # 200,000 رشته
+    python bench_normalize.py 50000
+"""
+import sys
+import time
+
+import persian_text
+
+CORPUS = [
+    # (متن ذخیره‌شده، عبارت جستجو)
+    ('ته جدولی‌ها 9', 'ته جدولی ها 9'),
+    ('ته جدولی ها 10', 'ته جدولی‌ها ۱۰'),
+    ('ایلیا 6 و ۷', 'ایلیا 6 و 7'),
+    ('ایلیا 8 و ۹', '۸ و ۹'),
+    ('خانه‌درختی 156 طبقه', 'خانه درختی ۱۵۶'),
+    ('خانه درختی 13 طبقه', 'خانه‌درختی'),
+    ('نبرد ربات‌ها', 'نبرد ربات ها'),
+    ('نبرد ربات ها', 'نبرد ربات‌ها'),
+    ('داستان مصور دنباله‌دار 23', 'دنباله دار'),
+    ('ایده‌های خلاقانه (البته بیشترشان)', 'ايده هاي خلاقانه'),
+    ('کارآگاه سیتو در ایران 1', 'كارآگاه سيتو'),
+    ('کارآگاه سیتو و دستیارش چین می ادو 1', 'کاراگاه سیتو'),
+    ('ماجرای خانواده‌ی بالبوئنا در دنیای دایناسورها', 'خانواده ی بالبوئنا'),
+    ('ماجرای خانواده ی بالبوینا در کشتی دزدان دریایی', 'بالبوئنا'),
+    ('ماجرای خانواده ی بالبوئنا و آخرین شوالیه', 'بالبوینا'),
+    ('آنت لنگن', 'انت لنگن'),
+    ('آنیتا یارمحمدی', 'انیتا'),
+    ('محمد امین', 'مُحَمَّد امین'),
+    ('نقطه ی صفر', 'نقطه‌ی صفر'),
+    ('دردسر در کارخانه ی چترسازی', 'کارخانه‌ی چترسازی'),
+    ('زوزه ی وحش', 'زوزه‌ی'),
+    ('قصه های فلیکس 13', 'قصه‌های فلیکس ۱۳'),
+    ('مجموعه داستان مصور دنباله دار 22', 'دنباله‌دار ۲۲'),
+    ('کتاب چ', 'كتاب چ'),
+    ('جرونیمو استیلتن! ، جزیره ی جوندگان جسور 4', 'جزیره‌ی جوندگان جسور ٤'),
+    ('سید مهدی موسوی (1365)', 'موسوی (۱۳۶۵)'),
+    ('فلیکس ساعت چنده؟', 'فليكس ساعت'),
+    ('آدم های معمولی جهان را تغییر می دهند', 'آدم‌های معمولی'),
+    ('Harry Potter', 'harry POTTER'),
+]
+
+# عبارت‌هایی که نباید پیدا شوند (نرمال‌سازی نباید بیش از حد یکسان کند)
+NEGATIVE = [
+    ('ته جدولی ها 1', 'ته جدولی ها 2'),
+    ('تام گیتس 3', 'تام گیتس 4'),
+]
+
+NUMBERS = [
+    # (تابع، ورودی، خروجی مورد انتظار)
+    (persian_text.normalize_isbn, '978-6222040024', '9786222040024'),
+    (persian_text.normalize_isbn, '\u202d978-6227564600', '9786227564600'),
+    (persian_text.normalize_isbn, '۹۷۸-۶۰۰-۸۰۲۵-۵۳-۵', '9786008025535'),
+    (persian_text.normalize_isbn, 9786008869870.0, '9786008869870'),
+    (persian_text.normalize_isbn, '964-7100-16-x', '964710016X'),
+    (persian_text.normalize_isbn, None, ''),
+    (persian_text.digits_only, '۳۲۰ صفحه', '320'),
+    (persian_text.digits_only, '١٣٩٩', '1399'),
+    (persian_text.to_ascii_digits, 'ایلیا ۶ و ۷', 'ایلیا 6 و 7'),
+]
+
+
+def legacy_digits(text):
+    """حلقه‌ی قبلی detect_collection_number"""
+    replacements = {'۰': '0', '۱': '1', '۲': '2', '۳': '3', '۴': '4', '۵': '5', '۶': '6', '۷': '7', '۸': '8', '۹': '9'}
+    for k, v in replacements.items():
+        text = text.replace(k, v)
+    return text
+
+
+def check():
+    failures = []
+    for stored, query in CORPUS:
+        if persian_text.search_key(query) not in persian_text.search_key(stored):
+            failures.append(f"پیدا نشد: {query!r} در {stored!r}")
+    for stored, query in NEGATIVE:
+        if persian_text.search_key(query) in persian_text.search_key(stored):
+            failures.append(f"نباید پیدا شود: {query!r} در {stored!r}")
+    for fn, value, expected in NUMBERS:
+        got = fn(value)
+        if got != expected:
+            failures.append(f"{fn.__name__}({value!r}) = {got!r}، انتظار {expected!r}")
+    legacy_hits = sum(query.lower().strip() in stored.lower() for stored, query in CORPUS)
+    return failures, legacy_hits
+
+
+def timed(fn, items):
+    start = time.perf_counter()
+    for s in items:
+        fn(s)
+    return time.perf_counter() - start
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    failures, legacy_hits = check()
+    total = len(CORPUS) + len(NEGATIVE) + len(NUMBERS)
+    print(f"آزمون: {total - len(failures)}/{total} درست | جستجوی قبلی (toLowerCase): "
+          f"{legacy_hits}/{len(CORPUS)} پیدا شد")
+    for f in failures:
+        print("  ✗", f)
+
+    texts = [stored for stored, _ in CORPUS]
+    items = [texts[i % len(texts)] + f" {i}" for i in range(n)]
+    with_digits = [persian_text.to_ascii_digits(s).translate(str.maketrans('0123456789', '۰۱۲۳۴۵۶۷۸۹'))
+                   for s in items]
+    dict_table = str.maketrans(persian_text.SEARCH_CHARS)
+    print(f"{n:,} رشته")
+    for label, data in (('بدون رقم فارسی', items), ('با رقم فارسی', with_digits)):
+        t_old = timed(legacy_digits, data)
+        t_new = timed(persian_text.to_ascii_digits, data)
+        print(f"ارقام، {label}: replace {t_old:6.3f} s | translate {t_new:6.3f} s ({t_old / t_new:.1f}x)")
+    t_dict = timed(lambda s: s.translate(dict_table), with_digits)
+    t_key = timed(persian_text.search_key, with_digits)
+    print(f"search_key: {t_key:6.3f} s (فقط translate با جدول dict: {t_dict:6.3f} s)")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""
+بنچمارک parse صفحات کتاب ایران‌کتاب (قبل/بعد از parse یک‌باره).
+ورودی: پوشه‌ای از فایل‌های .html ذخیره‌شده یا فایل کش خزنده (iranketab_cache.sqlite).
+
+    python bench_parse.py                      # صفحات /book/ داخل کش
+    python bench_parse.py "saved pages" 5      # پوشه + تعداد تکرار
+"""
+import glob
+import importlib.util
+import os
+import sqlite3
+import sys
+import time
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def load_crawler():
+    spec = importlib.util.spec_from_file_location(
+        "book_crawler", os.path.join(SCRIPT_DIR, "Book_Crowler Ver2.4.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def load_pages(source):
+    """لیست (url, html) از یک پوشه یا فایل کش."""
+    if os.path.isdir(source):
+        pages = []
+        for path in sorted(glob.glob(os.path.join(source, "*.html"))):
+            with open(path, encoding="utf-8") as f:
+                pages.append((os.path.basename(path), f.read()))
+        return pages
+    conn = sqlite3.connect(source)
+    rows = conn.execute(
+        "SELECT final_url, body FROM responses WHERE final_url LIKE '%/book/%'").fetchall()
+    conn.close()
+    return [(url, body.decode("utf-8")) for url, body in rows]
+
+
+def run(bc, pages, repeat, parse_count, parser):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for url, html in pages:
+            soup = None
+            for _ in range(parse_count):
+                soup = bc.BeautifulSoup(html, parser)
+            div = bc.get_book_div_from_page(url, soup, "")
+            bc.extract_details_from_div(div, soup, "")
+    return (time.perf_counter() - start) / (repeat * len(pages))
+
+
+def main():
+    source = sys.argv[1] if len(sys.argv) > 1 else os.path.join(SCRIPT_DIR, "iranketab_cache.sqlite")
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+
+    bc = load_crawler()
+    bc.log = lambda msg: None
+    pages = load_pages(source)
+    if not pages:
+        raise SystemExit(f"❌ هیچ صفحه‌ای در {source} پیدا نشد.")
+
+    before = run(bc, pages, repeat, 2, "html.parser")
+    after = run(bc, pages, repeat, 1, bc.PARSER)
+    print(f"{len(pages)} صفحه × {repeat} تکرار")
+    print(f"قبل  (۲ بار html.parser): {before * 1000:8.2f} ms/کتاب")
+    print(f"بعد  (۱ بار {bc.PARSER}): {after * 1000:8.2f} ms/کتاب")
+    print(f"بهبود: {before / after:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+"""
+شبیه‌سازی politeness.PolitenessScheduler در برابر یک سرور محلی که نرخ را محدود می‌کند.
+سرور (127.0.0.1) حداکثر LIMIT درخواست در ثانیه می‌پذیرد و بیشتر از آن را با 429 و
+Retry-After: 1 رد می‌کند؛ در بازه‌ی OUTAGE ثانیه‌ها هم همه را با 503 و Retry-After: 2 جواب می‌دهد.
+
+خروجی:
+- زمان کل و نرخ نهایی در برابر sleep ثابت قبلی (میانگین DELAY_RANGE قبل از هر درخواست)
+- تعداد 429/503 و اینکه هیچ درخواستی قبل از پایان Retry-After به سرور نرسیده باشد
+
+    python bench_politeness.py          # 60 درخواست
+    python bench_politeness.py 120
+"""
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from politeness import THROTTLE_STATUSES, PolitenessScheduler
+
+LIMIT = 5.0                  # درخواست در ثانیه که سرور می‌پذیرد
+OUTAGE = (6.0, 7.0)          # ثانیه‌ها از شروع که سرور 503 می‌دهد
+LEGACY_DELAY = (0.8 + 2.0) / 2
+RETRIES = 3
+
+
+class StubServer:
+    def __init__(self):
+        self.start = time.monotonic()
+        self.tokens = LIMIT
+        self.last = self.start
+        self.blocked_until = 0.0
+        self.log = []            # (زمان، کد، درخواست زودتر از Retry-After)
+        self.lock = threading.Lock()
+
+    def decide(self):
+        with self.lock:
+            now = time.monotonic()
+            early = now < self.blocked_until
+            self.tokens = min(LIMIT, self.tokens + (now - self.last) * LIMIT)
+            self.last = now
+            t = now - self.start
+            if OUTAGE[0] <= t < OUTAGE[1]:
+                status, retry = 503, 2
+            elif self.tokens < 1:
+                status, retry = 429, 1
+            else:
+                self.tokens -= 1
+                status, retry = 200, None
+            if retry:
+                self.blocked_until = max(self.blocked_until, now + retry)
+            self.log.append((t, status, early))
+            return status, retry
+
+
+def serve(stub):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            status, retry = stub.decide()
+            body = b'ok'
+            self.send_response(status)
+            if retry:
+                self.send_header('Retry-After', str(retry))
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 60
+    stub = StubServer()
+    server = serve(stub)
+    base = f"http://127.0.0.1:{server.server_port}"
+    # مثل خزنده: نرخ شروع 0.7 (حدود همان sleep قبلی)، سقف بالاتر از توان سرور تا کاهش نرخ دیده شود
+    scheduler = PolitenessScheduler(rate=0.7, min_rate=0.2, max_rate=8.0, increase=0.5)
+    session = requests.Session()
+
+    start = time.monotonic()
+    ok = failed = 0
+    for i in range(n):
+        url = f"{base}/book/{i}"
+        for attempt in range(RETRIES + 1):
+            scheduler.wait(url)
+            r = session.get(url, timeout=10)
+            scheduler.feedback(url, r.status_code, r.elapsed.total_seconds(), r.headers.get('Retry-After'))
+            if r.status_code not in THROTTLE_STATUSES:
+                break
+        ok += r.status_code == 200
+        failed += r.status_code != 200
+    elapsed = time.monotonic() - start
+    server.shutdown()
+
+    codes = [status for _, status, _ in stub.log]
+    early = sum(1 for _, _, e in stub.log if e)
+    print(f"{n} درخواست: {elapsed:.1f} s (sleep ثابت قبلی فقط برای انتظار: {n * LEGACY_DELAY:.1f} s)")
+    print(f"  موفق {ok}، ناموفق {failed} | 429: {codes.count(429)}، 503: {codes.count(503)} | "
+          f"نرخ نهایی {scheduler.rate_for(base):.2f}/s | انتظار کل {scheduler.stats['waited']:.1f} s")
+    print(f"  درخواست قبل از پایان Retry-After: {early}")
+    sys.exit(1 if early or failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+"""
+بنچمارک جستجوی صفحه کتابخانه روی یک کاتالوگ مصنوعی (پیش‌فرض 50,000 کتاب).
+- زمان ساخت و اندازه‌ی ایندکس سه‌حرفی (search_index) در پایتون
+- در مرورگر headless: زمان هر کلید هنگام تایپ حرف به حرف چند عبارت، برای جستجوی قبلی
+  (ساخت رشته از فیلدها و includes برای همه کتاب‌ها)، ایندکس بدون استفاده از نتیجه‌ی قبلی،
+  و ایندکس هنگام تایپ (با فیلتر نتیجه‌ی قبلی). خروجی دو حالت ایندکس باید یکسان باشد؛
+  جستجوی قبلی نرمال‌سازی فارسی ندارد و فقط برای مقایسه‌ی زمان است.
+
+    python bench_search.py            # 50,000 کتاب
+    python bench_search.py 20000
+"""
+import json
+import os
+import sys
+import time
+
+import search_index
+from bench_generate import load_generator, synthetic_sheet
+from bench_grid import OUT_DIR, find_chrome, run_headless
+
+QUERIES = ['نمونه 12', 'مترجم 2', 'ققنوس', '1380', 'کتاب نمونه 4999', 'zzz']
+
+BENCH_SCRIPT = r'''
+<pre id="bench-result"></pre>
+<script>
+(function () {
+    const queries = __QUERIES__;
+    const legacyMatch = q => books.filter(b => (
+        b.title_main + ' ' + b.title_sub + ' ' + b.author + ' ' +
+        b.publisher + ' ' + b.translator + ' ' + b.year + ' ' +
+        b.pages + ' ' + (b.code || '')
+    ).toLowerCase().includes(q)).length;
+    const indexedCold = q => { lastIds = null; return matchIds(q).length; };
+    const indexedTyping = q => matchIds(q).length;
+
+    const run = fn => {
+        lastIds = null;
+        const times = [], counts = [];
+        for (const query of queries) {
+            for (let i = 1; i <= query.length; i++) {
+                const q = normalizeSearch(query.slice(0, i));
+                if (!q) continue;
+                const start = performance.now();
+                counts.push(fn(q));
+                times.push(performance.now() - start);
+            }
+        }
+        times.sort((a, b) => a - b);
+        return { counts, avg: +(times.reduce((a, b) => a + b, 0) / times.length).toFixed(3),
+                 p95: +times[Math.floor(times.length * 0.95)].toFixed(3), max: +times[times.length - 1].toFixed(3) };
+    };
+
+    const r = { books: books.length, keystrokes: 0 };
+    const legacy = run(legacyMatch), cold = run(indexedCold), typing = run(indexedTyping);
+    r.keystrokes = legacy.counts.length;
+    r.same_results = JSON.stringify(cold.counts) === JSON.stringify(typing.counts);
+    r.legacy_same_counts = JSON.stringify(legacy.counts) === JSON.stringify(cold.counts);
+    for (const [k, v] of [['legacy_ms', legacy], ['index_cold_ms', cold], ['index_typing_ms', typing]]) {
+        delete v.counts;
+        r[k] = v;
+    }
+
+    // هزینه‌ی کامل یک کلید (جستجو + فیلتر وضعیت + رندر) با ایندکس
+    const full = [];
+    for (let i = 1; i <= queries[0].length; i++) {
+        const start = performance.now();
+        searchInput.value = queries[0].slice(0, i);
+        apply();
+        document.body.offsetHeight;
+        full.push(performance.now() - start);
+    }
+    r.apply_ms_avg = +(full.reduce((a, b) => a + b, 0) / full.length).toFixed(3);
+
+    document.getElementById('bench-result').textContent = JSON.stringify(r);
+})();
+</script>
+'''
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    gen = load_generator()
+    books = gen.build_books(synthetic_sheet(n))
+    for b in books:
+        b['image_path'] = ''   # بدون شبکه: همه کارت‌ها کاور پیش‌فرض
+
+    start = time.perf_counter()
+    index = search_index.build_index(books)
+    t_build = time.perf_counter() - start
+    books_size = len(json.dumps(books, ensure_ascii=False).encode('utf-8'))
+    index_size = len(search_index.dumps(index).encode('utf-8'))
+    print(f"{len(books):,} کتاب | ساخت ایندکس: {t_build:.2f} s | {len(index['grams']):,} سه‌حرفی")
+    print(f"اندازه: کتاب‌ها {books_size / 1e6:.1f} MB، ایندکس {index_size / 1e6:.1f} MB")
+
+    os.makedirs(OUT_DIR, exist_ok=True)
+    html = gen.render_page(books, [], index=index)
+    script = BENCH_SCRIPT.replace('__QUERIES__', json.dumps(QUERIES, ensure_ascii=False))
+    path = os.path.join(OUT_DIR, 'bench_search.html')
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(html.replace('</body>', script + '</body>'))
+    print(f"  {path}")
+
+    chrome = find_chrome()
+    if not chrome:
+        print("Chrome پیدا نشد؛ صفحه را در مرورگر باز کنید (یا CHROME=... تنظیم کنید).")
+        return
+    print(json.dumps(run_headless(chrome, path), ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+"""
+بنچمارک مسیر سریع داده‌ی ساخت‌یافته (structured_data) در برابر پیمایش DOM.
+صفحه‌ها ساختگی‌اند: منو و پانویس پر از لینک، بلوک ld+json کتاب و تگ‌های og، و همان اطلاعات به
+شکل متن «برچسب: مقدار» (گیسوم) یا کارت نسخه (ایران‌کتاب، از bench_extract.make_page).
+در بخشی از صفحه‌ها (هر MISSING_EVERY صفحه) JSON-LD نیست تا مسیر برگشت به DOM هم اجرا شود.
+
+- گیسوم: parse_dom (BeautifulSoup + get_text، روش قبلی) در برابر parse_book_html
+- ایران‌کتاب: extract_details_from_div تنها در برابر structured_details + همان تابع با known
+  (صفحه در هر دو حالت یک بار parse شده است؛ scan_html جدا زمان‌گیری می‌شود)
+ستون‌های مشترک دو روش باید یکسان باشند.
+
+    python bench_structured.py          # 200 صفحه
+    python bench_structured.py 500
+"""
+import json
+import os
+import sys
+import time
+
+from bench_extract import make_page
+from bench_parse import SCRIPT_DIR, load_crawler
+from structured_data import scan_html
+
+MISSING_EVERY = 5
+# کلیدهایی که خزنده‌ی اصلی گیسوم از صفحه لازم دارد (مترجم و زبان در همه‌ی کتاب‌ها نیست)
+GISOOM_REQUIRED = ('title', 'image_url', 'author', 'publisher', 'pages', 'year')
+
+
+def book(i):
+    return {"title": f"عنوان {i}", "author": f"نویسنده {i}", "publisher": f"ناشر {i % 40}",
+            "pages": str(100 + i % 400), "year": str(1390 + i % 14), "isbn": f"978600{i:07d}"}
+
+
+def ld_json(b, image):
+    return ('<script type="application/ld+json">' + json.dumps({
+        "@context": "https://schema.org", "@type": "Book", "name": f"کتاب {b['title']}",
+        "image": image, "author": {"@type": "Person", "name": b["author"]},
+        "publisher": {"@type": "Organization", "name": b["publisher"]},
+        "numberOfPages": int(b["pages"]), "datePublished": b["year"], "isbn": b["isbn"]},
+        ensure_ascii=False) + '</script>')
+
+
+def gisoom_page(i):
+    b = book(i)
+    image = f"https://img.gisoom.com/{i}.jpg"
+    head = (f'<meta property="og:title" content="کتاب {b["title"]}">'
+            f'<meta property="og:image" content="{image}">')
+    if i % MISSING_EVERY:
+        head += ld_json(b, image)
+    nav = "".join(f'<li><a href="/tag/{j}">دسته {j}</a></li>' for j in range(80))
+    rows = "".join(f"<div><span>{k}</span>: <span>{v}</span></div>" for k, v in (
+        ("مؤلف", b["author"]), ("ناشر", b["publisher"]), ("تعداد صفحات", b["pages"]),
+        ("سال چاپ", b["year"]), ("زبان", "فارسی")))
+    related = "".join(f'<div class="item"><a href="/book/{j}">کتاب مرتبط {j}</a><span>{j}</span></div>'
+                      for j in range(60))
+    return f"<html><head>{head}</head><body><ul>{nav}</ul><main>{rows}</main>{related}</body></html>"
+
+
+def iranketab_page(i):
+    html = make_page(i, 20)
+    if i % MISSING_EVERY:
+        b = book(i)
+        b.update(title=f"عنوان {i}", author=f"نویسنده {i}", publisher=f"ناشر {i % 40}",
+                 year=str(1390 + i % 14))
+        html = html.replace("<body>", "<head>" + ld_json(b, f"/Images/ProductImages/{i}.jpg") + "</head><body>", 1)
+    return html
+
+
+def bench_gisoom(count):
+    sys.path.insert(0, os.path.join(SCRIPT_DIR, "Gisoom"))
+    from gisoom_crawler import GisoomCrawler
+    crawler = GisoomCrawler()
+    pages = [gisoom_page(i) for i in range(count)]
+
+    start = time.perf_counter()
+    old = [crawler.parse_dom(html) for html in pages]
+    t_old = time.perf_counter() - start
+
+    start = time.perf_counter()
+    new = [crawler.parse_book_html(html, GISOOM_REQUIRED) for html in pages]
+    t_new = time.perf_counter() - start
+
+    diff = [(i, k) for i, (a, b) in enumerate(zip(old, new)) for k in GISOOM_REQUIRED if a.get(k) != b.get(k)]
+    print(f"گیسوم، {count} صفحه")
+    print(f"  DOM (قبلی)        {t_old / count * 1000:7.3f} ms/صفحه")
+    print(f"  ساخت‌یافته + DOM   {t_new / count * 1000:7.3f} ms/صفحه  ({t_old / t_new:.1f}x)")
+    print(f"  {crawler.paths.summary()}")
+    print(f"  ستون‌های متفاوت: {len(diff)} {diff[:5]}")
+    return not diff
+
+
+def bench_iranketab(count):
+    bc = load_crawler()
+    bc.log = lambda msg: None
+    pages = []
+    for i in range(count):
+        html = iranketab_page(i)
+        soup = bc.parse_html(html)
+        index = bc.build_edition_index(soup)
+        isbn = f"978600{i:07d}"
+        pages.append((html, soup, index, bc.get_book_div_from_page("", soup, isbn, index), isbn))
+
+    start = time.perf_counter()
+    old = [bc.extract_details_from_div(div, soup, isbn) for _, soup, _, div, isbn in pages]
+    t_old = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for html, _, index, _, _ in pages:
+        index["structured"] = scan_html(html)
+    t_scan = time.perf_counter() - start
+    start = time.perf_counter()
+    new = [bc.extract_details_from_div(div, soup, isbn, bc.structured_details(index, isbn))
+           for _, soup, index, div, isbn in pages]
+    t_new = time.perf_counter() - start
+
+    diff = [(i, k) for i, (a, b) in enumerate(zip(old, new)) for k in set(a) | set(b) if a.get(k) != b.get(k)]
+    print(f"ایران‌کتاب، {count} صفحه")
+    print(f"  کارت (قبلی)           {t_old / count * 1000:7.3f} ms/صفحه")
+    print(f"  scan_html             {t_scan / count * 1000:7.3f} ms/صفحه")
+    print(f"  ساخت‌یافته + کارت      {t_new / count * 1000:7.3f} ms/صفحه")
+    print(f"  ستون‌های متفاوت: {len(diff)} {diff[:5]}")
+    return not diff
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    ok = bench_gisoom(count)
+    ok = bench_iranketab(count) and ok
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
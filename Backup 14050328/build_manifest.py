@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""
+مانیفست ساخت برای Generate HTML: اثر انگشت ورودی‌ها (محتوای شیت، کد/قالب و تنظیمات)
+ذخیره می‌شود تا اگر هیچ‌کدام تغییر نکرده باشد خروجی دوباره ساخته نشود.
+
+اثر انگشت شیت فقط از XML همان شیت و sharedStrings گرفته می‌شود؛ پس ذخیره‌ی دوباره‌ی
+فایل یا تغییر تصاویر داخل اکسل (drawing/media) باعث ساخت دوباره نمی‌شود.
+"""
+import hashlib
+import json
+import os
+import posixpath
+import xml.etree.ElementTree as ET
+import zipfile
+
+NS_MAIN = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+NS_REL = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+NS_PKG_REL = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+
+
+def _sheet_part(z, sheet_name):
+    """مسیر XML شیت با نام sheet_name (یا اولین شیت اگر پیدا نشد) داخل فایل xlsx."""
+    workbook = ET.fromstring(z.read("xl/workbook.xml"))
+    rels = ET.fromstring(z.read("xl/_rels/workbook.xml.rels"))
+    targets = {r.get("Id"): r.get("Target") for r in rels.iter(NS_PKG_REL + "Relationship")}
+
+    sheets = list(workbook.iter(NS_MAIN + "sheet"))
+    chosen = next((s for s in sheets if s.get("name") == sheet_name), sheets[0] if sheets else None)
+    if chosen is None:
+        return None
+    target = targets.get(chosen.get(NS_REL + "id"), "")
+    if target.startswith("/"):
+        return target.lstrip("/")
+    return posixpath.normpath(posixpath.join("xl", target))
+
+
+def sheet_fingerprint(path, sheet_name):
+    h = hashlib.sha256()
+    try:
+        with zipfile.ZipFile(path) as z:
+            names = set(z.namelist())
+            part = _sheet_part(z, sheet_name)
+            for name in (part, "xl/sharedStrings.xml"):
+                if name in names:
+                    h.update(name.encode("utf-8"))
+                    h.update(z.read(name))
+    except (zipfile.BadZipFile, KeyError, ET.ParseError):
+        # فایل غیر xlsx (مثلاً xls): کل فایل
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+    return h.hexdigest()
+
+
+def file_fingerprint(path):
+    if not os.path.exists(path):
+        return None
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def dir_fingerprint(path):
+    """
+    اثر انگشت همه‌ی فایل‌های یک پوشه (با زیرپوشه‌ها) از نام، اندازه و زمان تغییر؛ None اگر پوشه
+    نباشد. محتوا خوانده نمی‌شود تا پوشه‌ی بزرگ تصاویر هم سریع بررسی شود.
+    """
+    if not os.path.isdir(path):
+        return None
+    h = hashlib.sha256()
+    for root, dirs, files in os.walk(path):
+        dirs.sort()
+        for name in sorted(files):
+            full = os.path.join(root, name)
+            st = os.stat(full)
+            h.update(f"{os.path.relpath(full, path)}\0{st.st_size}\0{st.st_mtime_ns}\n".encode("utf-8"))
+    return h.hexdigest()
+
+
+def config_fingerprint(config):
+    return hashlib.sha256(json.dumps(config, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def load_manifest(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_manifest(path, manifest):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+
+
+def is_up_to_date(manifest, inputs, base_dir, outputs):
+    """
+    inputs: dict اثر انگشت‌ها؛ outputs: مسیر فایل‌های خروجی نسبت به base_dir
+    (نسبی تا مانیفست روی ماشین دیگر هم معتبر باشد) که باید دست‌نخورده باشند.
+    """
+    if manifest.get("inputs") != inputs:
+        return False
+    recorded = manifest.get("outputs", {})
+    if any(name not in recorded for name in outputs):
+        return False
+    # همه فایل‌های ثبت‌شده در ساخت قبلی (مثلاً shardها) هم باید سالم باشند
+    return all(digest == file_fingerprint(os.path.join(base_dir, name))
+               for name, digest in recorded.items())
+
+
+def record(inputs, base_dir, outputs):
+    return {"inputs": inputs,
+            "outputs": {name: file_fingerprint(os.path.join(base_dir, name)) for name in outputs}}
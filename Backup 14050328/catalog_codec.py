@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+"""
+قالب ستونی (columnar) داده‌ی کتاب‌ها برای صفحه کتابخانه.
+
+قالب قبلی فهرست dict است و نام همه فیلدها برای هر کتاب تکرار می‌شود. اینجا هر فیلد
+یک آرایه است و:
+- فیلدهایی که مقدار تکراری زیاد دارند (ناشر، نویسنده، مترجم، سال، ...) جدول رشته
+  می‌گیرند و ستونشان فقط شماره‌ی مقدار در جدول است (پرتکرارترها شماره‌ی کوچک‌تر)
+- برای فیلدهای مسیر (image_path) پیشوند مشترک (مثل IRANKETAB_URL_PREFIX) جدا می‌شود
+  و فقط شماره‌ی پیشوند و بقیه‌ی رشته ذخیره می‌شود
+
+{'n': تعداد، 'columns': {فیلد: آرایه}، 'tables': {فیلد: [رشته‌ها]}،
+ 'prefixes': {فیلد: [پیشوندها]}، 'prefix_ids': {فیلد: [شماره‌ی پیشوند هر کتاب]}}
+
+decodeBooks در قالب HTML همین را دوباره به فهرست dict (با همان ترتیب فیلدها) برمی‌گرداند.
+"""
+import json
+from collections import Counter
+
+# جدول رشته فقط وقتی که تعداد مقدارهای یکتا حداکثر این نسبت از کتاب‌ها باشد
+TABLE_MAX_RATIO = 0.5
+
+
+def _split_prefix(values, prefixes):
+    """(شماره‌ی پیشوند، بقیه‌ی رشته) با بلندترین پیشوند منطبق؛ پیشوند 0 همیشه '' است."""
+    prefixes = [''] + sorted({p for p in prefixes if p}, key=len, reverse=True)
+    ids, rest = [], []
+    for v in values:
+        for i, p in enumerate(prefixes):
+            if i and v.startswith(p):
+                ids.append(i)
+                rest.append(v[len(p):])
+                break
+        else:
+            ids.append(0)
+            rest.append(v)
+    return prefixes, ids, rest
+
+
+def encode(books, prefixes=None):
+    """
+    books: فهرست dict با فیلدهای یکسان (خروجی build_books).
+    prefixes: {فیلد: [پیشوندهای احتمالی]} برای فیلدهای مسیر.
+    """
+    prefixes = prefixes or {}
+    out = {'n': len(books), 'columns': {}, 'tables': {}, 'prefixes': {}, 'prefix_ids': {}}
+    if not books:
+        return out
+    for field in books[0]:
+        values = [b[field] for b in books]
+        if field in prefixes:
+            table, ids, values = _split_prefix(values, prefixes[field])
+            if any(ids):
+                out['prefixes'][field] = table
+                out['prefix_ids'][field] = ids
+        if all(isinstance(v, str) for v in values):
+            counts = Counter(values)
+            if len(counts) <= len(values) * TABLE_MAX_RATIO:
+                table = [v for v, _ in counts.most_common()]
+                pos = {v: i for i, v in enumerate(table)}
+                out['tables'][field] = table
+                values = [pos[v] for v in values]
+        out['columns'][field] = values
+    return out
+
+
+def decode(data):
+    """عکس encode (برای بررسی در پایتون؛ مرورگر decodeBooks را دارد)."""
+    if isinstance(data, list):
+        return data
+    columns = {}
+    for field, values in data['columns'].items():
+        if field in data['tables']:
+            table = data['tables'][field]
+            values = [table[i] for i in values]
+        if field in data['prefixes']:
+            table = data['prefixes'][field]
+            values = [table[i] + v for i, v in zip(data['prefix_ids'][field], values)]
+        columns[field] = values
+    fields = list(columns)
+    return [dict(zip(fields, row)) for row in zip(*columns.values())]
+
+
+def dumps(data):
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':'))
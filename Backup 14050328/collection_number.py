@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+"""
+تشخیص شماره‌ی جلد در مجموعه از روی عنوان فرعی یا عنوان اصلی (مشترک بین خزنده‌ها).
+
+- ارقام فارسی/عربی با persian_text.to_ascii_digits در یک translate لاتین می‌شوند
+- RULES به ترتیب اولویت اجرا می‌شوند و اولین الگویی که پیدا شود جواب است؛ الگوهای دوعددی
+  ('6 و 7'، '(11-10)') همیشه به شکل 'کوچک‌تر و بزرگ‌تر' برمی‌گردند
+- همه‌ی الگوها یک بار در سطح ماژول کامپایل می‌شوند و متنی که هیچ رقمی ندارد اصلاً بررسی نمی‌شود
+- اعداد یک تا سه رقمی‌اند تا سال انتشار (1399) یا شابک شماره‌ی جلد حساب نشود
+
+مجموعه‌ی آزمون و بنچمارک: bench_collection.py
+"""
+import re
+
+from persian_text import to_ascii_digits
+
+# (نام، الگو)؛ الگوی دوگروهی یعنی دو جلد در یک کتاب
+RULES = (
+    ('pair', re.compile(r'([0-9]+)\s*و\s*([0-9]+)')),                    # ایلیا 6 و 7
+    ('paren_range', re.compile(r'\(([0-9]+)\s*-\s*([0-9]+)\)')),         # (11-10)
+    ('range', re.compile(r'(?<![0-9])([0-9]{1,3})\s*-\s*([0-9]{1,3})$')),  # ایلیا 11-10
+    ('paren', re.compile(r'\((?:[^)]*?\s+)?([0-9]{1,3})\)')),             # (12)، (مهارتهای زندگی 5)
+    ('separator', re.compile(r'[_\-]\s*([0-9]{1,3})$')),                  # هفت نشانه _ 4
+    ('colon', re.compile(r':\s*([0-9]{1,3})')),                           # ... : 1
+    ('trailing', re.compile(r'(?<![0-9])([0-9]{1,3})$')),                 # قصه های فلیکس 5، نسل نو10
+    ('before_paren', re.compile(r'(?<![0-9])([0-9]{1,3})\s*\([^)0-9]*\)$')),  # قصه های فلیکس 1 (توضیح)
+)
+_HAS_DIGIT = re.compile(r'[0-9]')
+
+
+def match(text):
+    """(نام قانون، شماره) یا (None، '')."""
+    if not text:
+        return None, ''
+    text = to_ascii_digits(text).strip()
+    if not _HAS_DIGIT.search(text):
+        return None, ''
+    for name, pattern in RULES:
+        m = pattern.search(text)
+        if m:
+            if m.lastindex == 2:
+                low, high = sorted((int(m.group(1)), int(m.group(2))))
+                return name, f"{low} و {high}"
+            return name, m.group(1)
+    return None, ''
+
+
+def detect(text):
+    """شماره‌ی جلد در text یا ''؛ متن تغییر نمی‌کند."""
+    return match(text)[1]
+
+
+def collection_number(sub_title, main_title=''):
+    """اولویت با عنوان فرعی است؛ اگر شماره‌ای نداشت عنوان اصلی."""
+    return detect(sub_title) or detect(main_title)
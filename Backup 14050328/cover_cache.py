@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+"""
+کش محلی کاورها و ساخت بندانگشتی (thumbnail) برای صفحه کتابخانه.
+
+- منبع هر کاور: لینک اینترنتی (ستون iranketabImageName) یا فایل محلی Books Images/{isbn}.jpg
+- لینک‌ها با image_fetch.ImageFetcher دانلود می‌شوند (session مشترک، سقف دانلود هم‌زمان و نوبت
+  هر میزبان از PolitenessScheduler آن) و فقط یک بار: فایل هر لینک {sha256 لینک}.jpg در پوشه‌ی
+  fetcher می‌ماند و اجرای بعد دوباره درخواست نمی‌فرستد
+- کلید هر کاور 16 حرف اول هش محتواست و بندانگشتی‌ها {key}-{width}.{format} نام می‌گیرند،
+  پس فایلی که وجود دارد هیچ‌وقت کهنه نیست و دوباره ساخته نمی‌شود
+- Pillow اختیاری است؛ بدون آن (یا بدون پشتیبانی AVIF) همان قالب‌هایی که ممکن است ساخته می‌شوند
+"""
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from PIL import Image, ImageOps, features
+except ImportError:
+    Image = None
+
+HEADERS = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36'}
+QUALITY = {'avif': 50, 'webp': 75}
+KEY_LENGTH = 16
+
+
+def available_formats(formats):
+    """قالب‌هایی از formats که Pillow نصب‌شده می‌تواند بنویسد (به همان ترتیب)."""
+    if Image is None:
+        return []
+    return [f for f in formats if features.check(f)]
+
+
+def is_url(source):
+    return source.lower().startswith(('http://', 'https://'))
+
+
+def download_name(url):
+    """نام فایل دانلود یک لینک در پوشه‌ی ImageFetcher (ImageFetcher پسوند .jpg را اضافه می‌کند)."""
+    return hashlib.sha256(url.encode('utf-8')).hexdigest()[:KEY_LENGTH]
+
+
+def _original(source, downloaded):
+    """(هش محتوا، مسیر فایل) برای لینک یا مسیر محلی؛ None اگر فایلی نباشد."""
+    path = downloaded.get(source) if is_url(source) else source
+    if not path:
+        return None
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+    except OSError:
+        return None
+    return hashlib.sha256(data).hexdigest(), path
+
+
+def _thumbnails(path, key, thumb_dir, widths, formats):
+    names = [f"{key}-{w}.{fmt}" for w in widths for fmt in formats]
+    if all(os.path.exists(os.path.join(thumb_dir, n)) for n in names):
+        return names
+    with Image.open(path) as img:
+        img = ImageOps.exif_transpose(img).convert('RGB')
+        for w in widths:
+            # بزرگ‌تر از اصل ساخته نمی‌شود؛ نام فایل همان عرض درخواستی می‌ماند
+            scaled = img if img.width <= w else img.resize((w, round(img.height * w / img.width)),
+                                                           Image.LANCZOS)
+            for fmt in formats:
+                out = os.path.join(thumb_dir, f"{key}-{w}.{fmt}")
+                if not os.path.exists(out):
+                    scaled.save(out + '.tmp', format=fmt.upper(), quality=QUALITY.get(fmt, 75))
+                    os.replace(out + '.tmp', out)
+    return names
+
+
+def build_covers(sources, fetcher, thumb_dir, widths, formats, workers=4):
+    """
+    sources: منبع کاور هر کتاب ('' یعنی بدون کاور).
+    fetcher: image_fetch.ImageFetcher برای لینک‌ها؛ همه‌ی دانلودها از همین می‌گذرند.
+    خروجی: (کلید کاور هر کتاب یا ''، نام همه فایل‌های بندانگشتی ساخته‌شده/موجود)
+    """
+    os.makedirs(thumb_dir, exist_ok=True)
+
+    # منبع تکراری فقط یک بار دانلود می‌شود و محتوای تکراری (مثلاً یک کاور برای چند جلد)
+    # فقط یک بار بندانگشتی می‌گیرد
+    unique = [s for s in dict.fromkeys(sources) if s]
+    urls = [s for s in unique if is_url(s)]
+    fetched = fetcher.fetch_all([(download_name(url), url) for url in urls]) if urls else {}
+    downloaded = {url: fetched.get(download_name(url)) for url in urls}
+
+    def thumbs(found):
+        digest, path = found
+        key = digest[:KEY_LENGTH]
+        try:
+            return key, _thumbnails(path, key, thumb_dir, widths, formats)
+        except Exception:
+            return '', []
+
+    originals = {source: _original(source, downloaded) for source in unique}
+    by_digest = {found[0]: found for found in originals.values() if found}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        done = dict(zip(by_digest, pool.map(thumbs, by_digest.values())))
+
+    files = sorted({n for _, names in done.values() for n in names})
+    keys = {source: done[found[0]][0] if found else '' for source, found in originals.items()}
+    return [keys.get(s, '') for s in sources], files
+
+
+def prune(thumb_dir, keep):
+    """حذف بندانگشتی‌های ساخت‌های قبلی که دیگر استفاده نمی‌شوند."""
+    for name in os.listdir(thumb_dir):
+        if name not in keep:
+            os.remove(os.path.join(thumb_dir, name))
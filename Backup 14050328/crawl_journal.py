@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+"""
+دفتر ثبت (journal) پیشرفت خزنده‌ها در SQLite تا اجرای قطع‌شده دقیقاً از همان‌جا ادامه پیدا کند.
+
+- فقط افزودنی است: هر مرحله‌ی هر شابک یک رویداد (source، isbn، stage، ok، detail) است و
+  وضعیت هر مرحله آخرین رویداد آن است؛ تاریخچه‌ی خطاها باقی می‌ماند
+- مرحله‌ها به ترتیب STAGES: searched (صفحه کتاب پیدا شد)، page (HTML صفحه)، parsed (اطلاعات
+  استخراج شد؛ detail = JSON اطلاعات)، written (در اکسل ذخیره شد)، image (تصویر ذخیره شد)
+- خطای هر مرحله با ok=0 ثبت می‌شود؛ اجرای بعدی فقط مرحله‌های ناموفق/ناتمام را تکرار می‌کند و
+  اطلاعات parsed را بدون درخواست دوباره از همین‌جا می‌خواند
+- شروع دوباره (reset) هم فقط یک رویداد restart است: وضعیت‌ها از رویدادهای بعد از آخرین restart
+  همان source ساخته می‌شوند و رویدادهای قبلی حذف نمی‌شوند
+- چند پردازه می‌توانند هم‌زمان بنویسند (WAL)؛ in_shard شابک‌ها را بین آن‌ها تقسیم می‌کند
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+STAGES = ('searched', 'page', 'parsed', 'written', 'image')
+RESTART = 'restart'     # مرحله‌ی رویداد شروع دوباره (isbn خالی)
+
+
+def in_shard(isbn, index, count):
+    """آیا isbn سهم پردازه‌ی index از count است؟ (ثابت بین اجراها، مستقل از ترتیب ردیف‌ها)"""
+    return count <= 1 or zlib.crc32(str(isbn).encode('utf-8')) % count == index
+
+
+def parse_shard(text):
+    """'2/4' -> (1, 4) یعنی پردازه‌ی دوم از چهار؛ None -> (0, 1)"""
+    if not text:
+        return 0, 1
+    index, count = (int(x) for x in text.split('/'))
+    if not 1 <= index <= count:
+        raise ValueError(f"shard نامعتبر: {text}")
+    return index - 1, count
+
+
+class CrawlJournal:
+    def __init__(self, path, source):
+        self.path = path
+        self.source = source
+        self.worker = f"{os.getpid()}"
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS events (
+                id     INTEGER PRIMARY KEY AUTOINCREMENT,
+                source TEXT NOT NULL,
+                isbn   TEXT NOT NULL,
+                stage  TEXT NOT NULL,
+                ok     INTEGER NOT NULL,
+                detail TEXT,
+                at     REAL NOT NULL,
+                worker TEXT
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_events ON events(source, isbn, stage, id)")
+        self._conn.commit()
+
+    def record(self, isbn, stage, ok=True, detail=None):
+        if stage not in STAGES:
+            raise ValueError(f"مرحله‌ی نامعتبر: {stage}")
+        self._insert(isbn, stage, ok, detail)
+
+    def _insert(self, isbn, stage, ok, detail):
+        if detail is not None and not isinstance(detail, str):
+            detail = json.dumps(detail, ensure_ascii=False, default=str)
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO events (source, isbn, stage, ok, detail, at, worker) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (self.source, isbn, stage, int(bool(ok)), detail, time.time(), self.worker))
+            self._conn.commit()
+
+    def error(self, isbn, stage, detail):
+        self.record(isbn, stage, ok=False, detail=str(detail))
+
+    def states(self, isbns=None):
+        """{isbn: {stage: (ok, detail)}} از آخرین رویداد هر مرحله بعد از آخرین restart."""
+        with self._lock:
+            rows = self._conn.execute("""
+                SELECT isbn, stage, ok, detail FROM events
+                WHERE id IN (
+                    SELECT MAX(id) FROM events
+                    WHERE source = ? AND stage != ? AND id > (
+                        SELECT COALESCE(MAX(id), 0) FROM events WHERE source = ? AND stage = ?)
+                    GROUP BY isbn, stage)
+            """, (self.source, RESTART, self.source, RESTART)).fetchall()
+        wanted = set(isbns) if isbns is not None else None
+        out = {}
+        for isbn, stage, ok, detail in rows:
+            if wanted is None or isbn in wanted:
+                out.setdefault(isbn, {})[stage] = (bool(ok), detail)
+        return out
+
+    @staticmethod
+    def done(state, stage):
+        return bool(state) and state.get(stage, (False, None))[0]
+
+    @staticmethod
+    def parsed(state):
+        """اطلاعات ذخیره‌شده‌ی مرحله‌ی parsed (dict) یا None."""
+        if not CrawlJournal.done(state, 'parsed'):
+            return None
+        detail = state['parsed'][1]
+        return json.loads(detail) if detail else {}
+
+    def summary(self):
+        """{stage: (تعداد موفق، تعداد ناموفق)} بر اساس آخرین وضعیت."""
+        out = {stage: [0, 0] for stage in STAGES}
+        for stages in self.states().values():
+            for stage, (ok, _) in stages.items():
+                out[stage][0 if ok else 1] += 1
+        return {stage: tuple(v) for stage, v in out.items()}
+
+    def reset(self):
+        """شروع اجرای تازه: وضعیت‌های قبلی این source دیگر حساب نمی‌شوند ولی در جدول می‌مانند."""
+        self._insert('', RESTART, True, None)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""
+خواندن سبک شیت کتابخانه برای Generate HTML.
+- ردیف‌ها به صورت جریانی خوانده می‌شوند (python-calamine اگر نصب باشد، وگرنه openpyxl read_only)
+- بخش‌های drawing/تصاویر داخل اکسل اصلاً خوانده نمی‌شوند
+- فقط ستون‌هایی که لازم است (مثلاً نام‌های COLS_MAP) در حافظه ساخته می‌شوند
+"""
+import pandas as pd
+
+
+def _pick_engine():
+    try:
+        import python_calamine  # noqa: F401
+        return "calamine"
+    except ImportError:
+        return "openpyxl"
+
+
+ENGINE = _pick_engine()
+
+
+def _iter_rows_calamine(path, sheet_name):
+    from python_calamine import CalamineWorkbook
+
+    wb = CalamineWorkbook.from_path(path)
+    names = wb.sheet_names
+    if sheet_name not in names:
+        print(f"Sheet '{sheet_name}' not found, using '{names[0]}'")
+        sheet_name = names[0]
+    for row in wb.get_sheet_by_name(sheet_name).iter_rows():
+        # calamine سلول خالی را '' و همه اعداد را float برمی‌گرداند (مثل pandas تبدیل می‌کنیم)
+        yield [None if v == '' else int(v) if isinstance(v, float) and v.is_integer() else v
+               for v in row]
+
+
+def _iter_rows_openpyxl(path, sheet_name):
+    import openpyxl
+
+    wb = openpyxl.load_workbook(path, read_only=True, data_only=True, keep_links=False)
+    try:
+        if sheet_name in wb.sheetnames:
+            ws = wb[sheet_name]
+        else:
+            print(f"Sheet '{sheet_name}' not found, using '{wb.sheetnames[0]}'")
+            ws = wb.worksheets[0]
+        for row in ws.iter_rows(values_only=True):
+            # همان تبدیل pandas (_convert_cell): 9786001234567.0 -> 9786001234567؛ ستون عددیِ دارای
+            # خانه‌ی خالی را خود DataFrame دوباره float می‌کند، درست مثل pd.read_excel
+            yield [int(v) if isinstance(v, float) and v.is_integer() else v for v in row]
+    finally:
+        wb.close()
+
+
+def read_columns(path, sheet_name, wanted, engine=None):
+    """
+    شیت را ردیف‌به‌ردیف می‌خواند و فقط ستون‌های wanted (بر اساس نام هدر، بعد از strip)
+    را به صورت DataFrame برمی‌گرداند. ردیف‌های کاملاً خالی انتهای شیت حذف می‌شوند.
+    """
+    engine = engine or ENGINE
+    rows = _iter_rows_calamine(path, sheet_name) if engine == "calamine" else _iter_rows_openpyxl(path, sheet_name)
+
+    header = next(rows, None)
+    if header is None:
+        return pd.DataFrame()
+
+    wanted = set(wanted)
+    positions = {}
+    for idx, name in enumerate(header):
+        name = str(name).strip() if name is not None else ''
+        if name in wanted and name not in positions:
+            positions[name] = idx
+
+    data = {name: [] for name in positions}
+    pending_blank = 0
+    for row in rows:
+        values = [row[i] if i < len(row) else None for i in positions.values()]
+        if all(v is None for v in values):
+            # ردیف خالی را نگه می‌داریم تا اگر بعدش ردیف پر آمد ترتیب به هم نخورد
+            pending_blank += 1
+            continue
+        for _ in range(pending_blank):
+            for col in data.values():
+                col.append(None)
+        pending_blank = 0
+        for name, value in zip(positions, values):
+            data[name].append(value)
+
+    return pd.DataFrame(data)
@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""
+کش پایدار پاسخ‌های HTTP روی دیسک (SQLite) برای خزنده‌ها.
+- کلید: URL درخواست (برای صفحه جستجو شامل شابک است)
+- TTL: تا این مدت پاسخ بدون هیچ درخواستی از کش برگردانده می‌شود
+- بعد از TTL با ETag / Last-Modified اعتبارسنجی مجدد می‌شود (304 = بدون دانلود دوباره)
+- محدودیت حجم: با عبور از max_bytes قدیمی‌ترین ورودی‌ها (بر اساس آخرین استفاده) حذف می‌شوند
+"""
+import sqlite3
+import threading
+import time
+
+
+class CachedResponse:
+    """پاسخ ساده‌ای که همان فیلدهای مورد استفاده‌ی خزنده از requests.Response را دارد."""
+
+    def __init__(self, url, text, status_code=200, from_cache=True):
+        self.url = url
+        self.text = text
+        self.status_code = status_code
+        self.from_cache = from_cache
+
+
+class ResponseCache:
+    def __init__(self, path, ttl=7 * 24 * 3600, max_bytes=200 * 1024 * 1024):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                url           TEXT PRIMARY KEY,
+                final_url     TEXT NOT NULL,
+                body          BLOB NOT NULL,
+                etag          TEXT,
+                last_modified TEXT,
+                fetched_at    REAL NOT NULL,
+                accessed_at   REAL NOT NULL,
+                size          INTEGER NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_accessed ON responses(accessed_at)")
+        self._conn.commit()
+
+    def get(self, url):
+        """ورودی کش یا None. خروجی dict شامل final_url, text, etag, last_modified, fresh."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT final_url, body, etag, last_modified, fetched_at FROM responses WHERE url = ?",
+                (url,)).fetchone()
+            if not row:
+                return None
+            self._conn.execute("UPDATE responses SET accessed_at = ? WHERE url = ?", (time.time(), url))
+            self._conn.commit()
+        final_url, body, etag, last_modified, fetched_at = row
+        return {
+            "final_url": final_url,
+            "text": body.decode("utf-8"),
+            "etag": etag,
+            "last_modified": last_modified,
+            "fresh": (time.time() - fetched_at) < self.ttl,
+        }
+
+    def conditional_headers(self, entry):
+        """هدرهای اعتبارسنجی مجدد برای یک ورودی کهنه."""
+        headers = {}
+        if entry and entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry and entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def put(self, url, final_url, text, etag=None, last_modified=None):
+        body = text.encode("utf-8")
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses "
+                "(url, final_url, body, etag, last_modified, fetched_at, accessed_at, size) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, final_url, body, etag, last_modified, now, now, len(body)))
+            self._evict(keep=url)
+            self._conn.commit()
+
+    def touch(self, url):
+        """بعد از پاسخ 304: ورودی دوباره تازه حساب می‌شود."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "UPDATE responses SET fetched_at = ?, accessed_at = ? WHERE url = ?", (now, now, url))
+            self._conn.commit()
+
+    def delete(self, url):
+        with self._lock:
+            self._conn.execute("DELETE FROM responses WHERE url = ?", (url,))
+            self._conn.commit()
+
+    def _evict(self, keep=None):
+        """قدیمی‌ترین ورودی‌ها به جز keep (ورودی‌ای که همین الان نوشته شد) حذف می‌شوند."""
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # تا ۹۰٪ سقف خالی می‌کنیم تا با هر درج جدید دوباره حذف لازم نشود
+        target = int(self.max_bytes * 0.9)
+        rows = self._conn.execute(
+            "SELECT url, size FROM responses WHERE url IS NOT ? ORDER BY accessed_at", (keep,)).fetchall()
+        victims = []
+        for url, size in rows:
+            if total <= target:
+                break
+            victims.append((url,))
+            total -= size
+        self._conn.executemany("DELETE FROM responses WHERE url = ?", victims)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,206 @@
+# -*- coding: utf-8 -*-
+"""
+دانلود هم‌زمان تصاویر کاور برای خزنده‌ها.
+- یک requests.Session مشترک با pool اتصال (به اندازه‌ی تعداد workerها)؛ اتصال‌ها به هر میزبان
+  دوباره استفاده می‌شوند
+- حداکثر workers دانلود هم‌زمان
+- فایل ناقص ({isbn}.jpg.part) با درخواست Range ادامه داده می‌شود؛ اگر سرور Range را
+  پشتیبانی نکند (200 به جای 206) یا Content-Range از همان offset شروع نشود از اول نوشته می‌شود
+- نوشتن اتمیک: فقط بعد از بررسی، فایل .part به {isbn}.jpg تغییر نام می‌دهد
+- بررسی: Content-Type باید image/* باشد و تصویر کامل decode شود (با Pillow اگر نصب باشد، وگرنه
+  از روی امضا و نشانه‌ی پایان فایل) و از MIN_SIZE کوچک‌تر نباشد
+- خطای دیسک (پر بودن، دسترسی، قفل آنتی‌ویروس) فقط همان تصویر را ناموفق می‌کند
+- اگر scheduler (politeness.PolitenessScheduler) داده شود نوبت هر میزبان از آن گرفته می‌شود
+"""
+import os
+import re
+import struct
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+CHUNK = 64 * 1024
+MIN_SIZE = (50, 50)      # کوچک‌تر از این معمولاً آیکون/جای‌خالی سایت است نه کاور
+
+
+def make_session(headers, workers):
+    session = requests.Session()
+    session.headers.update(headers)
+    adapter = HTTPAdapter(pool_connections=workers, pool_maxsize=workers, max_retries=2)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def sniff_size(path):
+    """(عرض، ارتفاع) از سرآیند JPEG/PNG/GIF/WebP بدون Pillow؛ None اگر تصویر شناخته‌شده نباشد."""
+    with open(path, 'rb') as f:
+        head = f.read(32)
+        if head[:8] == b'\x89PNG\r\n\x1a\n':
+            return struct.unpack('>II', head[16:24])
+        if head[:6] in (b'GIF87a', b'GIF89a'):
+            return struct.unpack('<HH', head[6:10])
+        if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+            if head[12:16] == b'VP8X':
+                return (int.from_bytes(head[24:27], 'little') + 1, int.from_bytes(head[27:30], 'little') + 1)
+            if head[12:16] == b'VP8 ':
+                w, h = struct.unpack('<HH', head[26:30])
+                return w & 0x3FFF, h & 0x3FFF
+            if head[12:16] == b'VP8L':
+                bits = int.from_bytes(head[21:25], 'little')
+                return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+            return None
+        if head[:2] != b'\xff\xd8':
+            return None
+        # JPEG: پیمایش segmentها تا SOFn
+        f.seek(2)
+        while True:
+            marker = f.read(2)
+            if len(marker) < 2 or marker[0] != 0xFF:
+                return None
+            if marker[1] in (0xD8, 0x01) or 0xD0 <= marker[1] <= 0xD7:
+                continue
+            length = struct.unpack('>H', f.read(2))[0]
+            if 0xC0 <= marker[1] <= 0xCF and marker[1] not in (0xC4, 0xC8, 0xCC):
+                h, w = struct.unpack('>xHH', f.read(5))
+                return w, h
+            f.seek(length - 2, os.SEEK_CUR)
+
+
+def _has_end_marker(path):
+    """بدون Pillow: JPEG باید با EOI و PNG با IEND تمام شود (فایل بریده‌شده سرآیند درست دارد)."""
+    with open(path, 'rb') as f:
+        head = f.read(8)
+        f.seek(max(0, os.path.getsize(path) - 12))
+        tail = f.read()
+    if head[:2] == b'\xff\xd8':
+        return tail.rstrip(b'\x00').endswith(b'\xff\xd9')
+    if head == b'\x89PNG\r\n\x1a\n':
+        return tail[-8:-4] == b'IEND'
+    return True
+
+
+def image_size(path):
+    """(عرض، ارتفاع) تصویر کامل و سالم؛ None اگر ناقص یا نامعتبر باشد."""
+    if Image is None:
+        try:
+            return sniff_size(path) if _has_end_marker(path) else None
+        except (OSError, struct.error):     # فایل ناقص
+            return None
+    try:
+        with Image.open(path) as img:
+            img.verify()
+        # verify داده‌ی تصویر JPEG را decode نمی‌کند؛ load فایل بریده‌شده را رد می‌کند
+        with Image.open(path) as img:
+            img.load()
+            return img.size
+    except Exception:
+        return None
+
+
+def range_start(value):
+    """شروع بازه از هدر Content-Range ('bytes 100-199/500' -> 100)؛ None اگر نامعتبر باشد."""
+    match = re.match(r'\s*bytes\s+(\d+)-', value or '')
+    return int(match.group(1)) if match else None
+
+
+class ImageFetcher:
+    def __init__(self, image_dir, headers, workers=6, timeout=30, min_size=MIN_SIZE,
+                 allow_insecure=True, scheduler=None, log=print):
+        self.image_dir = image_dir
+        self.workers = workers
+        self.timeout = timeout
+        self.min_size = min_size
+        self.allow_insecure = allow_insecure
+        self.log = log
+        self.scheduler = scheduler
+        self.session = make_session(headers, workers)
+        self._insecure_hosts = set()   # میزبان‌هایی که گواهی SSL معتبر ندارند
+        self._lock = threading.Lock()
+        os.makedirs(image_dir, exist_ok=True)
+
+    def path_for(self, isbn):
+        return os.path.join(self.image_dir, f"{isbn}.jpg")
+
+    def _get(self, url, headers):
+        host = requests.utils.urlparse(url).hostname
+        verify = host not in self._insecure_hosts
+        try:
+            return self.session.get(url, headers=headers, stream=True, timeout=self.timeout, verify=verify)
+        except requests.exceptions.SSLError:
+            if not (verify and self.allow_insecure):
+                raise
+            # فقط همین میزبان از این به بعد بدون بررسی گواهی
+            with self._lock:
+                self._insecure_hosts.add(host)
+            self.log(f"⚠️ SSL نامعتبر برای {host} → دانلود بدون تأیید SSL")
+            return self.session.get(url, headers=headers, stream=True, timeout=self.timeout, verify=False)
+
+    def fetch(self, isbn, url, retry_range=True):
+        """مسیر فایل تصویر یا None. فایلی که از قبل هست دوباره دانلود نمی‌شود."""
+        path = self.path_for(isbn)
+        if os.path.exists(path):
+            return path
+        part = path + '.part'
+        offset = os.path.getsize(part) if os.path.exists(part) else 0
+        headers = {'Range': f"bytes={offset}-"} if offset else {}
+        if self.scheduler:
+            self.scheduler.wait(url)
+        try:
+            with self._get(url, headers) as r:
+                if self.scheduler:
+                    self.scheduler.feedback(url, r.status_code, r.elapsed.total_seconds(),
+                                            r.headers.get('Retry-After'))
+                if r.status_code == 416 and retry_range:   # فایل ناقص با نسخه‌ی سرور نمی‌خواند
+                    if os.path.exists(part):
+                        os.remove(part)
+                    return self.fetch(isbn, url, retry_range=False)
+                r.raise_for_status()
+                ctype = r.headers.get('Content-Type', '')
+                if ctype and not ctype.lower().startswith(('image/', 'application/octet-stream')):
+                    self.log(f" -> نوع محتوای نامعتبر برای تصویر {isbn}: {ctype}")
+                    return None
+                # فقط بازه‌ای که دقیقاً از انتهای فایل ناقص شروع می‌شود به آن اضافه می‌شود
+                resumed = (offset and r.status_code == 206
+                           and range_start(r.headers.get('Content-Range')) == offset)
+                with open(part, 'ab' if resumed else 'wb') as f:
+                    for chunk in r.iter_content(CHUNK):
+                        f.write(chunk)
+        except requests.exceptions.RequestException as e:
+            if self.scheduler and e.response is None:
+                self.scheduler.feedback(url, error=True)
+            # فایل .part می‌ماند تا اجرای بعدی از همان‌جا ادامه دهد
+            self.log(f" -> خطا در دانلود تصویر {isbn}: {e}")
+            return None
+        except OSError as e:
+            self.log(f" -> خطا در نوشتن تصویر {isbn}: {e}")
+            return None
+
+        size = image_size(part)
+        try:
+            if not size or size[0] < self.min_size[0] or size[1] < self.min_size[1]:
+                self.log(f" -> تصویر نامعتبر برای {isbn}: {size}")
+                os.remove(part)
+                return None
+            os.replace(part, path)
+        except OSError as e:
+            self.log(f" -> خطا در ذخیره‌ی تصویر {isbn}: {e}")
+            return None
+        return path
+
+    def fetch_all(self, items):
+        """items: [(isbn, url), ...] -> {isbn: مسیر یا None} با حداکثر workers دانلود هم‌زمان."""
+        items = [(isbn, url) for isbn, url in dict(items).items() if isbn and url]
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            paths = pool.map(lambda item: self.fetch(*item), items)
+            return {isbn: path for (isbn, _), path in zip(items, paths)}
+
+    def close(self):
+        self.session.close()
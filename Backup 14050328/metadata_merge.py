@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+"""
+ادغام اطلاعات کتاب از چند منبع (ایران‌کتاب، گیسوم) در یک ردیف اکسل.
+
+- خروجی هر منبع با to_columns به نام ستون‌های اکسل تبدیل می‌شود: ایران‌کتاب از قبل فارسی است و
+  کلیدهای گیسوم با GISOOM_COLUMNS (برعکس COLUMN_MAPPING در Gisoom/excel_handler.py) عوض می‌شوند
+- هر مقدار از FIELD_CHECKS یک اطمینان بین 0 و 1 می‌گیرد (مقدار خالی 0)؛ برای هر ستون اولین منبع
+  به ترتیب اولویت (FIELD_PRECEDENCE آن ستون، بعد PRECEDENCE) که اطمینانش حداقل MIN_CONFIDENCE
+  باشد برنده است و اگر هیچ‌کدام نبود، مطمئن‌ترین مقدار
+- Enricher منبع اول را همیشه و منبع‌های بعدی را فقط وقتی می‌پرسد که ستون‌های REQUIRED هنوز
+  خالی یا نامطمئن باشند؛ با parallel=True همه‌ی منبع‌ها هم‌زمان پرسیده می‌شوند (زمان کمتر،
+  درخواست بیشتر). به منبع‌های بعدی ستون‌های کم هم داده می‌شود تا فقط همان‌ها را بگیرند (مثلاً
+  گیسوم بدون دریافت صفحه کتاب). iter_enrich چند شابک را هم‌زمان و به ترتیب ورودی برمی‌گرداند
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from ordered_pool import ordered_map
+from persian_text import to_ascii_digits
+
+GISOOM_COLUMNS = {
+    'title': 'عنوان اصلی',
+    'image_url': 'image_url',
+    'author': 'نویسنده',
+    'translator': 'مترجم',
+    'publisher': 'ناشر',
+    'pages': 'صفحات',
+    'year': 'سال انتشار شمسی',
+    'language': 'زبان',
+    'collection_number': 'شماره در مجموعه',
+}
+# منبعی که اینجا نیست (ایران‌کتاب) از قبل با نام ستون‌ها خروجی می‌دهد
+SOURCE_COLUMNS = {'gisoom': GISOOM_COLUMNS}
+
+PRECEDENCE = ('iranketab', 'gisoom')
+# اولویت جدا برای بعضی ستون‌ها، مثلاً {'صفحات': ('gisoom', 'iranketab')}
+FIELD_PRECEDENCE = {}
+# بدون این ستون‌ها ردیف ناقص است و منبع بعدی پرسیده می‌شود
+REQUIRED = ('عنوان اصلی', 'نویسنده', 'ناشر', 'صفحات', 'سال انتشار شمسی', 'image_url')
+MIN_CONFIDENCE = 0.5
+
+
+def _number_in(low, high):
+    def check(value):
+        text = to_ascii_digits(str(value)).strip()
+        return 1.0 if text.isdigit() and low <= int(text) <= high else 0.2
+    return check
+
+
+FIELD_CHECKS = {
+    'صفحات': _number_in(1, 10000),
+    'سال انتشار شمسی': _number_in(1250, 1500),
+    'سال انتشار میلادی': _number_in(1800, 2100),
+    'image_url': lambda v: 1.0 if str(v).startswith(('http://', 'https://')) else 0.0,
+    'عنوان اصلی': lambda v: 1.0 if len(str(v).strip()) > 1 else 0.3,
+}
+
+
+def to_columns(source, data):
+    """خروجی خام یک منبع -> {نام ستون: مقدار}؛ کلیدهای ناشناخته‌ی گیسوم (url، gid، ...) حذف می‌شوند."""
+    if not data:
+        return {}
+    mapping = SOURCE_COLUMNS.get(source)
+    if mapping is None:
+        return dict(data)
+    return {mapping[k]: v for k, v in data.items() if k in mapping}
+
+
+def confidence(column, value):
+    if value is None or not str(value).strip():
+        return 0.0
+    check = FIELD_CHECKS.get(column)
+    return check(value) if check else 1.0
+
+
+def merge(results, precedence=PRECEDENCE, field_precedence=None, min_confidence=MIN_CONFIDENCE):
+    """
+    results: {منبع: ستون‌ها (خروجی to_columns)}
+    خروجی: (ستون‌های ادغام‌شده، {ستون: منبعی که مقدارش انتخاب شد})
+    """
+    field_precedence = FIELD_PRECEDENCE if field_precedence is None else field_precedence
+    merged, origin = {}, {}
+    columns = dict.fromkeys(c for source in precedence for c in results.get(source) or {})
+    for column in columns:
+        order = dict.fromkeys((*field_precedence.get(column, ()), *precedence))
+        best = None
+        for source in order:
+            value = (results.get(source) or {}).get(column)
+            score = confidence(column, value)
+            if score >= min_confidence:
+                best = (score, source, value)
+                break
+            if score > 0 and (best is None or score > best[0]):
+                best = (score, source, value)
+        if best:
+            merged[column] = best[2]
+            origin[column] = best[1]
+    return merged, origin
+
+
+def missing(merged, required=REQUIRED, min_confidence=MIN_CONFIDENCE):
+    """ستون‌های اجباری که مقدار مطمئن ندارند."""
+    return [c for c in required if confidence(c, merged.get(c)) < min_confidence]
+
+
+class Enricher:
+    def __init__(self, sources, required=REQUIRED, parallel=False, precedence=None,
+                 field_precedence=None, min_confidence=MIN_CONFIDENCE, log=print):
+        """
+        sources: [(نام منبع، تابع (isbn، ستون‌های کم) -> dict یا None)] به ترتیب پرسیدن؛ اولویت
+        ادغام هم به طور پیش‌فرض همین ترتیب است. ستون‌های کم None است اگر همه‌چیز لازم باشد
+        (منبع اول یا parallel=True).
+        """
+        self.sources = list(sources)
+        self.required = tuple(required)
+        self.parallel = parallel
+        self.precedence = tuple(precedence or (name for name, _ in self.sources))
+        self.field_precedence = field_precedence
+        self.min_confidence = min_confidence
+        self.log = log
+        self._lock = threading.Lock()
+        names = [name for name, _ in self.sources]
+        # calls: درخواست به منبع، skipped: منبع لازم نشد، known: از قبل موجود بود،
+        # filled: تعداد ستون‌هایی که مقدارشان از آن منبع آمد، incomplete: ردیف‌هایی که ناقص ماندند
+        self.stats = {'calls': dict.fromkeys(names, 0), 'skipped': dict.fromkeys(names, 0),
+                      'known': dict.fromkeys(names, 0), 'filled': dict.fromkeys(names, 0),
+                      'incomplete': 0}
+
+    def _count(self, kind, name, n=1):
+        with self._lock:
+            self.stats[kind][name] += n
+
+    def _ask(self, name, fetch, isbn, lacking=None):
+        self._count('calls', name)
+        try:
+            return to_columns(name, fetch(isbn, lacking))
+        except Exception as e:
+            self.log(f" -> خطا در منبع {name} برای {isbn}: {e}")
+            return {}
+
+    def merge(self, results):
+        return merge(results, self.precedence, self.field_precedence, self.min_confidence)
+
+    def enrich(self, isbn, known=None):
+        """
+        known: {منبع: خروجی خام} که از قبل (مثلاً از journal) موجود است و دوباره پرسیده نمی‌شود.
+        خروجی: (ستون‌های ادغام‌شده، {ستون: منبع}، ستون‌های اجباری که هنوز خالی‌اند)
+        """
+        results = {}
+        for name, data in (known or {}).items():
+            if data is not None:
+                results[name] = to_columns(name, data)
+                self._count('known', name)
+        pending = [(name, fetch) for name, fetch in self.sources if name not in results]
+
+        if self.parallel and len(pending) > 1:
+            with ThreadPoolExecutor(max_workers=len(pending)) as pool:
+                answers = pool.map(lambda s: self._ask(s[0], s[1], isbn), pending)
+                results.update(zip((name for name, _ in pending), answers))
+        else:
+            for name, fetch in pending:
+                # منبع اول همیشه پرسیده می‌شود؛ بقیه فقط اگر ستون اجباری کم باشد
+                lacking = None
+                if name != self.sources[0][0]:
+                    lacking = missing(self.merge(results)[0], self.required, self.min_confidence)
+                    if not lacking:
+                        self._count('skipped', name)
+                        continue
+                results[name] = self._ask(name, fetch, isbn, lacking)
+
+        merged, origin = self.merge(results)
+        lacking = missing(merged, self.required, self.min_confidence)
+        with self._lock:
+            for name in origin.values():
+                self.stats['filled'][name] += 1
+            self.stats['incomplete'] += bool(merged and lacking)
+        return merged, origin, lacking
+
+    def iter_enrich(self, isbns, workers=1, known=None):
+        """
+        isbns: لیست شابک‌ها؛ known: {isbn: {منبع: خروجی خام}}. نتیجه‌ها دقیقاً به ترتیب isbns
+        برگردانده می‌شوند، حتی اگر حداکثر workers شابک هم‌زمان در جریان باشند؛ شابک‌ها در پنجره‌ی
+        محدود ارسال می‌شوند و با توقف مصرف‌کننده بقیه لغو می‌شوند.
+        """
+        known = known or {}
+        if workers <= 1:
+            for isbn in isbns:
+                yield self.enrich(isbn, known.get(isbn))
+            return
+        for _, result in ordered_map(lambda isbn: self.enrich(isbn, known.get(isbn)), isbns, workers):
+            yield result
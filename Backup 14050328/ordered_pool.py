@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+"""
+اجرای هم‌زمان یک تابع روی لیستی از کارها با نتیجه‌های به ترتیب ورودی (مشترک بین خزنده‌ها).
+
+- حداکثر window کار ارسال‌شده در صف است (نه همه‌ی کارها از اول)، پس حافظه و کارهای
+  بی‌مصرف محدود می‌ماند
+- اگر مصرف‌کننده متوقف شود (Ctrl-C، خطا، break) کارهای شروع‌نشده لغو می‌شوند و فقط کارهایی
+  که در حال اجرا هستند تمام می‌شوند
+"""
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+
+def ordered_map(fn, items, workers, window=None):
+    """
+    (item، fn(item)) برای هر item به ترتیب items با حداکثر workers نخ هم‌زمان.
+    window: حداکثر کارهای ارسال‌شده‌ای که نتیجه‌شان هنوز برنگشته (پیش‌فرض دو برابر workers).
+    """
+    window = max(window or 2 * workers, workers)
+    pool = ThreadPoolExecutor(max_workers=workers)
+    pending = deque()
+    try:
+        for item in items:
+            pending.append((item, pool.submit(fn, item)))
+            if len(pending) >= window:
+                done, future = pending.popleft()
+                yield done, future.result()
+        while pending:
+            done, future = pending.popleft()
+            yield done, future.result()
+    finally:
+        for _, future in pending:
+            future.cancel()
+        pool.shutdown(wait=True, cancel_futures=True)
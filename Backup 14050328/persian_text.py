@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""
+نرمال‌سازی متن فارسی که بین Generate HTML (کلیدهای جستجو) و خزنده‌ها (شابک و اعداد)
+مشترک است. همه جایگزینی‌ها با جدول‌های str.translate که یک بار ساخته می‌شوند انجام می‌شود.
+
+- to_ascii_digits / digits_only / normalize_isbn: فقط ارقام فارسی و عربی را لاتین می‌کنند
+  (برای پارس کردن، متن دیگری تغییر نمی‌کند)
+- search_key: نرمال‌سازی برای جستجو (ی/ک عربی، نیم‌فاصله، اعراب، ارقام، حروف کوچک).
+  SEARCH_CHARS همان جدول است و عیناً در صفحه HTML هم برای عبارت جستجو استفاده می‌شود.
+
+جدول‌ها لیست‌اند نه dict: str.translate برای متن غیر ASCII روی dict کند است (حتی از چند
+str.replace پشت سر هم کندتر، نگاه کنید به bench_normalize.py) ولی با لیست حدود دو برابر سریع‌تر.
+متنی که اصلاً نویسه‌ی قابل تبدیل ندارد (بیشتر متن‌ها) بدون translate برمی‌گردد.
+"""
+import re
+
+PERSIAN_DIGITS = '۰۱۲۳۴۵۶۷۸۹'
+ARABIC_DIGITS = '٠١٢٣٤٥٦٧٨٩'
+
+
+def _dense_table(mapping):
+    """جدول translate به شکل لیست تا بزرگ‌ترین نویسه‌ی mapping؛ نویسه‌های بعدش دست نمی‌خورند."""
+    mapping = str.maketrans(mapping)
+    table = [chr(code) for code in range(max(mapping) + 1)]
+    for code, repl in mapping.items():
+        table[code] = repl
+    return table
+
+
+DIGITS_TABLE = _dense_table(dict(zip(PERSIAN_DIGITS + ARABIC_DIGITS, '0123456789' * 2)))
+
+# نویسه -> جایگزین در کلید جستجو ('' یعنی حذف)
+SEARCH_CHARS = {
+    'ي': 'ی', 'ى': 'ی', 'ئ': 'ی',
+    'ك': 'ک',
+    'ة': 'ه', 'ۀ': 'ه',
+    'أ': 'ا', 'إ': 'ا', 'آ': 'ا', 'ٱ': 'ا',
+    'ؤ': 'و',
+    '\u200c': ' ',                      # نیم‌فاصله: «می‌خوانم» = «می خوانم»
+    # نویسه‌های نامرئی جهت متن و اتصال
+    **{c: '' for c in '\u200d\u200e\u200f\u202a\u202b\u202c\u202d\u202e'},
+    'ـ': '',                            # کشیده
+    # اعراب (فتحه تا سکون، تنوین، تشدید) و الف کوچک بالانویس
+    **{chr(c): '' for c in range(0x064B, 0x0653)},
+    '\u0670': '',
+    **dict(zip(PERSIAN_DIGITS + ARABIC_DIGITS, '0123456789' * 2)),
+}
+SEARCH_TABLE = _dense_table(SEARCH_CHARS)
+
+_FOREIGN_DIGIT = re.compile(f'[{PERSIAN_DIGITS}{ARABIC_DIGITS}]')
+_NON_DIGIT = re.compile(r'[^0-9]')
+_INT = re.compile(r'[0-9]+')
+_NON_ISBN = re.compile(r'[^0-9X]')
+_SPACES = re.compile(r'\s+')
+
+
+def to_ascii_digits(text):
+    text = str(text)
+    return text.translate(DIGITS_TABLE) if _FOREIGN_DIGIT.search(text) else text
+
+
+def digits_only(text):
+    """'۳۲۰ صفحه' -> '320'"""
+    return _NON_DIGIT.sub('', to_ascii_digits(text))
+
+
+def first_int(text, default=0):
+    """اولین عدد صحیح متن مثل parseInt جاوااسکریپت ولی با ارقام فارسی: '۳۲۰ صفحه' -> 320"""
+    m = _INT.search(to_ascii_digits(text))
+    return int(m.group()) if m else default
+
+
+def normalize_isbn(value):
+    """شابک فقط با ارقام لاتین (و X انتهای شابک ده‌رقمی)؛ '' اگر خالی باشد."""
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        # اکسل شابک بدون خط تیره را عدد ذخیره می‌کند: 9786008869870.0
+        value = int(value)
+    return _NON_ISBN.sub('', to_ascii_digits(value).upper())
+
+
+def search_key(text):
+    text = str(text)
+    if not text.isascii():
+        text = text.translate(SEARCH_TABLE)
+    return _SPACES.sub(' ', text.lower()).strip()
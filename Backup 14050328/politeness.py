@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""
+زمان‌بندی مؤدبانه‌ی درخواست‌ها به ازای هر میزبان (به جای sleep تصادفی ثابت قبل از هر درخواست).
+
+- هر میزبان یک سطل توکن (token bucket) با نرخ rate درخواست در ثانیه و ظرفیت burst دارد؛
+  wait(url) یک توکن رزرو می‌کند و فقط اگر لازم باشد صبر می‌کند (بین نخ‌ها مشترک است)
+- feedback(...) بعد از هر پاسخ نرخ را تنظیم می‌کند (AIMD):
+  پاسخ موفق و سریع‌تر از fast ثانیه -> نرخ + increase (تا max_rate)
+  429/503/5xx یا خطای شبکه -> نرخ × decrease (تا min_rate)
+- Retry-After (ثانیه یا تاریخ HTTP) تا آن زمان همه‌ی درخواست‌های آن میزبان را نگه می‌دارد
+"""
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+THROTTLE_STATUSES = (429, 503)
+
+
+def parse_retry_after(value, now=None):
+    """مقدار هدر Retry-After -> ثانیه (None اگر نامعتبر باشد)."""
+    if value is None:
+        return None
+    value = str(value).strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - (time.time() if now is None else now))
+
+
+class _Bucket:
+    __slots__ = ('rate', 'tokens', 'last', 'blocked_until')
+
+    def __init__(self, rate, tokens, now):
+        self.rate = rate
+        self.tokens = tokens
+        self.last = now
+        self.blocked_until = 0.0
+
+
+class PolitenessScheduler:
+    def __init__(self, rate=1.0, min_rate=0.2, max_rate=4.0, burst=1, fast=1.0,
+                 increase=0.1, decrease=0.5, max_retry_after=120, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.burst = burst
+        self.fast = fast
+        self.increase = increase
+        self.decrease = decrease
+        self.max_retry_after = max_retry_after
+        self.clock = clock
+        self.sleep = sleep
+        self._lock = threading.Lock()
+        self._buckets = {}
+        self.stats = {'requests': 0, 'waited': 0.0, 'throttled': 0, 'errors': 0}
+
+    def _bucket(self, host, now):
+        b = self._buckets.get(host)
+        if b is None:
+            b = self._buckets[host] = _Bucket(self.rate, self.burst, now)
+        return b
+
+    def rate_for(self, url):
+        b = self._buckets.get(urlparse(url).netloc)
+        return b.rate if b else self.rate
+
+    def wait(self, url):
+        """یک نوبت برای میزبان url رزرو می‌کند و تا رسیدنش صبر می‌کند؛ مدت انتظار را برمی‌گرداند."""
+        host = urlparse(url).netloc
+        with self._lock:
+            now = self.clock()
+            b = self._bucket(host, now)
+            # در زمان مسدودی (Retry-After) سطل پر نمی‌شود؛ نوبت‌ها از پایان مسدودی شمرده می‌شوند
+            start = max(now, b.blocked_until, b.last)
+            b.tokens = min(self.burst, b.tokens + (start - b.last) * b.rate)
+            b.last = start
+            # توکن منفی یعنی نوبت‌های رزروشده‌ی نخ‌های دیگر که هنوز نرسیده‌اند
+            b.tokens -= 1
+            delay = start - now + (-b.tokens / b.rate if b.tokens < 0 else 0.0)
+            self.stats['requests'] += 1
+            self.stats['waited'] += delay
+        if delay > 0:
+            self.sleep(delay)
+        return delay
+
+    def feedback(self, url, status=None, elapsed=None, retry_after=None, error=False):
+        """نتیجه‌ی درخواست: status کد HTTP، elapsed ثانیه، retry_after مقدار هدر، error خطای شبکه."""
+        host = urlparse(url).netloc
+        with self._lock:
+            now = self.clock()
+            b = self._bucket(host, now)
+            if error or (status is not None and status >= 500) or status in THROTTLE_STATUSES:
+                b.rate = max(self.min_rate, b.rate * self.decrease)
+                self.stats['errors' if error else 'throttled'] += 1
+            elif status is not None and status < 400 and elapsed is not None and elapsed < self.fast:
+                b.rate = min(self.max_rate, b.rate + self.increase)
+            wait = parse_retry_after(retry_after) if status in THROTTLE_STATUSES else None
+            if wait:
+                b.blocked_until = max(b.blocked_until, now + min(wait, self.max_retry_after))
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+"""
+ایندکس جستجوی صفحه کتابخانه که موقع ساخت (Generate HTML) محاسبه می‌شود.
+
+برای هر کتاب یک کلید جستجو از همان فیلدهایی که صفحه جستجو می‌کند ساخته می‌شود
+(نرمال‌شده با persian_text.search_key) و ایندکس معکوس سه‌حرفی (trigram) از آن:
+هر سه‌حرفی -> فهرست مرتب شماره‌ی کتاب‌ها. فهرست‌ها به صورت فاصله‌ای (delta) ذخیره
+می‌شوند تا JSON کوچک‌تر شود. خود کلیدها فرستاده نمی‌شوند؛ مرورگر آن‌ها را با searchText
+از کتاب‌های صفحه می‌سازد (همان فیلدها و همان جدول نرمال‌سازی).
+
+مرورگر برای عبارت‌های سه حرفی به بالا اشتراک فهرست سه‌حرفی‌های عبارت را می‌گیرد و فقط
+همان کاندیداها را با includes بررسی می‌کند؛ نتیجه دقیقاً همان جستجوی زیررشته‌ای قبلی است.
+"""
+import json
+
+from persian_text import search_key
+
+GRAM = 3
+
+# ترتیب باید با searchText در قالب HTML یکی باشد
+SEARCH_FIELDS = ['title_main', 'title_sub', 'author', 'publisher', 'translator', 'year', 'pages', 'code']
+
+
+def search_text(book):
+    return search_key(' '.join(str(book.get(f) or '') for f in SEARCH_FIELDS))
+
+
+def grams(text, n=GRAM):
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+def build_index(books, n=GRAM):
+    """
+    {'n': n, 'grams': {سه‌حرفی: [فاصله‌ی شماره‌ی کتاب‌ها]}} برای books به همان ترتیب.
+    """
+    postings = {}
+    for i, book in enumerate(books):
+        for g in grams(search_text(book), n):
+            postings.setdefault(g, []).append(i)
+
+    encoded = {}
+    for g, ids in postings.items():
+        prev = 0
+        deltas = []
+        for i in ids:
+            deltas.append(i - prev)
+            prev = i
+        encoded[g] = deltas
+    return {'n': n, 'grams': encoded}
+
+
+def dumps(index):
+    return json.dumps(index, ensure_ascii=False, separators=(',', ':'))
@@ -0,0 +1,223 @@
+# -*- coding: utf-8 -*-
+"""
+خواندن داده‌ی ساخت‌یافته‌ی صفحه کتاب (schema.org JSON-LD، microdata و OpenGraph) مستقیماً از
+HTML خام با چند regex، بدون ساختن درخت DOM (مشترک بین خزنده‌ها).
+
+- scan_html فقط یک بار روی متن صفحه اجرا می‌شود: items = هر شیء Book/Product در بلوک‌های
+  ld+json (تو در تو هم، مثل workExample) و یک شیء از ویژگی‌های itemprop؛ meta = تگ‌های og:/book:
+- کلیدهای خروجی یکسان‌اند (title، image_url، author، translator، publisher، pages، isbn، language،
+  year_fa، year_en، price)؛ سال با بازه‌اش شمسی یا میلادی حساب می‌شود
+- pick_book نسخه‌ی همان شابک را برمی‌گرداند؛ فقط در صفحه‌ی تک‌کتاب (only=True) شیء بدون شابک و
+  تگ‌های meta هم قبول می‌شوند چون در صفحه‌ی چندنسخه‌ای معلوم نیست مال کدام نسخه‌اند
+- هر مقداری که اینجا نباشد را خزنده با پیمایش DOM پیدا می‌کند؛ PathStats زمان و تعداد هر دو مسیر را
+  می‌شمارد
+
+بنچمارک: bench_structured.py
+"""
+import html
+import json
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+from persian_text import digits_only, normalize_isbn, to_ascii_digits
+
+BOOK_TYPES = {'Book', 'Product', 'CreativeWork'}
+# ویژگی schema.org -> کلید خروجی (JSON-LD و microdata)
+SCHEMA_FIELDS = {
+    'name': 'title',
+    'image': 'image_url',
+    'author': 'author',
+    'translator': 'translator',
+    'publisher': 'publisher',
+    'numberOfPages': 'pages',
+    'isbn': 'isbn',
+    'inLanguage': 'language',
+    'datePublished': 'year',
+    'price': 'price',
+}
+META_FIELDS = {
+    'og:title': 'title',
+    'og:image': 'image_url',
+    'book:isbn': 'isbn',
+    'book:release_date': 'year',
+    'product:price:amount': 'price',
+}
+
+_LD_JSON = re.compile(r'<script\b[^>]*type\s*=\s*["\']?application/ld\+json["\']?[^>]*>(.*?)</script>',
+                      re.IGNORECASE | re.DOTALL)
+_META = re.compile(r'<meta\b[^>]*>', re.IGNORECASE)
+_ITEMPROP = re.compile(r'<([a-zA-Z][\w-]*)\b([^>]*\bitemprop\s*=[^>]*)>([^<]*)', re.IGNORECASE)
+_ATTR = re.compile(r'([\w:-]+)\s*=\s*(?:"([^"]*)"|\'([^\']*)\'|([^\s"\'>]+))')
+_YEAR = re.compile(r'(?<![0-9])([0-9]{4})(?![0-9])')
+_PRICE = re.compile(r'[0-9][0-9,]*')
+
+
+def _attrs(text):
+    return {m.group(1).lower(): html.unescape(m.group(2) or m.group(3) or m.group(4) or '')
+            for m in _ATTR.finditer(text)}
+
+
+def _text(value):
+    """مقدار JSON-LD (رشته، لیست یا شیء با name/url) -> رشته؛ چند مقدار با '، ' جدا می‌شوند."""
+    if isinstance(value, dict):
+        value = value.get('name') or value.get('url') or value.get('contentUrl') or ''
+    if isinstance(value, list):
+        return '، '.join(t for t in (_text(v) for v in value) if t)
+    return html.unescape(str(value)).strip() if value is not None else ''
+
+
+def _clean(raw):
+    """{کلید خروجی: مقدار خام} -> مقدارهای نرمال‌شده؛ مقدار خالی حذف می‌شود."""
+    out = {}
+    for key, value in raw.items():
+        if key == 'image_url' and isinstance(value, list):
+            value = value[0] if value else ''
+        text = _text(value)
+        if key == 'pages':
+            text = digits_only(text)
+        elif key == 'isbn':
+            text = normalize_isbn(text)
+        elif key == 'price':
+            m = _PRICE.search(to_ascii_digits(text))
+            text = m.group().replace(',', '') if m else ''
+        elif key == 'year':
+            m = _YEAR.search(to_ascii_digits(text))
+            if not m:
+                continue
+            year = int(m.group(1))
+            key = 'year_fa' if 1250 <= year <= 1500 else 'year_en' if 1800 <= year <= 2100 else None
+            if key is None:
+                continue
+            text = m.group(1)
+        if text:
+            out.setdefault(key, text)
+    return out
+
+
+def _ld_nodes(data):
+    """همه‌ی شیءهای کتاب در یک بلوک JSON-LD (لیست، @graph و شیءهای تو در تو) به ترتیب متن."""
+    if isinstance(data, list):
+        for item in data:
+            yield from _ld_nodes(item)
+    elif isinstance(data, dict):
+        kind = data.get('@type')
+        kinds = set(kind) if isinstance(kind, list) else {kind}
+        if kinds & BOOK_TYPES:
+            yield data
+        for value in data.values():
+            if isinstance(value, (list, dict)):
+                yield from _ld_nodes(value)
+
+
+def _ld_fields(node):
+    raw = {out: node.get(prop) for prop, out in SCHEMA_FIELDS.items() if node.get(prop)}
+    offers = node.get('offers')
+    if 'price' not in raw and offers:
+        offer = offers[0] if isinstance(offers, list) and offers else offers
+        if isinstance(offer, dict) and offer.get('price') is not None:
+            raw['price'] = offer['price']
+    if 'isbn' not in raw and node.get('gtin13'):
+        raw['isbn'] = node['gtin13']
+    return _clean(raw)
+
+
+def scan_html(text):
+    """{'items': [کلیدهای هر کتاب]، 'meta': کلیدهای og/book} از HTML خام."""
+    items, meta = [], {}
+    if not text:
+        return {'items': items, 'meta': meta}
+
+    if 'ld+json' in text:
+        for block in _LD_JSON.finditer(text):
+            try:
+                data = json.loads(block.group(1).strip())
+            except ValueError:
+                continue
+            items.extend(f for f in (_ld_fields(node) for node in _ld_nodes(data)) if f)
+
+    # microdata: اولین مقدار هر ویژگی (content/src/href یا متن مستقیم تگ)؛ ویژگی‌ای که خودش
+    # itemscope است (نویسنده به شکل Person) اینجا خوانده نمی‌شود
+    if 'itemprop' in text:
+        raw = {}
+        for m in _ITEMPROP.finditer(text):
+            attrs = _attrs(m.group(2))
+            out = SCHEMA_FIELDS.get(attrs.get('itemprop', ''))
+            if not out or out in raw or 'itemscope' in m.group(2).lower():
+                continue
+            value = attrs.get('content') or attrs.get('src') or attrs.get('href') or m.group(3)
+            if value and value.strip():
+                raw[out] = html.unescape(value)
+        fields = _clean(raw)
+        if fields:
+            items.append(fields)
+
+    raw = {}
+    for m in _META.finditer(text):
+        attrs = _attrs(m.group()[5:-1])
+        out = META_FIELDS.get(attrs.get('property') or attrs.get('name') or '')
+        if out and out not in raw and attrs.get('content', '').strip():
+            raw[out] = attrs['content']
+    meta.update(_clean(raw))
+    return {'items': items, 'meta': meta}
+
+
+def pick_book(found, isbn=None, only=True):
+    """
+    کلیدهای کتاب همین شابک از خروجی scan_html. only: صفحه فقط یک کتاب دارد، پس شیء بدون شابک
+    (یا اولین شیء اگر شابکی داده نشده) و meta صفحه هم قبول است. کلیدهای هر شیء اول می‌آیند.
+    """
+    if not found:
+        return {}
+    clean = normalize_isbn(isbn)
+    items = found['items']
+    chosen = next((item for item in items if clean and item.get('isbn') == clean), None)
+    if chosen is None and only:
+        chosen = next((item for item in items if not clean or not item.get('isbn')), None)
+    out = dict(chosen or {})
+    # شیءهای دیگر بدون شابک (مثلاً microdata کنار JSON-LD) کمبود همان کتاب را پر می‌کنند
+    if only:
+        for item in items:
+            if item is not chosen and not (item.get('isbn') and item.get('isbn') != out.get('isbn')):
+                for key, value in item.items():
+                    out.setdefault(key, value)
+        for key, value in found['meta'].items():
+            out.setdefault(key, value)
+    return out
+
+
+def extract(text, isbn=None, only=True):
+    return pick_book(scan_html(text), isbn, only)
+
+
+class PathStats:
+    """
+    تعداد، زمان و ستون‌های پرشده‌ی هر مسیر استخراج: structured (داده‌ی ساخت‌یافته) و dom (پیمایش
+    صفحه)؛ skipped یعنی آن مسیر لازم نشد. بین نخ‌ها مشترک است.
+    """
+    PATHS = ('structured', 'dom')
+
+    def __init__(self):
+        self.stats = {path: {'calls': 0, 'skipped': 0, 'seconds': 0.0, 'fields': 0} for path in self.PATHS}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def timed(self, path):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.stats[path]['calls'] += 1
+                self.stats[path]['seconds'] += elapsed
+
+    def count(self, path, key, n=1):
+        with self._lock:
+            self.stats[path][key] += n
+
+    def summary(self):
+        return ' | '.join(
+            f"{path}: {s['calls']} بار، {s['seconds'] * 1000:.0f} ms، {s['fields']} ستون، لازم نشد {s['skipped']}"
+            for path, s in self.stats.items())
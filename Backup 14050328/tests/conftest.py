@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""
+مسیر ماژول‌ها برای آزمون‌ها (پوشه‌ی خزنده‌ها و Gisoom) و سرور HTTP محلی به جای سایت‌ها.
+
+    python -m pytest -q tests
+"""
+import importlib.util
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in (ROOT, os.path.join(ROOT, "Gisoom")):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+
+def load_generator():
+    """Generate HTML Ver2.1.py (نام فایل فاصله دارد و import عادی نمی‌شود)."""
+    spec = importlib.util.spec_from_file_location("generate_html", os.path.join(ROOT, "Generate HTML Ver2.1.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class StubServer:
+    """
+    سرور محلی: handle(method, path, body) -> (status، نوع محتوا، بدنه‌ی bytes[، هدرهای اضافه]).
+    requests همه‌ی درخواست‌ها را نگه می‌دارد (هدرهایشان به همان ترتیب در headers) و peak بیشترین
+    درخواست هم‌زمان است.
+    """
+
+    def __init__(self, handle):
+        self.handle = handle
+        self.requests = []
+        self.headers = []
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _serve(self, method):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else b""
+                with stub._lock:
+                    stub.requests.append((method, self.path))
+                    stub.headers.append(dict(self.headers))
+                    stub.active += 1
+                    stub.peak = max(stub.peak, stub.active)
+                try:
+                    status, kind, data, *extra = stub.handle(method, self.path, body)
+                finally:
+                    with stub._lock:
+                        stub.active -= 1
+                self.send_response(status)
+                self.send_header("Content-Type", kind)
+                for name, value in (extra[0] if extra else {}).items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                self._serve("GET")
+
+            def do_POST(self):
+                self._serve("POST")
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def stub_server():
+    servers = []
+
+    def start(handle):
+        server = StubServer(handle).__enter__()
+        servers.append(server)
+        return server
+    yield start
+    for server in servers:
+        server.__exit__(None, None, None)
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""cover_cache.build_covers در برابر سرور محلی: دانلود از راه ImageFetcher و politeness، بندانگشتی‌ها و کش."""
+import io
+import time
+
+import pytest
+
+Image = pytest.importorskip("PIL.Image")
+
+import cover_cache
+from image_fetch import ImageFetcher
+from politeness import PolitenessScheduler
+
+FORMATS = cover_cache.available_formats(["webp"])
+pytestmark = pytest.mark.skipif(not FORMATS, reason="Pillow بدون پشتیبانی WebP")
+
+
+def png(width, height, color):
+    out = io.BytesIO()
+    Image.new("RGB", (width, height), color).save(out, format="PNG")
+    return out.getvalue()
+
+
+def cover_handler():
+    covers = {f"/img/{i}.png": png(300, 450, (i * 40, 0, 0)) for i in range(4)}
+
+    def handle(method, path, body):
+        time.sleep(0.02)
+        if path in covers:
+            return 200, "image/png", covers[path]
+        if path == "/img/error-page":
+            return 200, "text/html", b"<html>not found</html>"
+        return 404, "text/plain", b"not found"
+    return handle
+
+
+def build(server, tmp_path, sources, scheduler):
+    fetcher = ImageFetcher(str(tmp_path / "cache"), cover_cache.HEADERS, workers=2, scheduler=scheduler,
+                           log=lambda _: None)
+    try:
+        return cover_cache.build_covers(sources, fetcher, str(tmp_path / "covers"), [120, 240], FORMATS)
+    finally:
+        fetcher.close()
+
+
+def test_downloads_go_through_fetcher_and_scheduler(stub_server, tmp_path):
+    server = stub_server(cover_handler())
+    local = tmp_path / "local.png"
+    local.write_bytes(png(200, 300, (0, 0, 200)))
+    urls = [f"{server.url}/img/{i}.png" for i in range(4)]
+    sources = urls + [urls[0], f"{server.url}/img/error-page", f"{server.url}/missing.png", str(local), ""]
+    scheduler = PolitenessScheduler(rate=100.0, max_rate=100.0, burst=10)
+
+    keys, files = build(server, tmp_path, sources, scheduler)
+
+    assert all(keys[:5]) and keys[4] == keys[0]
+    assert keys[5:] == ["", "", keys[7], ""] and keys[7]
+    assert len(set(keys[:4] + [keys[7]])) == 5
+    assert len(files) == 5 * 2
+    assert all((tmp_path / "covers" / name).exists() for name in files)
+    # هر لینک یکتا یک بار، همه با نوبت scheduler و حداکثر workers هم‌زمان
+    assert len(server.requests) == 6
+    assert scheduler.stats["requests"] == 6
+    assert 1 <= server.peak <= 2
+
+
+def test_second_build_uses_downloaded_files(stub_server, tmp_path):
+    server = stub_server(cover_handler())
+    sources = [f"{server.url}/img/{i}.png" for i in range(4)]
+    first, _ = build(server, tmp_path, sources, PolitenessScheduler(rate=100.0, burst=10))
+    server.requests.clear()
+
+    second, files = build(server, tmp_path, sources, PolitenessScheduler(rate=100.0, burst=10))
+
+    assert second == first
+    assert server.requests == []
+    assert len(files) == 4 * 2
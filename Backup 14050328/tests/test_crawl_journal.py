@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+"""CrawlJournal: فقط افزودنی؛ reset رویداد restart می‌نویسد و وضعیت‌های قبل از آن نادیده گرفته می‌شوند."""
+import sqlite3
+
+from crawl_journal import CrawlJournal
+
+
+def test_reset_keeps_history_but_forgets_state(tmp_path):
+    path = str(tmp_path / "journal.sqlite")
+    journal = CrawlJournal(path, "gisoom")
+    other = CrawlJournal(path, "iranketab")
+    journal.record("9786001234567", "searched")
+    journal.record("9786001234567", "written")
+    other.record("9786001234567", "written")
+
+    journal.reset()
+
+    assert journal.states() == {}
+    assert not CrawlJournal.done(journal.states().get("9786001234567"), "written")
+    assert CrawlJournal.done(other.states()["9786001234567"], "written")
+    rows = sqlite3.connect(path).execute("SELECT COUNT(*) FROM events").fetchone()[0]
+    assert rows == 4
+
+    journal.record("9786001234568", "parsed", detail={"title": "عنوان"})
+    assert list(journal.states()) == ["9786001234568"]
+    assert CrawlJournal.parsed(journal.states()["9786001234568"]) == {"title": "عنوان"}
+    assert journal.summary()["parsed"] == (1, 0)
+    journal.close()
+    other.close()
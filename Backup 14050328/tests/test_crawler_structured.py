@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""ایران‌کتاب: کارت نسخه برای عنوان/نویسنده/ناشر/سال برنده است و داده‌ی ساخت‌یافته فقط جای خالی را پر می‌کند."""
+import importlib.util
+import json
+import os
+
+import pytest
+
+from conftest import ROOT
+from structured_data import scan_html
+
+ISBN = "9786001234567"
+
+
+def row(label, value):
+    return f'<div class="flex gap-1"><span>{label}:</span><span>{value}</span></div>'
+
+
+def page(ld_node, card_author=True):
+    author = ('<div class="flex gap-1"><span>نویسنده:</span><a href="/profile/a1">نویسنده کارت</a></div>'
+              if card_author else "")
+    card = (
+        '<div id="p-40001" class="card">'
+        '<div class="flex"><img itemprop="image" src="/Images/ProductImages/1.jpg"></div>'
+        '<h2>کتاب عنوان کارت</h2><div>زیرعنوان</div>'
+        f'{author}'
+        '<div class="flex gap-1"><span>انتشارات:</span><a href="/publisher/1">ناشر کارت</a></div>'
+        f'<div class="absolute">{row("شابک", "978-600-123-456-7")}{row("تعداد صفحه", 320)}'
+        f'{row("سال انتشار شمسی", 1401)}</div></div>')
+    head = ('<meta property="og:title" content="کتاب عنوان صفحه">'
+            f'<script type="application/ld+json">{json.dumps(ld_node, ensure_ascii=False)}</script>')
+    return f"<html><head>{head}</head><body><div class='container'>{card}</div></body></html>"
+
+
+@pytest.fixture
+def crawler(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    spec = importlib.util.spec_from_file_location("book_crawler", os.path.join(ROOT, "Book_Crowler Ver2.4.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    module.log = lambda msg: None
+    return module
+
+
+def details(crawler, html):
+    soup = crawler.parse_html(html)
+    index = crawler.build_edition_index(soup)
+    index["structured"] = scan_html(html)
+    div = crawler.get_book_div_from_page("", soup, ISBN, index)
+    return crawler.extract_details_from_div(div, soup, ISBN, crawler.structured_details(index, ISBN))
+
+
+def test_card_wins_over_product_without_isbn(crawler):
+    # Product بدون شابک (مثلاً کتاب پیشنهادی) که pick_book در صفحه‌ی تک‌کتاب قبول می‌کند
+    other = {"@type": "Product", "name": "کتاب دیگر", "author": {"name": "نویسنده دیگر"},
+             "publisher": {"name": "ناشر دیگر"}, "datePublished": "1395"}
+
+    info = details(crawler, page(other))
+
+    assert info["عنوان اصلی"] == "عنوان کارت"
+    assert info["نویسنده"] == "نویسنده کارت"
+    assert info["ناشر"] == "ناشر کارت"
+    assert info["سال انتشار شمسی"] == "1401"
+
+
+def test_structured_fills_only_missing_columns(crawler):
+    node = {"@type": "Book", "name": "عنوان دیگر", "isbn": ISBN, "author": {"name": "نویسنده ساخت‌یافته"},
+            "translator": {"name": "مترجم ساخت‌یافته"}, "numberOfPages": "320"}
+
+    info = details(crawler, page(node, card_author=False))
+
+    assert info["عنوان اصلی"] == "عنوان کارت"
+    assert info["نویسنده"] == "نویسنده ساخت‌یافته"
+    assert info["مترجم"] == "مترجم ساخت‌یافته"
+    assert info["صفحات"] == "320"
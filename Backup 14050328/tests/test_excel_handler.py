@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""ExcelBatchWriter گیسوم: ردیف‌ها تا ذخیره‌ی موفق می‌مانند و خطای اصلی با شکست ذخیره پوشانده نمی‌شود."""
+import openpyxl
+import pytest
+
+from excel_handler import ExcelBatchWriter
+
+
+def workbook(tmp_path):
+    path = str(tmp_path / "books.xlsx")
+    wb = openpyxl.Workbook()
+    wb.active.append(["شابک", "عنوان اصلی"])
+    wb.active.append(["9786001234567", None])
+    wb.save(path)
+    return path
+
+
+def locked_save(writer, failures):
+    """wb.save که failures بار اول PermissionError می‌دهد (فایل در Excel باز است)."""
+    save = writer.wb.save
+    calls = []
+
+    def attempt(path):
+        calls.append(path)
+        if len(calls) <= failures:
+            raise PermissionError("locked")
+        save(path)
+    writer.wb.save = attempt
+    return calls
+
+
+def test_failed_save_keeps_rows_for_the_next_flush(tmp_path):
+    path = workbook(tmp_path)
+    saved = []
+    writer = ExcelBatchWriter(path, flush_every=10, on_flush=saved.extend).open()
+    locked_save(writer, failures=1)
+    writer.update(2, {"title": "عنوان"})
+
+    with pytest.raises(PermissionError):
+        writer.flush()
+    assert writer.pending and saved == []
+
+    assert writer.flush() == 1
+    assert writer.pending == {} and saved == [2]
+    assert openpyxl.load_workbook(path).active.cell(row=2, column=2).value == "عنوان"
+
+
+def test_exit_keeps_the_original_exception(tmp_path):
+    path = workbook(tmp_path)
+
+    with pytest.raises(KeyError):
+        with ExcelBatchWriter(path) as writer:
+            locked_save(writer, failures=5)
+            writer.update(2, {"title": "عنوان"})
+            raise KeyError("crawl failed")
+
+    assert writer.pending
+
+
+def test_exit_saves_pending_rows(tmp_path):
+    path = workbook(tmp_path)
+
+    with ExcelBatchWriter(path) as writer:
+        writer.update(2, {"title": "عنوان"})
+
+    assert openpyxl.load_workbook(path).active.cell(row=2, column=2).value == "عنوان"
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""read_columns باید همان مقادیر pd.read_excel را بدهد (شابک عددی، سلول خالی، متن) تا مسیر کاورها عوض نشود."""
+
+import openpyxl
+import pandas as pd
+import pytest
+
+from conftest import load_generator
+import excel_ingest
+
+SHEET = "کتابخانه"
+HEADER = ["شابک", "عنوان اصلی", "کد", "سال انتشار شمسی"]
+ROWS = [
+    [9786001234567, "الف", 12, 1401],
+    [None, "ب", None, None],
+    ["978-600-123-456-9", "ج", 13.0, "۱۴۰۲"],
+    [9786001234568.0, "د", 14, 1399.0],
+    [9786001234570, "ه", 15.5, 1400],
+]
+
+
+def write_workbook(path, rows):
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = SHEET
+    ws.append(HEADER)
+    for row in rows:
+        ws.append(row)
+    wb.save(path)
+    return str(path)
+
+
+@pytest.mark.parametrize("rows", [ROWS, [r for r in ROWS if not isinstance(r[0], str)]],
+                         ids=["mixed_isbn", "numeric_isbn_with_blank"])
+def test_books_match_read_excel(tmp_path, rows):
+    gen = load_generator()
+    path = write_workbook(tmp_path / "lib.xlsx", rows)
+
+    old = gen.build_books(pd.read_excel(path, sheet_name=SHEET))
+    new = gen.build_books(excel_ingest.read_columns(path, SHEET, HEADER, engine="openpyxl"))
+
+    assert new == old
+    # ستون شابک متنی/مخلوط همان‌طور که pandas می‌داد بدون .0 است
+    if rows is ROWS:
+        assert [book["isbn"] for book in new] == ["9786001234567", "", "9786001234569", "9786001234568",
+                                                  "9786001234570"]
+        assert new[0]["image_path"].endswith("/9786001234567.jpg")
+
+
+def test_calamine_rows_match_openpyxl(tmp_path):
+    pytest.importorskip("python_calamine")
+    path = write_workbook(tmp_path / "lib.xlsx", ROWS)
+
+    calamine = excel_ingest.read_columns(path, SHEET, HEADER, engine="calamine")
+    openpyxl_rows = excel_ingest.read_columns(path, SHEET, HEADER, engine="openpyxl")
+
+    pd.testing.assert_frame_equal(calamine, openpyxl_rows)
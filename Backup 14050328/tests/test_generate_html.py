@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+"""Generate HTML: پاک‌سازی shardهای کهنه در هر دو حالت SHARD_OUTPUT."""
+import os
+
+from conftest import load_generator
+
+
+def touch(path):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("{}")
+
+
+def test_write_shards_replaces_previous_build(tmp_path):
+    gen = load_generator()
+    shard_dir = tmp_path / gen.SHARD_DIR
+    shard_dir.mkdir()
+    touch(shard_dir / "books-1.0000000000.json")
+    books = [{"title_main": f"کتاب {i}"} for i in range(gen.FIRST_SHARD_SIZE + 3)]
+
+    _, urls, _, written = gen.write_shards(books, str(tmp_path))
+
+    assert sorted(os.listdir(shard_dir)) == sorted(os.path.basename(p) for p in written)
+    assert len(urls) == 1
+
+
+def test_prune_shards_without_sharding_removes_the_directory(tmp_path):
+    gen = load_generator()
+    shard_dir = tmp_path / gen.SHARD_DIR
+    shard_dir.mkdir()
+    touch(shard_dir / "books-1.0000000000.json")
+    touch(shard_dir / "search.0000000000.json.gz")
+
+    gen.prune_shards(str(tmp_path))
+
+    assert not shard_dir.exists()
+
+
+def test_prune_shards_leaves_unrelated_files(tmp_path):
+    gen = load_generator()
+    shard_dir = tmp_path / gen.SHARD_DIR
+    shard_dir.mkdir()
+    touch(shard_dir / "books-1.0000000000.json")
+    touch(shard_dir / "notes.txt")
+
+    gen.prune_shards(str(tmp_path))
+
+    assert os.listdir(shard_dir) == ["notes.txt"]
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+"""iter_lookups گیسوم در برابر سرور محلی: ترتیب ردیف‌ها، سقف هم‌زمانی و لغو با توقف."""
+import json
+import re
+import time
+
+from gisoom_crawler import GisoomCrawler
+from main import iter_lookups, journal_path
+
+ISBNS = [f"978600{i:07d}" for i in range(12)]
+
+
+def gisoom_handler(delay):
+    def handle(method, path, body):
+        search = re.match(r"/search/book/isbn-(\d+)/", path)
+        if method == "POST" and search:
+            isbn = search.group(1)
+            # شابک‌های اول کندترند تا نتیجه‌ها خارج از ترتیب آماده شوند
+            time.sleep(delay(isbn))
+            item = [{"gid": int(isbn[-4:]) + 1, "isbn": isbn, "name": f"کتاب {isbn}", "author": "نویسنده",
+                     "nasher": "ناشر", "sal": "۱۴۰۱", "nobat": "1"}]
+            html = f"<div class='hide searchresult'>{json.dumps(item, ensure_ascii=False)}</div>"
+            return 200, "text/html; charset=utf-8", html.encode("utf-8")
+        page = re.match(r"/book/(\d+)/", path)
+        if method == "GET" and page:
+            html = (f'<html><head><meta property="og:title" content="کتاب عنوان {page.group(1)}"></head>'
+                    f"<body><p>تعداد صفحات: 320</p></body></html>")
+            return 200, "text/html; charset=utf-8", html.encode("utf-8")
+        return 404, "text/plain", b"not found"
+    return handle
+
+
+def jobs_for(isbns, required=("title", "pages")):
+    return [(row, f"c{row}", isbn, list(required)) for row, isbn in enumerate(isbns, start=2)]
+
+
+def test_rows_keep_order_and_concurrency_is_capped(stub_server):
+    server = stub_server(gisoom_handler(lambda isbn: 0.05 if int(isbn[-2:]) < 4 else 0.01))
+    crawler = GisoomCrawler(base_url=server.url, requests_per_second=None)
+    jobs = jobs_for(ISBNS)
+
+    results = list(iter_lookups(crawler, jobs, max_workers=3))
+
+    assert [job for job, _ in results] == jobs
+    assert all(status == "ok" for _, (status, _) in results)
+    assert [data["isbn_found"] for _, (_, data) in results] == ISBNS
+    assert all(data["pages"] == "320" for _, (_, data) in results)
+    assert 1 < server.peak <= 3
+    assert crawler.stats["searches"] == len(ISBNS)
+
+
+def test_sequential_mode_sends_one_request_at_a_time(stub_server):
+    server = stub_server(gisoom_handler(lambda isbn: 0.01))
+    crawler = GisoomCrawler(base_url=server.url, requests_per_second=None)
+    jobs = jobs_for(ISBNS[:4])
+
+    results = list(iter_lookups(crawler, jobs, max_workers=1))
+
+    assert [job for job, _ in results] == jobs
+    assert server.peak == 1
+
+
+def test_stopping_early_cancels_queued_lookups(stub_server):
+    server = stub_server(gisoom_handler(lambda isbn: 0.05))
+    crawler = GisoomCrawler(base_url=server.url, requests_per_second=None)
+    results = iter_lookups(crawler, jobs_for(ISBNS * 5), max_workers=2)
+
+    next(results)
+    results.close()
+
+    searches = [path for method, path in server.requests if method == "POST"]
+    # فقط پنجره‌ی ارسال‌شده (دو برابر max_workers) اجرا شد، نه هر 60 شابک
+    assert len(searches) <= 4
+
+
+def test_journal_lives_next_to_the_workbook(tmp_path, monkeypatch):
+    workbook = tmp_path / "library" / "Parsa Library.xlsx"
+    monkeypatch.chdir(tmp_path)
+
+    assert journal_path(str(workbook)) == str(tmp_path / "library" / "crawl_journal.sqlite")
+    assert journal_path("Parsa Library.xlsx") == str(tmp_path / "crawl_journal.sqlite")
+    assert journal_path(str(workbook), str(tmp_path / "j.sqlite")) == str(tmp_path / "j.sqlite")
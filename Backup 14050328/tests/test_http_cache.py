@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+"""ResponseCache: حذف قدیمی‌ترین ورودی‌ها بدون حذف ورودی تازه، و ساخته نشدن کش هنگام import خزنده."""
+import importlib.util
+import os
+
+from conftest import ROOT
+from http_cache import ResponseCache
+
+
+def test_eviction_keeps_the_entry_just_written(tmp_path):
+    cache = ResponseCache(str(tmp_path / "c.sqlite"), max_bytes=1000)
+    cache.put("https://a/1", "https://a/1", "x" * 400)
+    cache.put("https://a/2", "https://a/2", "x" * 400)
+    # خود ورودی تازه از 90٪ سقف بزرگ‌تر است؛ قبلاً همین ورودی هم حذف می‌شد
+    cache.put("https://a/3", "https://a/3", "x" * 950)
+
+    assert cache.get("https://a/3")["text"] == "x" * 950
+    assert cache.get("https://a/1") is None
+    assert cache.get("https://a/2") is None
+    cache.close()
+
+
+def test_eviction_drops_least_recently_used_first(tmp_path):
+    cache = ResponseCache(str(tmp_path / "c.sqlite"), max_bytes=1000)
+    cache.put("https://a/1", "https://a/1", "x" * 300)
+    cache.put("https://a/2", "https://a/2", "x" * 300)
+    cache.get("https://a/1")
+    cache.put("https://a/3", "https://a/3", "x" * 500)
+
+    assert cache.get("https://a/2") is None
+    assert cache.get("https://a/1") is not None
+    assert cache.get("https://a/3") is not None
+    cache.close()
+
+
+def test_importing_crawler_does_not_create_cache(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    spec = importlib.util.spec_from_file_location("book_crawler", os.path.join(ROOT, "Book_Crowler Ver2.4.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+
+    assert not os.path.exists(module.CACHE_FILE)
+    cache = module.get_cache()
+    assert cache is module.get_cache()
+    assert os.path.exists(module.CACHE_FILE)
+    cache.close()
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""ImageFetcher در برابر سرور محلی: ادامه‌ی دانلود با Range، تصویر بریده‌شده، 416 و خطای دیسک."""
+import io
+import os
+import re
+
+import pytest
+
+Image = pytest.importorskip("PIL.Image")
+
+from image_fetch import ImageFetcher, image_size
+
+ISBN = "9786001234567"
+
+
+def jpeg():
+    out = io.BytesIO()
+    Image.effect_noise((300, 450), 64).convert("RGB").save(out, format="JPEG", quality=90)
+    return out.getvalue()
+
+
+COVER = jpeg()
+
+
+def cover_handler(server_ref, start_override=None):
+    """Range را با 206 پاسخ می‌دهد؛ start_override بازه‌ای غیر از بازه‌ی خواسته‌شده می‌فرستد."""
+    def handle(method, path, body):
+        asked = re.match(r"bytes=(\d+)-", server_ref[0].headers[-1].get("Range", ""))
+        if not asked:
+            return 200, "image/jpeg", COVER
+        start = int(asked.group(1)) if start_override is None else start_override
+        return 206, "image/jpeg", COVER[start:], {
+            "Content-Range": f"bytes {start}-{len(COVER) - 1}/{len(COVER)}"}
+    return handle
+
+
+def start(stub_server, make_handler):
+    ref = []
+    ref.append(stub_server(make_handler(ref)))
+    return ref[0]
+
+
+def make_fetcher(tmp_path):
+    return ImageFetcher(str(tmp_path), {"User-Agent": "test"}, workers=1, log=lambda _: None)
+
+
+def test_truncated_jpeg_is_not_a_valid_image(tmp_path):
+    path = tmp_path / "cut.jpg"
+    path.write_bytes(COVER[:len(COVER) // 3])
+
+    assert image_size(str(path)) is None
+
+
+def test_resume_appends_matching_range(stub_server, tmp_path):
+    server = start(stub_server, cover_handler)
+    fetcher = make_fetcher(tmp_path)
+    (tmp_path / f"{ISBN}.jpg.part").write_bytes(COVER[:1000])
+
+    path = fetcher.fetch(ISBN, f"{server.url}/c.jpg")
+
+    assert server.headers[0]["Range"] == "bytes=1000-"
+    assert open(path, "rb").read() == COVER
+    fetcher.close()
+
+
+def test_mismatched_content_range_rewrites_from_scratch(stub_server, tmp_path):
+    server = start(stub_server, lambda ref: cover_handler(ref, start_override=0))
+    fetcher = make_fetcher(tmp_path)
+    (tmp_path / f"{ISBN}.jpg.part").write_bytes(COVER[:1000])
+
+    path = fetcher.fetch(ISBN, f"{server.url}/c.jpg")
+
+    assert open(path, "rb").read() == COVER
+    fetcher.close()
+
+
+def test_spliced_resume_is_rejected(stub_server, tmp_path):
+    # سرور بازه‌ای از وسط فایل می‌فرستد؛ نه به فایل ناقص اضافه می‌شود نه به عنوان تصویر قبول می‌شود
+    server = start(stub_server, lambda ref: cover_handler(ref, start_override=5000))
+    fetcher = make_fetcher(tmp_path)
+    (tmp_path / f"{ISBN}.jpg.part").write_bytes(COVER[:1000])
+
+    assert fetcher.fetch(ISBN, f"{server.url}/c.jpg") is None
+    assert not (tmp_path / f"{ISBN}.jpg").exists()
+    fetcher.close()
+
+
+def test_416_retries_only_once(stub_server, tmp_path):
+    server = stub_server(lambda method, path, body: (416, "text/plain", b""))
+    fetcher = make_fetcher(tmp_path)
+    (tmp_path / f"{ISBN}.jpg.part").write_bytes(b"x" * 10)
+
+    assert fetcher.fetch(ISBN, f"{server.url}/c.jpg") is None
+    assert len(server.requests) == 2
+    assert "Range" not in server.headers[1]
+    fetcher.close()
+
+
+def test_disk_error_fails_only_that_image(stub_server, tmp_path):
+    server = stub_server(lambda method, path, body: (200, "image/jpeg", COVER))
+    fetcher = make_fetcher(tmp_path)
+    # پوشه به جای فایل .part: open خطای OSError می‌دهد
+    os.mkdir(tmp_path / "bad.jpg.part")
+
+    paths = fetcher.fetch_all([("bad", f"{server.url}/a.jpg"), ("good", f"{server.url}/b.jpg")])
+
+    assert paths["bad"] is None
+    assert paths["good"] == str(tmp_path / "good.jpg")
+    fetcher.close()
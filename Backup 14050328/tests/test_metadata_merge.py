@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+"""Enricher.iter_enrich: ترتیب نتیجه‌ها و لغو شابک‌های صف‌شده با توقف مصرف‌کننده."""
+import threading
+import time
+
+from metadata_merge import Enricher
+
+ISBNS = [f"978600{i:07d}" for i in range(40)]
+
+
+def make_source(delay):
+    calls = []
+    lock = threading.Lock()
+
+    def fetch(isbn, lacking):
+        with lock:
+            calls.append(isbn)
+        time.sleep(delay(isbn))
+        return {"عنوان اصلی": f"عنوان {isbn}"}
+    return fetch, calls
+
+
+def test_results_follow_input_order():
+    fetch, calls = make_source(lambda isbn: 0.02 if int(isbn[-2:]) < 3 else 0.0)
+    enricher = Enricher([("iranketab", fetch)], required=(), log=lambda _: None)
+
+    rows = list(enricher.iter_enrich(ISBNS[:10], workers=4))
+
+    assert [merged["عنوان اصلی"] for merged, _, _ in rows] == [f"عنوان {isbn}" for isbn in ISBNS[:10]]
+    assert sorted(calls) == ISBNS[:10]
+
+
+def test_closing_early_leaves_queued_isbns_unfetched():
+    fetch, calls = make_source(lambda isbn: 0.02)
+    enricher = Enricher([("iranketab", fetch)], required=(), log=lambda _: None)
+    rows = enricher.iter_enrich(ISBNS, workers=2)
+
+    next(rows)
+    rows.close()
+
+    assert len(calls) <= 4
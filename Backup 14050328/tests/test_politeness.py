@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""PolitenessScheduler در برابر سرور محلی که محدود می‌کند: Retry-After، کاهش نرخ با 429/503 و افزایش با پاسخ سریع."""
+import time
+
+import requests
+
+from politeness import PolitenessScheduler
+
+
+def throttling_handler(responses):
+    """responses: کد پاسخ هر درخواست به ترتیب (بعد از تمام شدن همه 200)؛ زمان رسیدن هر درخواست ثبت می‌شود."""
+    arrived = []
+
+    def handle(method, path, body):
+        arrived.append(time.monotonic())
+        status = responses[len(arrived) - 1] if len(arrived) <= len(responses) else 200
+        if status in (429, 503):
+            return status, "text/plain", b"slow down", {"Retry-After": "1"}
+        return status, "text/plain", b"ok"
+    return handle, arrived
+
+
+def polite_get(session, scheduler, url):
+    scheduler.wait(url)
+    r = session.get(url, timeout=5)
+    scheduler.feedback(url, r.status_code, r.elapsed.total_seconds(), r.headers.get("Retry-After"))
+    return r.status_code
+
+
+def test_no_request_before_retry_after_ends(stub_server):
+    handle, arrived = throttling_handler([429])
+    server = stub_server(handle)
+    scheduler = PolitenessScheduler(rate=50.0, max_rate=50.0)
+    url = f"{server.url}/book/1"
+
+    with requests.Session() as session:
+        statuses = [polite_get(session, scheduler, url) for _ in range(3)]
+
+    assert statuses == [429, 200, 200]
+    assert arrived[1] - arrived[0] >= 1.0
+    assert scheduler.stats["throttled"] == 1
+
+
+def test_rate_drops_after_429_and_503(stub_server):
+    handle, _ = throttling_handler([200, 429, 503])
+    server = stub_server(handle)
+    scheduler = PolitenessScheduler(rate=20.0, min_rate=0.5, max_rate=20.0, fast=0.0, max_retry_after=0)
+    url = f"{server.url}/book/1"
+
+    with requests.Session() as session:
+        rates = []
+        for _ in range(3):
+            polite_get(session, scheduler, url)
+            rates.append(scheduler.rate_for(url))
+
+    assert rates[0] == 20.0
+    assert rates[1] == 10.0
+    assert rates[2] == 5.0
+    # نرخ میزبان‌های دیگر دست نمی‌خورد
+    assert scheduler.rate_for("http://other.example/") == 20.0
+
+
+def test_rate_recovers_after_fast_replies(stub_server):
+    handle, _ = throttling_handler([429])
+    server = stub_server(handle)
+    scheduler = PolitenessScheduler(rate=10.0, min_rate=1.0, max_rate=12.0, increase=1.0, max_retry_after=0)
+    url = f"{server.url}/book/1"
+
+    with requests.Session() as session:
+        polite_get(session, scheduler, url)
+        throttled = scheduler.rate_for(url)
+        for _ in range(10):
+            assert polite_get(session, scheduler, url) == 200
+
+    assert throttled == 5.0
+    assert scheduler.rate_for(url) == 12.0
@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+"""search_index: فقط فهرست‌های سه‌حرفی فرستاده می‌شوند و کاندیداها همان جستجوی زیررشته‌ای را می‌دهند."""
+import search_index
+
+BOOKS = [
+    {"title_main": "تاریخ ايران", "author": "علی", "year": "۱۳۹۹"},
+    {"title_main": "کتاب نمونه", "publisher": "ققنوس", "pages": "320"},
+    {"title_main": "ایران‌شناسی", "translator": "مترجم", "code": "12"},
+]
+
+
+def decode(deltas):
+    ids, acc = [], 0
+    for d in deltas:
+        acc += d
+        ids.append(acc)
+    return ids
+
+
+def test_index_ships_only_postings():
+    index = search_index.build_index(BOOKS)
+
+    assert set(index) == {"n", "grams"}
+
+
+def test_postings_cover_every_substring_match():
+    index = search_index.build_index(BOOKS)
+    keys = [search_index.search_text(book) for book in BOOKS]
+
+    for query in ["ایران", "139", "نمونه", "ققنوس 320"]:
+        q = search_index.search_text({"title_main": query})
+        candidates = None
+        for g in search_index.grams(q):
+            ids = set(decode(index["grams"].get(g, [])))
+            candidates = ids if candidates is None else candidates & ids
+        expected = {i for i, key in enumerate(keys) if q in key}
+        assert expected and expected <= candidates
@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+"""OpenpyxlBackend.flush: تصویر خراب رد می‌شود و مقدارهای همان دسته ذخیره می‌شوند."""
+import openpyxl
+import pytest
+
+pytest.importorskip("PIL.Image")
+from PIL import Image
+
+from workbook_backend import OpenpyxlBackend
+
+
+def test_bad_image_does_not_lose_the_batch(tmp_path):
+    path = str(tmp_path / "books.xlsx")
+    wb = openpyxl.Workbook()
+    wb.active.append(["شابک", "عنوان اصلی", "تصویر"])
+    wb.active.append(["9786001234567", None, None])
+    wb.active.append(["9786001234568", None, None])
+    wb.save(path)
+    good = str(tmp_path / "good.png")
+    Image.new("RGB", (60, 90), (200, 0, 0)).save(good)
+    bad = str(tmp_path / "bad.jpg")
+    with open(bad, "wb") as f:
+        f.write(b"not an image")
+
+    book = OpenpyxlBackend(path)
+    book.write_row(2, {2: "عنوان یک"})
+    book.write_row(3, {2: "عنوان دو"})
+    book.insert_image(2, 3, bad)
+    book.insert_image(3, 3, good)
+    book.flush()
+    book.close()
+
+    ws = openpyxl.load_workbook(path).active
+    assert [ws.cell(row=r, column=2).value for r in (2, 3)] == ["عنوان یک", "عنوان دو"]
+    assert [img.anchor._from.row for img in ws._images] == [2]
@@ -0,0 +1,222 @@
+# -*- coding: utf-8 -*-
+"""
+لایه‌ی دسترسی به فایل اکسل برای خزنده.
+- OpenpyxlBackend: بدون نیاز به Excel (روی لینوکس هم اجرا می‌شود)
+- Win32ComBackend: همان روش قبلی از طریق Excel (فقط ویندوز)
+
+هر دو خواندن ستونی (یک بار برای همه ردیف‌ها) و نوشتن دسته‌ای (هنگام flush) دارند.
+"""
+import os
+from abc import ABC, abstractmethod
+
+
+class WorkbookBackend(ABC):
+    """
+    رابط مشترک. ردیف و ستون از 1 شمرده می‌شوند (ردیف 1 = هدر). صف نوشتن (write_row و
+    insert_image) اینجاست؛ خواندن و flush را هر backend خودش پیاده می‌کند.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.pending = {}   # row -> {col: value}
+        self.pending_images = {}  # (row, col) -> image path
+
+    @abstractmethod
+    def read_headers(self):
+        """{نام ستون: شماره‌ی ستون} از ردیف هدر."""
+
+    @abstractmethod
+    def add_header(self, col, name):
+        """نوشتن نام ستون تازه در ردیف هدر."""
+
+    @abstractmethod
+    def last_row(self):
+        """شماره‌ی آخرین ردیف پر."""
+
+    @abstractmethod
+    def read_column(self, col, first_row, last_row):
+        """مقادیر یک ستون از first_row تا last_row به صورت لیست."""
+
+    def write_row(self, row, values):
+        """values: dict {col: value}. تا flush بعدی در حافظه می‌ماند."""
+        self.pending.setdefault(row, {}).update(values)
+
+    def insert_image(self, row, col, image_path):
+        """تصویر قبلی سلول حذف و تصویر جدید (هم‌اندازه سلول) جایگزین می‌شود."""
+        self.pending_images[(row, col)] = image_path
+
+    @abstractmethod
+    def flush(self):
+        """نوشتن pending و pending_images در فایل و ذخیره."""
+
+    def close(self):
+        pass
+
+
+class OpenpyxlBackend(WorkbookBackend):
+    def __init__(self, path, sheet_index=0):
+        super().__init__(path)
+        import openpyxl
+        self.wb = openpyxl.load_workbook(path)
+        self.ws = self.wb.worksheets[sheet_index]
+
+    def read_headers(self):
+        header_map = {}
+        for col, value in enumerate(next(self.ws.iter_rows(min_row=1, max_row=1, values_only=True), ()), start=1):
+            if value:
+                header_map[str(value).strip()] = col
+        return header_map
+
+    def add_header(self, col, name):
+        self.ws.cell(row=1, column=col).value = name
+
+    def last_row(self):
+        return self.ws.max_row
+
+    def read_column(self, col, first_row, last_row):
+        if last_row < first_row:
+            return []
+        return [row[0] for row in self.ws.iter_rows(min_row=first_row, max_row=last_row,
+                                                    min_col=col, max_col=col, values_only=True)]
+
+    def _cell_size_px(self, row, col):
+        from openpyxl.utils import get_column_letter
+        width = self.ws.column_dimensions[get_column_letter(col)].width or 8.43
+        height = self.ws.row_dimensions[row].height or 15
+        # تبدیل تقریبی عرض کاراکتری و ارتفاع point به پیکسل
+        return int(width * 7 + 5), int(height * 4 / 3)
+
+    def _remove_images(self, row, col):
+        keep = []
+        for img in self.ws._images:
+            marker = getattr(img.anchor, "_from", None)
+            # AnchorMarker از 0 شمرده می‌شود
+            if marker is not None and marker.row == row - 1 and marker.col == col - 1:
+                continue
+            keep.append(img)
+        self.ws._images = keep
+
+    def _add_image(self, row, col, image_path):
+        from openpyxl.drawing.image import Image
+        from openpyxl.drawing.spreadsheet_drawing import AnchorMarker, TwoCellAnchor
+
+        img = Image(image_path)
+        img.width, img.height = self._cell_size_px(row, col)
+        # معادل Placement = MoveAndSize در Excel
+        img.anchor = TwoCellAnchor(editAs="twoCell",
+                                   _from=AnchorMarker(col=col - 1, row=row - 1),
+                                   to=AnchorMarker(col=col, row=row))
+        self.ws.add_image(img)
+
+    def flush(self):
+        for row, values in self.pending.items():
+            for col, value in values.items():
+                self.ws.cell(row=row, column=col).value = value
+        for (row, col), image_path in self.pending_images.items():
+            # مثل Win32ComBackend: یک تصویر خراب نباید جلوی ذخیره‌ی مقدارهای همین دسته را بگیرد
+            try:
+                self._remove_images(row, col)
+                self._add_image(row, col, image_path)
+            except Exception as e:
+                print(f"⚠️ خطا در درج تصویر: {e}")
+        self.pending.clear()
+        self.pending_images.clear()
+        self.wb.save(self.path)
+
+
+class Win32ComBackend(WorkbookBackend):
+    def __init__(self, path, visible=True, sheet_index=1):
+        super().__init__(path)
+        try:
+            import win32com.client as win32
+        except Exception:
+            raise SystemExit("❌ نیاز به pywin32 (python -m pip install pywin32)")
+        self.excel = win32.gencache.EnsureDispatch("Excel.Application")
+        self.excel.Visible = visible
+        self.wb = self.excel.Workbooks.Open(os.path.abspath(path))
+        self.ws = self.wb.Worksheets(sheet_index)
+
+    def _range_values(self, row1, col1, row2, col2):
+        """خواندن یک محدوده با یک فراخوانی COM؛ خروجی لیست ردیف‌ها."""
+        ws = self.ws
+        value = ws.Range(ws.Cells(row1, col1), ws.Cells(row2, col2)).Value
+        if not isinstance(value, tuple):
+            return [[value]]
+        return [list(r) for r in value]
+
+    @staticmethod
+    def _clean(value):
+        # COM اعداد را float برمی‌گرداند (مثلاً شابک 9786001234567.0)
+        if isinstance(value, float) and value.is_integer():
+            return int(value)
+        return value
+
+    def read_headers(self):
+        used_cols = self.ws.UsedRange.Columns.Count
+        header_map = {}
+        for col, value in enumerate(self._range_values(1, 1, 1, used_cols + 20)[0], start=1):
+            if value:
+                header_map[str(value).strip()] = col
+        return header_map
+
+    def add_header(self, col, name):
+        self.ws.Cells(1, col).Value = name
+
+    def last_row(self):
+        used = self.ws.UsedRange
+        return used.Row + used.Rows.Count - 1
+
+    def read_column(self, col, first_row, last_row):
+        if last_row < first_row:
+            return []
+        return [self._clean(r[0]) for r in self._range_values(first_row, col, last_row, col)]
+
+    def _remove_images(self, row, col):
+        shapes = self.ws.Shapes
+        # حلقه معکوس تا ایندکس‌ها هنگام حذف به هم نریزند
+        for i in range(shapes.Count, 0, -1):
+            shp = shapes.Item(i)
+            if shp.TopLeftCell.Row == row and shp.TopLeftCell.Column == col:
+                shp.Delete()
+
+    def _add_image(self, row, col, image_path):
+        cell = self.ws.Cells(row, col)
+        pic = self.ws.Shapes.AddPicture(os.path.abspath(image_path), False, True,
+                                        cell.Left, cell.Top, cell.Width, cell.Height)
+        pic.Placement = 1  # Move and Size
+
+    @staticmethod
+    def _column_runs(values):
+        """{col: value} → لیست (ستون شروع، [مقادیر پشت‌سرهم])."""
+        runs = []
+        for col in sorted(values):
+            if runs and runs[-1][0] + len(runs[-1][1]) == col:
+                runs[-1][1].append(values[col])
+            else:
+                runs.append((col, [values[col]]))
+        return runs
+
+    def flush(self):
+        ws = self.ws
+        for row, values in self.pending.items():
+            # ستون‌های پشت‌سرهم با یک فراخوانی COM نوشته می‌شوند (به جای یک فراخوانی برای هر سلول)
+            for first, run in self._column_runs(values):
+                last = first + len(run) - 1
+                ws.Range(ws.Cells(row, first), ws.Cells(row, last)).Value = (tuple(run),)
+        for (row, col), image_path in self.pending_images.items():
+            try:
+                self._remove_images(row, col)
+                self._add_image(row, col, image_path)
+            except Exception as e:
+                print(f"⚠️ خطا در درج تصویر: {e}")
+        self.pending.clear()
+        self.pending_images.clear()
+        self.wb.Save()
+
+
+def open_backend(name, path, visible=True):
+    if name == "openpyxl":
+        return OpenpyxlBackend(path)
+    if name == "win32com":
+        return Win32ComBackend(path, visible=visible)
+    raise ValueError(f"backend ناشناخته: {name}")